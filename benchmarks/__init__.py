@@ -0,0 +1,5 @@
+"""Micro-benchmarks of the compute stages of the toolkit: parsers, compensators, filters and projectors.
+
+Run all of them with ``python -m benchmarks`` from the repository root, no camera is needed.
+See ``python -m benchmarks --help`` for storing results and comparing them with a baseline.
+"""
@@ -0,0 +1,57 @@
+"""
+Run the micro-benchmarks and compare them with a baseline.
+
+Usage:
+    python -m benchmarks                                  # print the results
+    python -m benchmarks -o results.json                  # store the results as JSON
+    python -m benchmarks -b baseline.json                 # fail on a regression against a baseline
+    python -m benchmarks -k parser -k tofCam660 -r 50     # only matching benchmarks, 50 repeats
+"""
+import argparse
+import sys
+
+from benchmarks.cases import all_benchmarks
+from benchmarks.runner import DEFAULT_THRESHOLD, compare, load_results, run_benchmarks, save_results
+
+
+def _print_result(result: dict) -> None:
+    print(f"{result['id']:<85} {result['median_s'] * 1E6:>11.1f} us "
+          f"{result['std_s'] * 1E6:>9.1f} us {result['peak_memory_bytes'] / 1024:>9.1f} KiB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', '--filter', action='append', default=[],
+                        help='only run benchmarks whose id contains all given substrings')
+    parser.add_argument('-r', '--repeat', type=int, default=20, help='number of timed repeats per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.01, help='minimal duration of a repeat in seconds')
+    parser.add_argument('-o', '--output', help='store the results in this JSON file')
+    parser.add_argument('-b', '--baseline', help='JSON results to compare with')
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed relative increase of time and memory against the baseline')
+    args = parser.parse_args(argv)
+
+    benchmarks = [benchmark for benchmark in all_benchmarks()
+                  if all(pattern in benchmark.id for pattern in args.filter)]
+    if not benchmarks:
+        print('No benchmark matches the filter', file=sys.stderr)
+        return 2
+
+    print(f"{'benchmark':<85} {'median':>14} {'std':>12} {'peak memory':>13}")
+    results = run_benchmarks(benchmarks, args.repeat, args.min_time, progress=_print_result)
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+    comparison = compare(results, load_results(args.baseline), args.threshold)
+    regressions = [entry for entry in comparison if entry['regression']]
+    print(f"\nCompared {len(comparison)} benchmarks with {args.baseline}, {len(regressions)} regressions")
+    for entry in regressions:
+        print(f"  {entry['id']:<85} time x{entry['time_ratio']:.2f}  memory x{entry['memory_ratio']:.2f}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
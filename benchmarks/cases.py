@@ -0,0 +1,208 @@
+import numpy as np
+
+from epc.tofCam660.parser import DcsParser, DistanceAndAmplitudeParser, Parser
+from epc.tofCam_lib.algorithms import calc_unambiguity_distance
+from epc.tofCam_lib.compensators import DRNUCompensation, FourthHarmonicCompensation
+from epc.tofCam_lib.crc import Crc, CrcMode
+from epc.tofCam_lib.filters import KalmanVideoDenoiser, TemporalFilter, edgeFilter, threshgrad
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
+from epc.tofCam_lib.projection_models import (PinholeCameraProjector, RadialCameraProjector,
+                                              _load_lens_table)
+
+from benchmarks.runner import Benchmark
+
+# image shapes (height, width) of the supported cameras and modes
+RESOLUTIONS = {
+    'tofCam660': (240, 320),
+    'tofCam660-binned': (120, 160),
+    'tofCam635': (60, 160),
+    'tofCam611': (8, 8),
+}
+PARSER_RESOLUTIONS = ('tofCam660', 'tofCam660-binned')
+IMAGE_DTYPES = ('uint16', 'float32', 'float64')
+FLOAT_DTYPES = ('float32', 'float64')
+
+MOD_FREQ_HZ = 12E6
+UNAMBIGUITY_MM = calc_unambiguity_distance(MOD_FREQ_HZ)
+LUT_STEPS = 50
+TOFCAM611_FOCAL_LENGTH_MM = 0.8  # pinhole lens of the TOFcam611
+# CRC protected sizes of the serial cameras: a command and a TOFcam635 distance and amplitude frame
+CRC_SIZES = {'command': 10, 'tofCam635': 60 * 160 * 4 + 25}
+
+
+def _distance_image(shape: tuple[int, int], dtype: str, seed: int = 0) -> np.ndarray:
+    """Tilted plane with noise inside the unambiguity range"""
+    rng = np.random.default_rng(seed)
+    y, x = np.indices(shape)
+    distance = 1000 + 4000 * x / shape[1] + 2000 * y / shape[0] + rng.normal(0, 20, shape)
+    return distance.astype(dtype)
+
+
+def _amplitude_image(shape: tuple[int, int], dtype: str, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(50, 2000, shape).astype(dtype)
+
+
+def _frame_bytes(shape: tuple[int, int], data: np.ndarray) -> bytes:
+    rows, cols = shape
+    header = Parser.headerStruct.pack(1, 0, cols, rows, 0, 0, cols - 1, rows - 1, 100, 0, 0, 3500,
+                                      Parser.headerStruct.size)
+    return header + data.astype('<u2').tobytes()
+
+
+def parser_benchmarks() -> list[Benchmark]:
+    benchmarks = []
+    for resolution in PARSER_RESOLUTIONS:
+        shape = RESOLUTIONS[resolution]
+        params = {'resolution': resolution, 'dtype': 'uint16'}
+
+        for dcs_format in DcsParser.FORMATS:
+            def dcs_setup(shape=shape, dcs_format=dcs_format):
+                rng = np.random.default_rng(0)
+                dcs = rng.integers(0, 4096, (4, *shape))
+                dcs[0, ::17, ::13] = 64002  # a few error codes, as in a real frame
+                parser = DcsParser(dcs_format)
+                frame = _frame_bytes(shape, dcs)
+                return lambda: parser.parse(frame)
+
+            benchmarks.append(Benchmark('parser', 'DcsParser', {'resolution': resolution, 'dtype': dcs_format}, dcs_setup))
+
+        def distance_amplitude_setup(shape=shape):
+            data = np.stack((_distance_image(shape, 'uint16'), _amplitude_image(shape, 'uint16')), axis=-1)
+            parser = DistanceAndAmplitudeParser()
+            frame = _frame_bytes(shape, data)
+            return lambda: parser.parse(frame)
+
+        benchmarks.append(Benchmark('parser', 'DistanceAndAmplitudeParser', params, distance_amplitude_setup))
+    return benchmarks
+
+
+def compensator_benchmarks() -> list[Benchmark]:
+    benchmarks = []
+    step_size = UNAMBIGUITY_MM / LUT_STEPS
+    for resolution, shape in RESOLUTIONS.items():
+        for dtype in FLOAT_DTYPES:
+            params = {'resolution': resolution, 'dtype': dtype}
+
+            def drnu_setup(shape=shape, dtype=dtype):
+                rng = np.random.default_rng(0)
+                lut = rng.normal(0, 30, (*shape, LUT_STEPS))
+                compensation = DRNUCompensation(lut, step_size, (0, 0, shape[1], shape[0]))
+                distance = _distance_image(shape, dtype)
+                return lambda: compensation.compensate(distance)
+
+            benchmarks.append(Benchmark('compensator', 'DRNUCompensation', params, drnu_setup))
+
+        for dtype in IMAGE_DTYPES:
+            params = {'resolution': resolution, 'dtype': dtype}
+
+            def fourth_harmonic_setup(shape=shape, dtype=dtype):
+                lut = 30 * np.sin(np.linspace(0, 8 * np.pi, LUT_STEPS))
+                compensation = FourthHarmonicCompensation(step_size, lut, UNAMBIGUITY_MM)
+                distance = _distance_image(shape, dtype)
+                return lambda: compensation.compensate(distance)
+
+            benchmarks.append(Benchmark('compensator', 'FourthHarmonicCompensation', params, fourth_harmonic_setup))
+    return benchmarks
+
+
+def filter_benchmarks() -> list[Benchmark]:
+    benchmarks = []
+    for resolution, shape in RESOLUTIONS.items():
+        for dtype in IMAGE_DTYPES:
+            params = {'resolution': resolution, 'dtype': dtype}
+
+            def kalman_setup(shape=shape, dtype=dtype):
+                denoiser = KalmanVideoDenoiser()
+                frames = [_distance_image(shape, dtype, seed) for seed in range(2)]
+                amplitude = _amplitude_image(shape, dtype)
+                denoiser(frames[0], amplitude)
+                state = {'index': 0}
+
+                def run():
+                    state['index'] ^= 1
+                    return denoiser(frames[state['index']], amplitude)
+                return run
+
+            def temporal_setup(shape=shape, dtype=dtype):
+                temporal_filter = TemporalFilter()
+                frames = [_distance_image(shape, dtype, seed) for seed in range(2)]
+                state = {'index': 0}
+
+                def run():
+                    state['index'] ^= 1
+                    return temporal_filter(frames[state['index']])
+                return run
+
+            def edge_setup(shape=shape, dtype=dtype):
+                distance = _distance_image(shape, dtype)
+                return lambda: edgeFilter(distance)
+
+            def threshgrad_setup(shape=shape, dtype=dtype):
+                amplitude = _amplitude_image(shape, dtype)
+                return lambda: threshgrad(amplitude, highsens=1500, lowsens=500)
+
+            benchmarks.append(Benchmark('filter', 'KalmanVideoDenoiser', params, kalman_setup))
+            benchmarks.append(Benchmark('filter', 'TemporalFilter', params, temporal_setup))
+            benchmarks.append(Benchmark('filter', 'edgeFilter', params, edge_setup))
+            benchmarks.append(Benchmark('filter', 'threshgrad', params, threshgrad_setup))
+    return benchmarks
+
+
+def projector_benchmarks() -> list[Benchmark]:
+    benchmarks = []
+    for resolution, shape in RESOLUTIONS.items():
+        height, width = shape
+        for dtype in FLOAT_DTYPES:
+            params = {'resolution': resolution, 'dtype': dtype}
+
+            def projector(height=height, width=width, dtype=dtype, resolution=resolution):
+                if resolution == 'tofCam611':
+                    pinhole = PinholeCameraProjector((height, width), TOFCAM611_FOCAL_LENGTH_MM)
+                    pinhole._lens_matrix = pinhole._lens_matrix.astype(dtype)
+                    return pinhole
+                return RadialCameraProjector.from_lens_calibration('Wide Field', width, height, dtype=dtype)
+
+            def project_setup(shape=shape, projector=projector):
+                camera_projector = projector()
+                depth = _distance_image(shape, 'uint16')
+                return lambda: camera_projector.project(depth)
+
+            def point_cloud_setup(shape=shape, projector=projector):
+                camera_projector = projector()
+                builder = PointCloudBuilder(flip='ud')
+                depth = _distance_image(shape, 'uint16')
+                out = np.empty((3, depth.size), dtype=np.float32)
+                return lambda: builder.build(camera_projector, depth, 64000, out=out)
+
+            def lens_matrix_setup(height=height, width=width):
+                # uncached calculation of the lens matrix, as done on a change of the ROI or lens
+                angle, rp = _load_lens_table('Wide Field')
+                return lambda: RadialCameraProjector(rp, angle, width, height)
+
+            benchmarks.append(Benchmark('projector', 'project', params, project_setup))
+            benchmarks.append(Benchmark('projector', 'PointCloudBuilder.build', params, point_cloud_setup))
+            if dtype == 'float64':
+                benchmarks.append(Benchmark('projector', 'RadialCameraProjector.__init__', params, lens_matrix_setup))
+    return benchmarks
+
+
+def crc_benchmarks() -> list[Benchmark]:
+    benchmarks = []
+    modes = [CrcMode.CRC32_UINT8, CrcMode.CRC32_STM32]
+    if Crc(mode=CrcMode.CRC32_UINT8_LIB).useLib:
+        modes.append(CrcMode.CRC32_UINT8_LIB)
+    for size_name, size in CRC_SIZES.items():
+        for mode in modes:
+            def crc_setup(size=size, mode=mode):
+                crc = Crc(mode=mode)
+                data = bytearray(np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes())
+                return lambda: crc.calculate(data)
+
+            benchmarks.append(Benchmark('crc', mode.name, {'size': size_name}, crc_setup))
+    return benchmarks
+
+
+def all_benchmarks() -> list[Benchmark]:
+    return (parser_benchmarks() + compensator_benchmarks() + filter_benchmarks() + projector_benchmarks() +
+            crc_benchmarks())
@@ -0,0 +1,130 @@
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import numpy as np
+
+# a stage is slower than the baseline if its median time grew by more than this fraction
+DEFAULT_THRESHOLD = 0.25
+
+
+class Benchmark:
+    """A single timed stage: `setup` builds the inputs once, `run` is timed on them."""
+
+    def __init__(self, group: str, name: str, params: dict, setup: Callable[[], Callable[[], object]]):
+        self.group = group
+        self.name = name
+        self.params = params
+        self.setup = setup
+
+    @property
+    def id(self) -> str:
+        params = ','.join(f'{key}={value}' for key, value in self.params.items())
+        return f'{self.group}/{self.name}[{params}]'
+
+
+def measure(benchmark: Benchmark, repeat: int = 20, min_time_s: float = 0.01) -> dict:
+    """Time a benchmark and record the peak memory of a single call.
+
+    Every repeat runs the stage as often as needed to take at least `min_time_s`, the
+    time per call of the repeats is reported as median, minimum and standard deviation.
+    The peak memory is traced in a separate call, tracing would distort the timing.
+    """
+    run = benchmark.setup()
+    run()  # warm up caches and lazily allocated buffers
+
+    t0 = time.perf_counter()
+    run()
+    single_s = time.perf_counter() - t0
+    number = max(1, int(min_time_s / max(single_s, 1E-9)))
+
+    times = np.empty(repeat)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                run()
+            times[i] = (time.perf_counter() - t0) / number
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'id': benchmark.id,
+        'group': benchmark.group,
+        'name': benchmark.name,
+        'params': benchmark.params,
+        'median_s': float(np.median(times)),
+        'min_s': float(times.min()),
+        'std_s': float(times.std()),
+        'calls': number * repeat,
+        'peak_memory_bytes': int(peak),
+    }
+
+
+def run_benchmarks(benchmarks: list[Benchmark], repeat: int = 20, min_time_s: float = 0.01,
+                   progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Measure all benchmarks and return the results with information about the machine"""
+    results = []
+    for benchmark in benchmarks:
+        result = measure(benchmark, repeat, min_time_s)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+
+
+def save_results(results: dict, file: str) -> None:
+    with open(file, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(file: str) -> dict:
+    with open(file, 'r') as f:
+        return json.load(f)
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Compare the median times and peak memory with a baseline.
+
+    Returns:
+        list[dict]: one entry per benchmark present in both, with the ratios to the
+            baseline and `regression` set if the time or the memory grew by more than
+            `threshold`
+    """
+    baseline_results = {result['id']: result for result in baseline['results']}
+    comparison = []
+    for result in results['results']:
+        reference = baseline_results.get(result['id'])
+        if reference is None:
+            continue
+        time_ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else float('inf')
+        memory_ratio = (result['peak_memory_bytes'] / reference['peak_memory_bytes']
+                        if reference['peak_memory_bytes'] else 1.0)
+        comparison.append({
+            'id': result['id'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': time_ratio > 1 + threshold or memory_ratio > 1 + threshold,
+        })
+    return comparison
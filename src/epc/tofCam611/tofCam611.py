@@ -6,6 +6,7 @@ from typing import Optional
 from epc.tofCam_lib.tofCam import TOFcam, TOF_Settings_Controller, Dev_Infos_Controller
 from epc.tofCam_lib.crc import Crc, CrcMode
 from epc.tofCam_lib.projection_models import PinholeCameraProjector
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
 from epc.tofCam611.communicationType import communicationType as ComType
 from epc.tofCam611.commandList import commandList as CommandList
 from epc.tofCam611.serialInterface import SerialInterface
@@ -116,6 +117,7 @@ class InterfaceWrapper:
 
 class TOFcam611_Settings(TOF_Settings_Controller):
     def __init__(self, interface: InterfaceWrapper, device_type: int) -> None:
+        super().__init__()
         self.interface = interface
         self._min_amplitude = 0
         self.__mod_freq = 0
@@ -272,6 +274,7 @@ class TOFcam611(TOFcam):
         device_type = self.device.get_device_ids()[1]
         self.settings = TOFcam611_Settings(self.interface, device_type)
         super().__init__(self.settings, self.device)
+        self._point_cloud_builder = PointCloudBuilder(flip='lr')
 
     def __del__(self):
         if self.interface.com is not None:
@@ -334,13 +337,15 @@ class TOFcam611(TOFcam):
         amplitude = np.reshape(amplRaw, self.settings.resolution)
         return distance/10, amplitude
 
-    def get_point_cloud(self):
+    def get_point_cloud(self, valid_only: bool = False, out: Optional[np.ndarray] = None):
+        """returns the points of shape (3, n) and their amplitudes, only the points with a valid depth if valid_only
+        is set. Otherwise the points are written to out if given, a float32 buffer of shape (3, n)"""
         depth, amplitude = self.get_distance_and_amplitude_image()
-        depth  = depth.astype(np.float32)
-        depth[depth >= self.settings.maxDepth] = np.nan
         amplitude[amplitude > DEFAULT_MAX_AMPLITUDE] = 0 # remove error values
 
-        # calculate point cloud from the depth image
-        points = 1E-3 * self.settings.projector.project(np.fliplr(depth))
-        points = points.reshape(3, -1)
-        return points, amplitude.flatten()
+        # calculate point cloud from the depth image, the builder flips the lens matrix instead of the image
+        if valid_only:
+            return self._point_cloud_builder.build_valid(
+                self.settings.projector, depth, amplitude, self.settings.maxDepth)
+        points = self._point_cloud_builder.build(self.settings.projector, depth, self.settings.maxDepth, out=out)
+        return points, amplitude.ravel()
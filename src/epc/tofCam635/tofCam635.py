@@ -11,6 +11,7 @@ from epc.tofCam_lib.crc import Crc, CrcMode
 from epc.tofCam635.communication import Type as ComType
 from epc.tofCam635.communication import Data as Data_Type
 from epc.tofCam_lib.projection_models import RadialCameraProjector
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
 
 from epc.tofCam635.communication import SerialInterface
 from epc.tofCam635.communication import CommandList
@@ -23,17 +24,31 @@ DEFAULT_MAX_AMPLITUDE = 2896
 
 log = logging.getLogger('TOFcam635')
 
+DISTANCE_MASK = 0x3FFF
+CONFIDENCE_SHIFT = 14
+
+
+def decode_distance_confidence(raw: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Split raw 16 bit pixel values into the 14 bit value and the 2 bit confidence.
+
+    Args:
+        raw (np.ndarray): raw pixel values as received from the camera
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: value (int16), confidence (uint8)
+    """
+    raw = raw.view(np.uint16)
+    value = (raw & DISTANCE_MASK).astype(np.int16)
+    confidence = (raw >> CONFIDENCE_SHIFT).astype(np.uint8)
+    return value, confidence
+
 # THIS IS A TEMPORARY WRAPPER AND IS INTENDEN TO BE REPLACED AT SOME POINT BY A STANDARD INTERFACE FOR ALL TOF CAMERAS
 
 
 class InterfaceWrapper:
     def __init__(self, port: Optional[str] = None) -> None:
         self.com = SerialInterface(port)
-        try:
-            self.crc = Crc(mode=CrcMode.CRC32_UINT8_LIB, revout=False)
-        except:
-            log.warning("Fallback to python implementation for crc calculation (SLOW!)")
-            self.crc = Crc(mode=CrcMode.CRC32_UINT8, revout=False)
+        self.crc = Crc(mode=CrcMode.CRC32_UINT8, revout=False)
 
         self.header = TofCam635Header()
         self.__lock = Lock()
@@ -194,6 +209,14 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         self.projector = RadialCameraProjector.from_lens_calibration(
             lensType='Wide Field', width=self.resolution[0], height=self.resolution[1])
 
+    def _transmit_setting(self, cmd_id: int, arg: list[int], setting=None) -> bool:
+        """Transmit a setting command unless the camera is known to be in that state already.
+
+        The last argument is remembered per command or per setting, if a command sets several.
+        """
+        return self._apply_setting(cmd_id if setting is None else setting, tuple(arg),
+                                   lambda: self.interface.transmit(cmd_id, arg))
+
     def set_roi(self, roi: tuple[int, int, int, int]) -> None:
         """ Set the region of interest (ROI) for the camera.
             The ROI is set to the nearest multiple of 4
@@ -202,7 +225,7 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         roi = tuple(round(x/4)*4 for x in roi)
         x0, y0, x1, y1 = roi
         log.info(f"Setting ROI to {x0}, {y0}, {x1}, {y1}")
-        self.interface.transmit(CommandList.COMMAND_SET_ROI, [x0 & 0xff, (x0 >> 8) & 0xff,  y0 & 0xff, (
+        self._transmit_setting(CommandList.COMMAND_SET_ROI, [x0 & 0xff, (x0 >> 8) & 0xff,  y0 & 0xff, (
             y0 >> 8) & 0xff,  x1 & 0xff, (x1 >> 8) & 0xff,  y1 & 0xff, (y1 >> 8) & 0xff])
         self.resolution = (x1-x0, y1-y0)
         self.roi = roi
@@ -235,8 +258,9 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         """
         log.info(f"Setting minimal amplitude to {amplitude}")
         for i in range(5):
-            self.interface.transmit(CommandList.COMMAND_SET_AMPLITUDE_LIMIT, [
-                                    i, amplitude & 0xff, (amplitude >> 8) & 0xff])
+            self._transmit_setting(CommandList.COMMAND_SET_AMPLITUDE_LIMIT, [
+                                   i, amplitude & 0xff, (amplitude >> 8) & 0xff],
+                                   setting=(CommandList.COMMAND_SET_AMPLITUDE_LIMIT, i))
 
     def set_dll_steps(self, step: int = 0):
         log.info(f"Setting DLL step to {step}")
@@ -254,7 +278,7 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         log.info(f"Setting grayscale integration time to {int_time_us}")
         if 0 > int_time_us > MAX_DIST_INT_TIME:
             raise ValueError(f"Integration time '{int_time_us}' is too high")
-        self.interface.transmit(CommandList.COMMAND_SET_INTEGRATION_TIME_GRAYSCALE, [
+        self._transmit_setting(CommandList.COMMAND_SET_INTEGRATION_TIME_GRAYSCALE, [
                                 int_time_us & 0xff, (int_time_us >> 8) & 0xff])
 
     def set_integration_time_hdr(self, index: int, int_time_us: int) -> None:
@@ -263,8 +287,9 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         log.info(f"Setting HDR integration time {index} to {int_time_us}")
         if 0 > int_time_us > MAX_DIST_INT_TIME:
             raise ValueError(f"Integration time '{int_time_us}' is too high")
-        self.interface.transmit(CommandList.COMMAND_SET_INT_TIME_DIST, [
-                                index, int_time_us & 0xff, (int_time_us >> 8) & 0xff])
+        self._transmit_setting(CommandList.COMMAND_SET_INT_TIME_DIST, [
+                               index, int_time_us & 0xff, (int_time_us >> 8) & 0xff],
+                               setting=(CommandList.COMMAND_SET_INT_TIME_DIST, index))
 
     def set_modulation(self, frequency_mhz: float, channel=0):
         if frequency_mhz == 10:
@@ -275,9 +300,9 @@ class TOFcam635_Settings(TOF_Settings_Controller):
             raise ValueError(f"Invalid modulation frequency '{frequency_mhz}'")
         log.info(
             f'Setting modulation: frequency={frequency_mhz}MHz, channel={channel}')
-        self.interface.transmit(
+        self._transmit_setting(
             CommandList.COMMAND_SET_MODULATION_FREQUENCY, [frequency_code])
-        self.interface.transmit(
+        self._transmit_setting(
             CommandList.COMMAND_SET_MOD_CHANNEL, [0, channel])
 
     def get_modulation_frequencies(self) -> list[float]:
@@ -288,11 +313,11 @@ class TOFcam635_Settings(TOF_Settings_Controller):
 
     def set_binning(self, enable: bool) -> None:
         log.info(f"Setting binning to {enable}")
-        self.interface.transmit(CommandList.COMMAND_SET_BINNING, [int(enable)])
+        self._transmit_setting(CommandList.COMMAND_SET_BINNING, [int(enable)])
 
     def set_operation_mode(self, mode: int) -> None:
         log.info(f"Setting operation mode to {mode}")
-        self.interface.transmit(CommandList.COMMAND_SET_OPERATION_MODE, [mode])
+        self._transmit_setting(CommandList.COMMAND_SET_OPERATION_MODE, [mode])
 
     def set_hdr(self, mode=0) -> None:
         """Set the HDR mode for the camera.
@@ -307,42 +332,42 @@ class TOFcam635_Settings(TOF_Settings_Controller):
             raise ValueError(f"Invalid HDR mode: {mode}. Must be 0, 1 or 2")
 
         log.info(f"Setting HDR mode to {mode}")
-        self.interface.transmit(CommandList.COMMAND_SET_HDR, [mode])
+        self._transmit_setting(CommandList.COMMAND_SET_HDR, [mode])
 
     def set_median_filter(self, enable: bool) -> None:
         log.info(f"Setting median filter to {enable}")
-        self.interface.transmit(
+        self._transmit_setting(
             CommandList.COMMAND_SET_MEDIAN_FILTER, [int(enable)])
 
     def set_average_filter(self, enable: bool) -> None:
         log.info(f"Setting average filter to {enable}")
-        self.interface.transmit(
+        self._transmit_setting(
             CommandList.COMMAND_SET_AVERAGE_FILTER, [int(enable)])
 
     def set_temporal_filter(self, enable: bool, threshold: int, factor: int) -> None:
         log.info(
             f"Setting temporal filter to {enable} with threshold {threshold} and factor {factor}")
         if enable:
-            self.interface.transmit(CommandList.COMMAND_SET_TEMPORAL_FILTER_WFOV, [
-                                    threshold & 0xff, (threshold >> 8) & 0xff, factor & 0xff, (factor >> 8) & 0xff])
+            self._transmit_setting(CommandList.COMMAND_SET_TEMPORAL_FILTER_WFOV, [
+                                   threshold & 0xff, (threshold >> 8) & 0xff, factor & 0xff, (factor >> 8) & 0xff])
         else:
-            self.interface.transmit(
+            self._transmit_setting(
                 CommandList.COMMAND_SET_TEMPORAL_FILTER_WFOV, [0, 0, 0, 0])
 
     def set_edge_filter(self, enable: bool, threshold: int) -> None:
         log.info(f"Setting edge filter to {enable} with threshold {threshold}")
         if enable:
-            self.interface.transmit(CommandList.COMMAND_SET_EDGE_FILTER, [
-                                    threshold & 0xff, (threshold >> 8) & 0xff])
+            self._transmit_setting(CommandList.COMMAND_SET_EDGE_FILTER, [
+                                   threshold & 0xff, (threshold >> 8) & 0xff])
         else:
-            self.interface.transmit(
+            self._transmit_setting(
                 CommandList.COMMAND_SET_EDGE_FILTER, [0, 0])
 
     def set_interference_detection(self, enable: bool, useLast=False, limit=500):
         log.info(
             f"Setting interference detection to {enable} with useLast={useLast} and limit={limit}")
-        self.interface.transmit(CommandList.COMMAND_SET_INTERFERENCE_DETECTION, [
-                                int(enable), int(useLast), limit & 0xff, (limit >> 8) & 0xff])
+        self._transmit_setting(CommandList.COMMAND_SET_INTERFERENCE_DETECTION, [
+                               int(enable), int(useLast), limit & 0xff, (limit >> 8) & 0xff])
 
     @requires_fw_version(min_version='3.49')
     def set_illuminator_segments(self, illumination: int) -> None:
@@ -358,7 +383,7 @@ class TOFcam635_Settings(TOF_Settings_Controller):
         if illumination not in [0, 1, 2, 3]:
             raise ValueError(f"Invalid illumination value: {illumination}. Must be 0, 1, 2, or 3.")
         log.info(f"Setting illumination segments to {illumination}")
-        self.interface.transmit(CommandList.COMMAND_SET_ILLU_SEGMENT, [illumination])
+        self._transmit_setting(CommandList.COMMAND_SET_ILLU_SEGMENT, [illumination])
 
 
 class TOFcam635_Device(Dev_Infos_Controller):
@@ -367,6 +392,7 @@ class TOFcam635_Device(Dev_Infos_Controller):
 
     def __init__(self, cam: TOFcam635) -> None:
         super().__init__()
+        self.cam = cam
         self.interface = cam.interface
 
     def get_chip_infos(self) -> tuple[int, int]:
@@ -421,6 +447,8 @@ class TOFcam635_Device(Dev_Infos_Controller):
         log.info(f"Writing register {reg_addr} with value {value}")
         self.interface.transmit(CommandList.COMMAND_WRITE_REGISTER, [
                                 reg_addr & 0xff, value])
+        # the register may hold the state of any setting
+        self.cam.settings.invalidate()
 
     def read_register(self, reg_addr: int) -> int:
         """read a register of the epc635 camera chip."""
@@ -432,6 +460,7 @@ class TOFcam635_Device(Dev_Infos_Controller):
     def system_reset(self) -> None:
         log.warning("Resetting system")
         self.interface.transmit(CommandList.COMMAND_SYSTEM_RESET)
+        self.cam.settings.invalidate()
 
     def get_calibration_info(self):
         return self.interface.transceive(CommandList.COMMAND_GET_CALIBRATION_INFO, ComType.DATA_CALIBRATION_INFO)
@@ -454,6 +483,7 @@ class TOFcam635(TOFcam):
         self.device = TOFcam635_Device(self)
         super().__init__(self.settings, self.device)
         self._version = self.device.get_fw_version()
+        self._point_cloud_builder = PointCloudBuilder()
 
     def __del__(self):
         if hasattr(self, 'interface'):
@@ -461,6 +491,7 @@ class TOFcam635(TOFcam):
 
     def initialize(self):
         log.info('Initializing TOFcam635')
+        self.settings.invalidate()
         self.settings.set_roi(self.settings.roi)
         self.settings.set_operation_mode(0)
         self.settings.set_hdr(0)
@@ -495,20 +526,15 @@ class TOFcam635(TOFcam):
 
     def get_distance_image(self):
         """returns a distance image as a 2D numpy array"""
+        distance, _ = self.get_distance_and_confidence()
+        return distance
+
+    def get_distance_and_confidence(self) -> tuple[np.ndarray, np.ndarray]:
+        """returns a tuple of 2D arrays (distance, confidence)"""
         data, _ = self.interface.get_image_data(
             CommandList.COMMAND_GET_DISTANCE, ComType.DATA_DISTANCE, [self.settings._capture_mode])
-        distance_and_confidence = np.frombuffer(data, dtype="h")
-        distance = []
-        confidence = []
-
-        # Mask out distance and confidence
-        for i in range(len(distance_and_confidence)):
-            distance.append(distance_and_confidence[i] & 0x3FFF)
-            confidence.append((distance_and_confidence[i] >> 14) & 0x03)
-
-        distance = np.reshape(distance, self.settings.resolution[::-1])
-        # confidence = np.reshape(confidence, self.settings.resolution[::-1])
-        return distance
+        raw = np.frombuffer(data, dtype=np.uint16).reshape(self.settings.resolution[::-1])
+        return decode_distance_confidence(raw)
 
     def get_amplitude_image(self):
         """returns an amplitude image as a 2D numpy array"""
@@ -517,37 +543,37 @@ class TOFcam635(TOFcam):
 
     def get_distance_and_amplitude_image(self):
         """returns a tuple of 2D arrays (distance, amplitude)"""
-        data, _ = self.interface.get_image_data(
-            CommandList.COMMAND_GET_DISTANCE_AMPLITUDE, ComType.DATA_DISTANCE_AMPLITUDE, [self.settings._capture_mode])
-        distance_and_confidence = np.frombuffer(data, dtype="h")
-        dist_amp = []
-        confidence = []
-
-        # Mask out distance and amplitude
-        for i in range(len(distance_and_confidence)):
-            dist_amp.append(distance_and_confidence[i] & 0x3FFF)
-            confidence.append((distance_and_confidence[i] >> 14) & 0x03)
-
-        distance = np.reshape(dist_amp[::2], self.settings.resolution[::-1])
-        amplitude = np.reshape(dist_amp[1::2], self.settings.resolution[::-1])
-        # confidence = np.reshape(confidence, self.settings.resolution[::-1])
-
+        distance, amplitude, _ = self.get_distance_amplitude_confidence()
         return distance, amplitude
 
-    def get_point_cloud(self):
-        """returns point cloud information as numpy array of shape (n, 3) with x, y, z coordinates"""
+    def get_distance_amplitude_confidence(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """returns a tuple of 2D arrays (distance, amplitude, confidence)
+
+        The confidence holds the 2 bit confidence flags of the distance values.
+        """
+        data, _ = self.interface.get_image_data(
+            CommandList.COMMAND_GET_DISTANCE_AMPLITUDE, ComType.DATA_DISTANCE_AMPLITUDE, [self.settings._capture_mode])
+        raw = np.frombuffer(data, dtype=np.uint16).reshape(*self.settings.resolution[::-1], 2)
+        distance, confidence = decode_distance_confidence(raw[..., 0])
+        amplitude, _ = decode_distance_confidence(raw[..., 1])
+        return distance, amplitude, confidence
+
+    def get_point_cloud(self, valid_only: bool = False, out: Optional[np.ndarray] = None):
+        """returns point cloud information as numpy array of shape (3, n) with x, y, z coordinates and the amplitudes,
+        only the points with a valid depth if valid_only is set. Otherwise the points are written to out if given,
+        a float32 buffer of shape (3, n) that is reused for every frame"""
         # capture depth image & corrections
         depth, amplitude = self.get_distance_and_amplitude_image()
         # depth = np.rot90(depth)
         # amplitude = np.rot90(amplitude)
         amplitude[amplitude > DEFAULT_MAX_AMPLITUDE] = 0  # remove error codes
-        depth = depth.astype(np.float32)
-        depth[depth >= self.settings.max_depth] = np.nan
 
         # calculate point cloud from the depth image
-        points = 1E-3 * self.settings.projector.project(depth)
-        points = points.reshape(3, -1)
-        return points, amplitude.flatten()
+        if valid_only:
+            return self._point_cloud_builder.build_valid(
+                self.settings.projector, depth, amplitude, self.settings.max_depth)
+        points = self._point_cloud_builder.build(self.settings.projector, depth, self.settings.max_depth, out=out)
+        return points, amplitude.ravel()
 
 
 if __name__ == "__main__":
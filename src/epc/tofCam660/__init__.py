@@ -1,3 +1,4 @@
 from .memory import Memory
 from .tofCam660 import TOFcam660
+from .async_tofCam660 import AsyncTOFcam660
 from .command import Command
\ No newline at end of file
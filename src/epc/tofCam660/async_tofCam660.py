@@ -0,0 +1,758 @@
+import asyncio
+import itertools
+import logging
+import socket
+import struct
+import time
+from typing import AsyncIterator, Literal, Optional
+
+import numpy as np
+
+from epc.tofCam_lib import TOF_Settings_Controller, Dev_Infos_Controller
+from epc.tofCam_lib.decorator import requires_fw_version
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
+from epc.tofCam_lib.projection_models import RadialCameraProjector
+from epc.tofCam660.command import Command
+from epc.tofCam660.interface import DataType, FrameAssembler, Interface
+from epc.tofCam660.parser import DcsParser, Frame, Parser
+from epc.tofCam660.response import Response
+from epc.tofCam660.tofCam660 import (
+    ACQUISITION_COMMANDS,
+    CAPTURE_MODE_SINGLE,
+    CAPTURE_MODE_STREAM,
+    DEFAULT_DATA_RX_PORT,
+    DEFAULT_IP_ADDRESS,
+    DEFAULT_MAX_AMP,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_TCP_PORT,
+    MODULATION_FREQUENCY_CODES,
+    ROLLING_MODES,
+)
+
+log = logging.getLogger('AsyncTOFcam660')
+
+
+class AsyncInterface:
+    """Control connection to the camera on asyncio streams.
+
+    The commands of concurrent tasks are serialized by an asyncio lock. The messages are
+    framed like those of the blocking `Interface`.
+    """
+    markerStart = Interface.markerStart
+    markerStartBytes = Interface.markerStartBytes
+    markerEnd = Interface.markerEnd
+    markerEndBytes = Interface.markerEndBytes
+    _assembleMessage = Interface._assembleMessage
+    _countTransmitted = Interface._countTransmitted
+
+    def __init__(self, ipAddress=DEFAULT_IP_ADDRESS, port=DEFAULT_TCP_PORT, timeout_s: float = 5):
+        self.ip_address = ipAddress
+        self.port = port
+        self.timeout_s = timeout_s
+        self.transmitCount = 0
+        # number of transmitted commands that may have changed chip registers
+        self.registerChangeCount = 0
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        try:
+            async with asyncio.timeout(self.timeout_s):
+                self._reader, self._writer = await asyncio.open_connection(self.ip_address, self.port)
+        except (OSError, TimeoutError) as e:
+            raise ConnectionError(f'No camera found at address {self.ip_address}:{self.port}\n{e}')
+        self._writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    async def close(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+        self._writer = None
+
+    def is_socket_closed(self) -> bool:
+        return self._writer is None or self._writer.is_closing()
+
+    def _discardConnection(self):
+        """Close a connection a command was interrupted on, its response would be read by the
+        next command. The next command connects again."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def transceive(self, command) -> Response:
+        return (await self.transceiveBatch([command]))[0]
+
+    async def transceiveBatch(self, commands, maxBatchSize: int = 16) -> list[Response]:
+        """Send several commands before reading their responses, in batches of up to maxBatchSize commands.
+
+        Error responses raise a RuntimeError once all responses of the batch are read. If the
+        commands are cancelled, time out or fail, the connection is closed and the next command
+        reconnects, so no response is left for it.
+        """
+        responses = []
+        async with self._lock:
+            if self._writer is None:
+                await self.connect()
+            try:
+                async with asyncio.timeout(self.timeout_s):
+                    for first in range(0, len(commands), maxBatchSize):
+                        batch = commands[first:first + maxBatchSize]
+                        self._writer.write(b''.join(self._assembleMessage(command) for command in batch))
+                        self._countTransmitted(batch)
+                        await self._writer.drain()
+                        responses += [await self._receive() for _ in batch]
+            except TimeoutError:
+                self._discardConnection()
+                names = ', '.join(command.__class__.__name__ for command in commands)
+                raise TimeoutError(f"No response to \"{names}\" within {self.timeout_s}s")
+            except BaseException:
+                self._discardConnection()
+                raise
+
+        for command, response in zip(commands, responses):
+            if response.isError():
+                raise RuntimeError(f'Command \"{command.__class__.__name__}\" failed with response {response}')
+        return responses
+
+    async def transmit(self, command):
+        """Send a command without waiting for a response, e.g. a reset."""
+        async with self._lock:
+            if self._writer is None:
+                await self.connect()
+            try:
+                self._writer.write(self._assembleMessage(command))
+                self._countTransmitted((command,))
+                await self._writer.drain()
+            except BaseException:
+                self._discardConnection()
+                raise
+
+    async def _receive(self) -> Response:
+        try:
+            startmarker, size = struct.unpack('!II', await self._reader.readexactly(8))
+            if not startmarker == self.markerStart:
+                raise ValueError('Start marker not correct: 0x{:08x}'.format(startmarker))
+            payload = await self._reader.readexactly(size)
+            endmarker = struct.unpack('!I', await self._reader.readexactly(4))[0]
+        except asyncio.IncompleteReadError:
+            raise EOFError('Could not receive all expected data')
+        if not endmarker == self.markerEnd:
+            raise ValueError('End marker not correct: 0x{:08x}'.format(endmarker))
+        return Response.fromBytes(payload)
+
+
+class AsyncUdpReceiver(FrameAssembler, asyncio.DatagramProtocol):
+    """Receives the frames of the camera on an asyncio datagram endpoint.
+
+    Completed frames are parsed in the event loop by the parser set with `start` and kept
+    in a queue of at most queueSize frames. If the consumer does not keep up, the oldest
+    queued frame is dropped, the camera can not be slowed down.
+    """
+
+    def __init__(self, ipAddress=DEFAULT_IP_ADDRESS, port=DEFAULT_DATA_RX_PORT, ringSize: int = 4,
+                 maxInFlight: int = 3, staleTimeout_s: float = 0.5):
+        super().__init__(ringSize, maxInFlight, staleTimeout_s)
+        self.ip_address = ipAddress
+        self.port = port
+        self.parser: Optional[Parser] = None
+        self.framesDropped = 0
+        self.parseErrors = 0
+        self.sequence = itertools.count(1)
+        self._frames: asyncio.Queue[Frame] = asyncio.Queue(maxsize=1)
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def open(self):
+        udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        except OSError:
+            pass
+        udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        udpSocket.bind(('', self.port))
+        udpSocket.setblocking(False)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(lambda: self, sock=udpSocket)
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def start(self, parser: Parser, queueSize: int = 1):
+        """Parse and queue the frames received from now on."""
+        self.parser = parser
+        self._frames = asyncio.Queue(maxsize=max(queueSize, 1))
+
+    def stop(self):
+        """Ignore the received frames."""
+        self.parser = None
+
+    async def get(self, timeout_s: float = 1) -> Frame:
+        """Pop the next frame from the queue, waiting at most timeout_s for it to arrive."""
+        try:
+            async with asyncio.timeout(timeout_s):
+                return await self._frames.get()
+        except TimeoutError:
+            # the measurement ids may restart after a silence (e.g. camera reset)
+            self._lastCompletedId = None
+            raise TimeoutError(f"No frame received within {timeout_s}s")
+
+    def statistics(self) -> dict:
+        stats = super().statistics()
+        stats.update({'framesDropped': self.framesDropped, 'parseErrors': self.parseErrors})
+        return stats
+
+    def datagram_received(self, data: bytes, address):
+        if self.parser is None or address[0] != self.ip_address:
+            return
+        try:
+            frame = self.acceptPacket(memoryview(data), len(data))
+            if frame is None:
+                return
+            parsed = self.parser.parse(frame.view[:frame.totalSize])
+            parsed.timestamp = time.time()
+            parsed.sequence = next(self.sequence)
+        except Exception as e:
+            log.debug(f"Failed to receive frame: {e}")
+            self.parseErrors += 1
+            return
+        if self._frames.full():
+            self._frames.get_nowait()
+            self.framesDropped += 1
+        self._frames.put_nowait(parsed)
+
+    def error_received(self, exc: Exception):
+        log.debug(f"UDP data interface error: {exc}")
+
+
+class AsyncTOFcam660:
+    """asyncio client of a TOFcam660, mirroring the `TOFcam660` API with coroutines.
+
+    A single event loop can drive many cameras, every camera needs a data port of its own::
+
+        async with AsyncTOFcam660(ip_address) as cam:
+            await cam.initialize()
+            distance, amplitude = await cam.get_distance_and_amplitude()
+            async for frame in cam.stream(DataType.DISTANCE_AMPLITUDE):
+                ...
+
+    Only the UDP data transfer is supported, flexible modulation and hardware triggered
+    acquisition are not.
+    """
+
+    def __init__(self, ip_address=DEFAULT_IP_ADDRESS, tcp_port=DEFAULT_TCP_PORT, data_port=DEFAULT_DATA_RX_PORT,
+                 timeout_s: float = 1):
+        self.tcpInterface = AsyncInterface(ip_address, tcp_port)
+        self.rxInterface = AsyncUdpReceiver(ip_address, data_port)
+        self.settings = AsyncTOFcam660_Settings(self)
+        self.device = AsyncTOFcam660_Device(self)
+        self.timeout_s = timeout_s
+        self.frame: Optional[Frame] = None
+        self._version: Optional[str] = None
+        self._parsers: dict[tuple, Parser] = {}
+        self._point_cloud_builder = PointCloudBuilder(flip='ud')
+        self._acquisition_lock = asyncio.Lock()
+        self._streaming = False
+
+    async def __aenter__(self) -> 'AsyncTOFcam660':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def open(self):
+        """Connect to the camera and read its firmware version."""
+        await self.tcpInterface.connect()
+        try:
+            await self.rxInterface.open()
+            self._version = await self.device.get_fw_version()
+        except BaseException:
+            self.rxInterface.close()
+            await self.tcpInterface.close()
+            raise
+
+    async def close(self):
+        self.rxInterface.close()
+        await self.tcpInterface.close()
+
+    async def initialize(self):
+        # bring the camera into a known state, no matter which settings were applied before
+        self.settings.invalidate()
+        await self.settings._store_dll_settings()
+        await self.settings._store_abs_setting()
+        await self.settings.set_roi((0, 0, 320, 240))
+        await self.settings.set_hdr(0)
+        await self.settings.set_modulation(frequency_mhz=3, channel=0)
+        await self.settings.set_integration_hdr([25, 16, 0, 0])
+        await self.settings.set_minimal_amplitude(100)
+        await self.settings.disable_filters()
+        await self.settings.set_compensations(setDrnuCompensation=True,
+                                              setTemperatureCompensation=True,
+                                              setAmbientLightCompensation=True,
+                                              setGrayscaleCompensation=True)
+        self.settings.set_lense_type('Wide Field')
+        await self.settings.set_binning(0)
+        try:
+            await self.settings.set_rolling_mode(mode='None')
+        except NotImplementedError:
+            pass
+
+    def _create_parser(self, data_type: DataType) -> Parser:
+        if data_type == DataType.DCS:
+            return DcsParser(self.settings.dcsFormat)
+        return ACQUISITION_COMMANDS[data_type][1]()
+
+    def _get_parser(self, data_type: DataType) -> Parser:
+        key = (data_type, self.settings.dcsFormat if data_type == DataType.DCS else None)
+        parser = self._parsers.get(key)
+        if parser is None:
+            parser = self._parsers[key] = self._create_parser(data_type)
+        return parser
+
+    async def _acquire_frame(self, data_type: DataType) -> Frame:
+        if self._streaming:
+            raise RuntimeError("Camera is streaming. Use the frames of the stream or stop it first.")
+        command_name, _ = ACQUISITION_COMMANDS[data_type]
+        parser = self._get_parser(data_type)
+        async with self._acquisition_lock:
+            for _ in range(5):
+                self.rxInterface.start(parser)
+                try:
+                    await self.tcpInterface.transceive(Command.cached(command_name, self.settings.captureMode))
+                    self.frame = await self.rxInterface.get(self.timeout_s)
+                    return self.frame
+                except TimeoutError as e:
+                    log.error(f"Failed to receive image data: {e}")
+                finally:
+                    self.rxInterface.stop()
+        raise RuntimeError("Failed to receive image data")
+
+    async def stream(self, data_type: DataType = DataType.DISTANCE_AMPLITUDE, queue_size: int = 4,
+                     timeout_s: Optional[float] = None) -> AsyncIterator[Frame]:
+        """Stream frames of the given data type from the camera.
+
+        The frames are parsed as they arrive and at most queue_size frames are kept, the
+        oldest frame is dropped if the consumer falls behind. A TimeoutError is raised if no
+        frame arrives within timeout_s (default: the timeout of the camera).
+
+        The camera stops streaming when the generator is closed. Leaving an `async for` loop
+        does not close it right away, use `contextlib.aclosing`::
+
+            async with aclosing(cam.stream()) as frames:
+                async for frame in frames:
+                    ...
+        """
+        if self._streaming:
+            raise RuntimeError("Camera is already streaming. Stop the stream first.")
+        command_name, _ = ACQUISITION_COMMANDS[data_type]
+        self._streaming = True
+        self.rxInterface.start(self._create_parser(data_type), queue_size)
+        log.info(f"Starting stream: {data_type.name}")
+        try:
+            await self.tcpInterface.transceive(Command.cached(command_name, CAPTURE_MODE_STREAM))
+            while True:
+                self.frame = await self.rxInterface.get(timeout_s or self.timeout_s)
+                yield self.frame
+        finally:
+            self.rxInterface.stop()
+            self._streaming = False
+            log.info("Stopping stream")
+            try:
+                await self.tcpInterface.transceive(Command.cached("stopStream"))
+            except Exception as e:
+                log.warning(f"Failed to stop the stream: {e}")
+
+    def is_streaming(self) -> bool:
+        """Returns True while a stream is consumed."""
+        return self._streaming
+
+    def stats(self) -> dict:
+        """Returns the packet and frame loss statistics of the data interface."""
+        return {'receiver': self.rxInterface.statistics()}
+
+    async def capture(self, data_type: DataType = DataType.DISTANCE_AMPLITUDE) -> Frame:
+        """Acquire a frame with the metadata of its header, receive time and sequence number, see TOFcam660.capture"""
+        return await self._acquire_frame(data_type)
+
+    async def get_grayscale_image(self) -> np.ndarray:
+        """Get a grayscale image from the camera as a 2D numpy array"""
+        return (await self._acquire_frame(DataType.GRAYSCALE)).amplitude
+
+    async def get_distance_image(self) -> np.ndarray:
+        """Get a distance image from the camera as a 2D numpy array. The distance is in mm."""
+        return (await self._acquire_frame(DataType.DISTANCE)).distance
+
+    async def get_distance_and_amplitude(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get a distance and amplitude image from the camera as 2D numpy arrays. The distance is in mm."""
+        frame = await self._acquire_frame(DataType.DISTANCE_AMPLITUDE)
+        return frame.distance, frame.amplitude
+
+    async def get_amplitude_image(self) -> np.ndarray:
+        """Get an amplitude image from the camera as a 2D numpy array."""
+        return (await self.get_distance_and_amplitude())[1]
+
+    async def get_raw_dcs_images(self) -> np.ndarray:
+        """Get a DCS image from the camera as a 2D numpy array."""
+        return (await self._acquire_frame(DataType.DCS)).dcs
+
+    async def get_point_cloud(self, valid_only: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """Returns a tuple holding point cloud from the camera as a 3xN numpy array and the corresponding amplitude values.
+        If valid_only is set, only the points with a valid depth are returned."""
+        depth, amplitude = await self.get_distance_and_amplitude()
+        amplitude[amplitude > DEFAULT_MAX_AMP] = 0  # remove error codes
+
+        roi_x, roi_y = self.settings.roi[0], self.settings.roi[1]
+        if valid_only:
+            return self._point_cloud_builder.build_valid(
+                self.settings.projector, depth, amplitude, self.settings.maxDepth, roi_x, roi_y)
+        points = self._point_cloud_builder.build(self.settings.projector, depth, self.settings.maxDepth, roi_x, roi_y)
+        return points, amplitude.ravel()
+
+
+class AsyncTOFcam660_Settings(TOF_Settings_Controller):
+    """Settings of the AsyncTOFcam660, the coroutine counterpart of TOFcam660_Settings.
+    """
+    def __init__(self, cam: AsyncTOFcam660) -> None:
+        super().__init__()
+        self.roi = (0, 0, 320, 240)
+        self.cam = cam
+        self.captureMode = CAPTURE_MODE_SINGLE
+        self.dcsFormat = 'int32'
+        self.__int_time_grayscale = 50
+        self.__int_time_low = 150
+        self.__hdr_mode = 0
+        self.projector = RadialCameraProjector.from_lens_calibration('Wide Field', self.roi[2], self.roi[3])
+        self.maxDepth = DEFAULT_MAX_DEPTH
+        self.intTime_us = 0
+        self.minAmplitude = 0
+        self.dllRegisterSettings = {0x71: 0x00, 0x72: 0x00, 0x73: 0x00, 0x8b: 0x00, 0x93: 0x00}
+        self.absRegisterSetting = {0x88: 0x00}
+
+    async def _transceive_setting(self, command: Command) -> bool:
+        """Send a setting command unless the camera is known to be in that state already."""
+        setting, value = command.__class__.__name__, command.toBytes()
+        if setting in self._applied and self._applied[setting] == value:
+            return False
+        self._applied.pop(setting, None)
+        await self.cam.tcpInterface.transceive(command)
+        self._applied[setting] = value
+        return True
+
+    async def _store_dll_settings(self):
+        """Store the current DLL settings in the camera."""
+        self.dllRegisterSettings.update(await self.cam.device.read_registers(self.dllRegisterSettings))
+
+    async def _restore_dll_settings(self):
+        """Restore the DLL settings in the camera."""
+        await self.cam.device.write_registers(self.dllRegisterSettings)
+
+    async def _store_abs_setting(self):
+        """Store the current camera ABS pixel ramp setting."""
+        self.absRegisterSetting.update(await self.cam.device.read_registers(self.absRegisterSetting))
+
+    async def _restore_abs_setting(self):
+        """Restore the ABS pixel ramp setting in the camera."""
+        await self.cam.device.write_registers(self.absRegisterSetting)
+
+    async def set_integration_time(self, int_time_us: int):
+        """Set the integration time for standard mode in us."""
+        if self.__hdr_mode != 0:
+            raise ValueError("Cannot set integration when HDR is on. use set_integration_hdr instead.")
+        await self.set_integration_hdr([self.__int_time_grayscale, int_time_us, 0, 0])
+
+    async def set_integration_time_grayscale(self, int_time_us: int):
+        """Set the integration time for grayscale images in us."""
+        if self.__hdr_mode != 0:
+            raise ValueError("Cannot set integration when HDR is on. use set_integration_hdr instead.")
+        await self.set_integration_hdr([int_time_us, self.__int_time_low, 0, 0])
+
+    async def set_integration_hdr(self, int_times: list[int]) -> None:
+        """Set integration times for the camera.
+
+        Args:
+            int_times is a list of 4 integers: [grayscale, low, mid, high]
+        """
+        log.info(f"Setting integration times: {int_times}")
+        await self._transceive_setting(Command.create("setIntTimes", {
+            "lowIntTime": int_times[1],
+            "midIntTime": int_times[2],
+            "highIntTime": int_times[3],
+            "grayscaleIntTime": int_times[0],
+        }))
+        self.__int_time_grayscale = int_times[0]
+        self.__int_time_low = int_times[1]
+        self.intTime_us = self.__int_time_low
+
+    async def set_roi(self, roi: tuple[int, int, int, int]):
+        """Set the region of interest.
+
+        Args:
+            roi (tuple[int, int, int, int]): (x1, y1, x2, y2) where (x1, y1) is the top-left corner and (x2, y2) is the bottom-right corner.
+        """
+        if roi[1] != 240 - roi[3]:
+            raise ValueError("TOFcam660 needs symetric y values")
+        log.info(f"Setting ROI: {roi}")
+        await self._transceive_setting(Command.create("setRoi", {
+            "leftColumn": roi[0],
+            "topRow": roi[1],
+            "rightColumn": roi[2],
+            "bottomRow": roi[3],
+        }))
+        self.roi = roi
+        return self.roi
+
+    def get_roi(self):
+        """Returns the current region of interest (x1, y1, x2, y2)."""
+        return self.roi
+
+    async def set_hdr(self, mode: int) -> None:
+        """Set the HDR mode for the camera.
+
+        Args:
+            mode (int): The mode to set. 0: off, 1: spatial, 2: temporal
+        """
+        if mode not in [0, 1, 2]:
+            raise ValueError(f"Invalid HDR mode: {mode}. Must be 0, 1 or 2")
+        log.info(f"Setting HDR mode: {mode}")
+        await self._transceive_setting(Command.create("setHdr", mode))
+        self.__hdr_mode = mode
+
+    async def set_binning(self, binning_type):
+        log.info(f"Setting binning: {binning_type}")
+        if binning_type == 0:
+            # Restore default ABS pixel ramp magnitude if binning is disabled
+            await self._restore_abs_setting()
+        else:
+            # Set new ABS pixel ramp magnitude & verify for binning mode
+            newValue = 0x1f
+            await self.cam.device.write_registers(dict.fromkeys(self.absRegisterSetting, newValue), force=True)
+            updatedRegValues = await self.cam.device.read_registers(self.absRegisterSetting)
+            for reg, updatedRegValue in updatedRegValues.items():
+                if newValue != updatedRegValue:
+                    raise ValueError(
+                        f"ABS register mismatch at address 0x{reg:02X}: expected 0x{newValue:02X}, got 0x{updatedRegValue:02X}"
+                    )
+
+        # Try setbinning() and if it fails, revert ABS pixel ramp magnitude to default
+        try:
+            await self._transceive_setting(Command.create("setBinning", np.byte(binning_type)))
+        except Exception as e:
+            log.error(f"setBinning failed: {e}. Reverting ABS register to default.")
+            await self._restore_abs_setting()
+            raise ValueError(f"setBinning failed: {e}. Reverted ABS register to default.")
+
+    async def set_dll_step(self, step: int = 0):
+        log.info(f"Setting DLL step: {step}")
+        await self.cam.tcpInterface.transceive(Command.create("setDllStep", step))
+
+    async def set_minimal_amplitude(self, minimum: int):
+        """Set minimal amplitude needed to be considered a valid distance estimation."""
+        log.info(f"Setting minimum amplitude: {minimum}")
+        await self._transceive_setting(Command.create("setMinAmplitude", minimum))
+        self.minAmplitude = minimum
+
+    async def set_grayscale_illumination(self, enable=True):
+        """Enable or disable the illumination during grayscale capture."""
+        log.info(f"Setting grayscale illumination: {enable}")
+        await self._transceive_setting(Command.create("setGrayscaleIllumination", int(enable)))
+
+    async def set_compensations(self, setDrnuCompensation=True, setTemperatureCompensation=True,
+                                setAmbientLightCompensation=True, setGrayscaleCompensation=True):
+        """Enable or distable compensations for the camera."""
+        log.info('Changing compensations settings')
+        await self._transceive_setting(Command.create("setCompensation", {
+            "setDrnuCompensationEnabed": setDrnuCompensation,
+            "setTemperatureCompensationEnabled": setTemperatureCompensation,
+            "setAmbientLightCompensationEnabled": setAmbientLightCompensation,
+            "setGrayscaleCompensationEnabled": setGrayscaleCompensation,
+        }))
+
+    async def set_filters(self, enableMedianFilter: bool, enableAverageFilter: bool, edgeDetectionThreshold: int,
+                          temporalFilterFactor: int, temporalFilterThreshold: int, interferenceDetectionLimit: int,
+                          interferenceDetectionUseLastValue: bool):
+        log.info('Changing filters settings')
+        await self._transceive_setting(Command.create("setFilter", {
+            "temporalFilterFactor": temporalFilterFactor,
+            "temporalFilterThreshold": temporalFilterThreshold,
+            "enableMedianFilter": enableMedianFilter,
+            "enableAverageFilter": enableAverageFilter,
+            "edgeDetectionThreshold": edgeDetectionThreshold,
+            "interferenceDetectionUseLastValue": interferenceDetectionUseLastValue,
+            "interferenceDetectionLimit": interferenceDetectionLimit,
+        }))
+
+    async def disable_filters(self):
+        """Disable all filters."""
+        log.info('Disabling filters')
+        await self.set_filters(False, False, 0, 0, 0, 0, False)
+
+    async def set_modulation(self, frequency_mhz: float, channel=0):
+        """Set the modulation frequency and channel for the TOFcam."""
+        await self._restore_dll_settings()
+        try:
+            frequency_code = MODULATION_FREQUENCY_CODES[frequency_mhz]
+        except KeyError:
+            raise ValueError(
+                f"Invalid frequency: {frequency_mhz}. Must be one of {list(MODULATION_FREQUENCY_CODES.keys())}"
+            )
+        log.info(f"Setting modulation frequency: {frequency_mhz} MHz, channel: {channel}")
+        await self._transceive_setting(Command.create(
+            "setModulationFrequency", {"frequencyCode": frequency_code, "channel": channel}))
+
+    def get_modulation_frequencies(self) -> list[float]:
+        """Returns a list of available modulation frequencies in MHz."""
+        return [0.75, 1.5, 3, 6, 12, 24]
+
+    def get_modulation_channels(self) -> list[int]:
+        """Returns a list of available modulation channels."""
+        return list(range(0, 15))
+
+    def set_lense_type(self, lense_type: int):
+        """Set the lense type for the camera."""
+        log.info(f"Setting lense type: {lense_type}")
+        self.projector = RadialCameraProjector.from_lens_calibration(lense_type, self.roi[2], self.roi[3])
+
+    @requires_fw_version(min_version='3.25')
+    async def set_illuminator_segments(self, segment_1_on: bool = True, segment_2_on: bool = True,
+                                       segment_3_on: bool = True, segment_4_on: bool = True,
+                                       segment_2_to_4: bool = True):
+        """Set the illuminator segments for the camera."""
+        log.info(f"Setting illuminator segments: ({segment_1_on}, {segment_2_on}, {segment_3_on}, "
+                 f"{segment_4_on}, 2-4: {segment_2_to_4})")
+        await self._transceive_setting(Command.create("setIlluminatorSegments", {
+            "segment1": segment_1_on,
+            "segment2": segment_2_on,
+            "segment3": segment_3_on,
+            "segment4": segment_4_on,
+            "segment_2_to_4": segment_2_to_4,
+        }))
+
+    def set_dcs_format(self, dcs_format: Literal['int32', 'int16', 'raw']) -> None:
+        """Set the format of the DCS images, see TOFcam660_Settings.set_dcs_format"""
+        if dcs_format not in DcsParser.FORMATS:
+            raise ValueError(f"Invalid DCS format: {dcs_format}. Select one of {DcsParser.FORMATS}")
+        log.info(f"Setting DCS format: {dcs_format}")
+        self.dcsFormat = dcs_format
+
+    @requires_fw_version(min_version='3.36')
+    async def get_integration_time(self) -> list[dict]:
+        """Get the integration time(grayscale & 3D) from the camera."""
+        return (await self.cam.tcpInterface.transceive(Command.create("getIntegrationTime"))).data
+
+    @requires_fw_version(min_version='3.48')
+    async def set_rolling_mode(self, mode: Literal["None", "1DCS", "2DCS"]):
+        """Set camera to the rolling acquisition mode "None", "1DCS" or "2DCS"."""
+        mode_value = ROLLING_MODES.get(mode)
+        if mode_value is None:
+            raise ValueError(f"Invalid Rolling mode value: {mode}")
+        log.info(f"Setting rolling mode: {mode}")
+        await self._transceive_setting(Command.create("setRollingMode", mode_value))
+
+    @requires_fw_version(min_version='3.57')
+    async def set_eye_safety_mode(self, mode: int, fps: int):
+        """Set the camera into eye safety mode, see TOFcam660_Settings.set_eye_safety_mode"""
+        if mode not in [0, 1, 2]:
+            raise ValueError(f"Invalid eye safety mode value: {mode}")
+        log.info(f"Setting eye safety mode: {mode}")
+        await self._transceive_setting(Command.create("setEyeSafety", {"mode": mode, "fps": fps}))
+
+    @requires_fw_version(min_version='3.57')
+    async def set_modulation_clock_jitter(self, enable: bool):
+        """Enable/disable modulation jitter fuctionality"""
+        log.info(f"set modulation clock jitter: {enable}")
+        await self._transceive_setting(Command.create("setModClkJitter", int(enable)))
+
+
+class AsyncTOFcam660_Device(Dev_Infos_Controller):
+    """Device information of the AsyncTOFcam660, the coroutine counterpart of TOFcam660_Device.
+    """
+    def __init__(self, cam: AsyncTOFcam660) -> None:
+        super().__init__()
+        self.cam = cam
+        # register values known to be in effect, valid until a command may have changed registers
+        self._registers: dict[int, int] = {}
+        self._registerChangeCount = None
+
+    def _register_shadow(self) -> dict[int, int]:
+        count = self.cam.tcpInterface.registerChangeCount
+        if count != self._registerChangeCount:
+            self._registers.clear()
+            self._registerChangeCount = count
+        return self._registers
+
+    async def write_register(self, reg_addr: int, value: int) -> None:
+        """Write a value to a register on the epc660."""
+        log.info(f"Writing to register 0x{reg_addr:02x}: 0x{value:02x}")
+        await self.write_registers({reg_addr: value}, force=True)
+        # the register may hold the state of any setting
+        self.cam.settings.invalidate()
+
+    async def read_register(self, reg_addr: int) -> int:
+        """Read a value from a register on the epc660."""
+        return (await self.read_registers([reg_addr]))[reg_addr]
+
+    async def write_registers(self, values: dict[int, int], force: bool = False) -> None:
+        """Write several registers on the epc660 in a single round trip, skipping known values unless force is set."""
+        shadow = self._register_shadow()
+        pending = {reg: value for reg, value in values.items() if force or shadow.get(reg) != value}
+        if not pending:
+            return
+        commands = [Command.create("writeRegister", {"address": reg, "value": value}) for reg, value in pending.items()]
+        try:
+            await self.cam.tcpInterface.transceiveBatch(commands)
+        except BaseException:
+            # also cancelled writes, the registers may or may not have been written
+            for reg in pending:
+                shadow.pop(reg, None)
+            raise
+        shadow.update(pending)
+
+    async def read_registers(self, addresses) -> dict[int, int]:
+        """Read several registers from the epc660 in a single round trip."""
+        addresses = list(addresses)
+        responses = await self.cam.tcpInterface.transceiveBatch(
+            [Command.create("readRegister", {"address": reg}) for reg in addresses])
+        values = {reg: int(response.data) for reg, response in zip(addresses, responses)}
+        self._register_shadow().update(values)
+        return values
+
+    async def get_chip_infos(self) -> tuple[int, int]:
+        """Returns the chip id and wafer id of the epc660."""
+        chipInfos = (await self.cam.tcpInterface.transceive(Command.create("readChipInformation"))).data
+        return chipInfos["chipid"], chipInfos["waferid"]
+
+    async def get_fw_version(self) -> str:
+        """Returns the firmware version of the epc660."""
+        fw_version = (await self.cam.tcpInterface.transceive(Command.create("readFirmwareRelease"))).data
+        return str(f"{fw_version['major']}.{fw_version['minor']}")
+
+    async def get_chip_temperature(self) -> float:
+        """Returns the temperature of the epc660 chip in °C, updated when a frame is captured."""
+        temp = (await self.cam.tcpInterface.transceive(Command.create("getTemperature"))).data
+        return float(temp)
+
+    async def system_reset(self):
+        """Reset the camera."""
+        log.warning("Resetting the camera")
+        await self.cam.tcpInterface.transmit(Command.create("systemReset"))
+        self.cam.settings.invalidate()
+
+    async def power_reset(self):
+        """Powercycle the camera."""
+        log.warning("Powercycling the camera")
+        await self.cam.tcpInterface.transmit(Command.create("powerReset"))
+        self.cam.settings.invalidate()
+
+    async def set_udp_ip_address(self, ipAddress=DEFAULT_IP_ADDRESS):
+        log.info(f"Setting UDP IP address: {ipAddress}")
+        await self.cam.tcpInterface.transceive(Command.create("setDataIpAddress", ipAddress))
+
+    @requires_fw_version(min_version='3.29')
+    async def get_calibration_data(self) -> list[dict]:
+        """Get the calibration data(calibrated modulation freq., temperature, atan offset) from the camera."""
+        return (await self.cam.tcpInterface.transceive(Command.create("getCalibrationData"))).data
@@ -1,9 +1,12 @@
+import functools
 import struct
 
 
 class Command:
     """Use factory method 'create(commandName, ...)' to instantiate"""
     commandId = None
+    # commands that may change chip registers invalidate the register shadow of the camera
+    changesRegisters = True
 
     @staticmethod
     def create(commandName, data=None):
@@ -12,8 +15,20 @@ class Command:
         except KeyError:
             raise ValueError('there is no command {}'.format(commandName))
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def cached(commandName, data=None):
+        """Shared instance of a frequently sent command with hashable, constant data.
+
+        The interface assembles the message of a cached command only once."""
+        command = Command.create(commandName, data)
+        command.cacheMessage = True
+        return command
+
     def __init__(self, data):
         self.data = data
+        self.cacheMessage = False
+        self.message = None
 
     def toBytes(self):
         payload = struct.pack('!H', self.commandId) + self.dataToBytes()
@@ -64,22 +79,27 @@ class SetIntTimes(Command):
 
 class GetDistanceAndAmplitude(Command):
     commandId = 2
+    changesRegisters = False
 
 
 class GetDistance(Command):
     commandId = 3
+    changesRegisters = False
 
 
 class GetGrayscale(Command):
     commandId = 5
+    changesRegisters = False
 
 
 class GetDcs(Command):
     commandId = 7
+    changesRegisters = False
 
 
 class StopStream(Command):
     commandId = 6
+    changesRegisters = False
 
 
 class SystemReset(Command):
@@ -140,10 +160,12 @@ class SetHdr(Command):
 
 class ReadChipInformation(Command):
     commandId = 36
+    changesRegisters = False
 
 
 class ReadFirmwareRelease(Command):
     commandId = 37
+    changesRegisters = False
 
 
 class SetDllStep(Command):
@@ -152,6 +174,7 @@ class SetDllStep(Command):
 
 class WriteRegister(Command):
     commandId = 42
+    changesRegisters = False
 
     def dataToBytes(self):
         return struct.pack('!BB',
@@ -161,6 +184,7 @@ class WriteRegister(Command):
 
 class ReadRegister(Command):
     commandId = 43
+    changesRegisters = False
 
     def dataToBytes(self):
         return struct.pack('!B', self.data['address'])
@@ -181,6 +205,7 @@ class SetIlluminatorSegments(Command):
 
 class GetTemperature(Command):
     commandId = 74
+    changesRegisters = False
 
 
 class SetDataIpAddress(Command):
@@ -229,12 +254,14 @@ class SetCompensation(Command):
 
 class GetCalibrationData(Command):
     commandId = 53
+    changesRegisters = False
 
 class SetModClkJitter(Command):
     commandId = 54
     
 class GetIntegrationTime(Command):
     commandId = 56
+    changesRegisters = False
 
 class SetDataTransferProtocol(Command):
     commandId = 57
@@ -243,6 +270,7 @@ class SetDataTransferProtocol(Command):
     
 class GetDataTransferProtocol(Command):
     commandId = 58
+    changesRegisters = False
 
 class SetHwTriggerDataType(Command):
     commandId = 59
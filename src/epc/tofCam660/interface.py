@@ -2,11 +2,13 @@ import select
 import socket
 import struct
 import time
+from collections import deque
 from threading import Lock, Thread
 from epc.tofCam660.response import Response
 import logging
 from typing import Optional
 from epc.tofCam660.parser import Parser
+from epc.tofCam_lib.instrumentation import Instrumentation
 from enum import IntEnum
 
 log = logging.getLogger('Interface')
@@ -24,11 +26,21 @@ class Interface:
     markerStartBytes = struct.pack('!I', markerStart)
     markerEnd = 0xffff55aa
     markerEndBytes = struct.pack('!I', markerEnd)
+    headerStruct = struct.Struct('!II')
+    footerStruct = struct.Struct('!I')
 
     def __init__(self, ipAddress='10.10.31.180', port=50660):
         self.ip_address = ipAddress
         self.port = port
         self.lock = Lock()
+        # reused receive buffers of the message framing
+        self._headerView = memoryview(bytearray(self.headerStruct.size))
+        self._footerView = memoryview(bytearray(self.footerStruct.size))
+        self.transmitCount = 0
+        # number of transmitted commands that may have changed chip registers
+        self.registerChangeCount = 0
+        # optional instrumentation of the command round trips, set by the camera
+        self.instrumentation: Optional[Instrumentation] = None
         self.connect()
 
     def connect(self):
@@ -43,6 +55,14 @@ class Interface:
     def close(self):
         self.socket.close()
 
+    def _reconnect(self):
+        """Replace the connection, dropping any response left unread on it"""
+        self.close()
+        try:
+            self.connect()
+        except ConnectionError as e:
+            log.warning(f"Failed to reconnect: {e}")
+
     def is_socket_closed(self) -> bool:
         try:
             # this will try to read bytes without blocking and also without removing them from buffer (peek only)
@@ -69,6 +89,9 @@ class Interface:
         if not self.lock.acquire(timeout=5): 
             raise TimeoutError(f"Failed to acquire lock for command \"{command.__class__.__name__}\"")
         
+        instrumentation = self.instrumentation
+        start_ns = time.perf_counter_ns() if instrumentation is not None and instrumentation.enabled else 0
+
         # try few times to send the command and receive a valid response
         max_retries = 5  
         try:
@@ -78,8 +101,12 @@ class Interface:
                     response = self.receive()
                     if response.isError():
                         raise RuntimeError(f'Command \"{command.__class__.__name__}\" failed with response {response}')
+                    if start_ns:
+                        instrumentation.record_since('transceive', start_ns)
                     return response
                 except (TimeoutError, socket.timeout) as e:
+                    if instrumentation is not None:
+                        instrumentation.count('transceive_retries')
                     if attempt < max_retries - 1:
                         logging.warning(f"TCP timeout attempt {attempt + 1}/{max_retries} for {command.__class__.__name__}")
                         time.sleep(0.2)  
@@ -91,14 +118,63 @@ class Interface:
         finally:
             self.lock.release()
 
+    def transceiveBatch(self, commands, maxBatchSize: int = 16) -> list:
+        """Send several commands before reading their responses, in batches of up to maxBatchSize commands.
+
+        The commands are transmitted in a single send and the responses are read in
+        order afterwards, so a batch costs a single round trip. Error responses raise a
+        RuntimeError once all responses of the batch are read. A single command is sent with
+        the retries of transceive.
+        """
+        if len(commands) == 1:
+            return [self.transceive(commands[0])]
+        if not self.lock.acquire(timeout=5):
+            raise TimeoutError(f"Failed to acquire lock for a batch of {len(commands)} commands")
+
+        instrumentation = self.instrumentation
+        start_ns = time.perf_counter_ns() if instrumentation is not None and instrumentation.enabled else 0
+        responses = []
+        try:
+            for first in range(0, len(commands), maxBatchSize):
+                batch = commands[first:first + maxBatchSize]
+                self.socket.sendall(b''.join(self._assembleMessage(command) for command in batch))
+                self._countTransmitted(batch)
+                responses += [self.receive() for _ in batch]
+        except (TimeoutError, socket.timeout):
+            # the responses still outstanding would be read by the following commands
+            self._reconnect()
+            raise TimeoutError(f"Not able to transmit a batch of {len(commands)} commands")
+        except BaseException:
+            self._reconnect()
+            raise
+        finally:
+            self.lock.release()
+
+        for command, response in zip(commands, responses):
+            if response.isError():
+                raise RuntimeError(f'Command \"{command.__class__.__name__}\" failed with response {response}')
+        if start_ns:
+            instrumentation.record_since('transceive_batch', start_ns)
+        return responses
+
     def transmit(self, command):
         message = self._assembleMessage(command)
         self.socket.sendall(message)
+        self._countTransmitted((command,))
+
+    def _countTransmitted(self, commands):
+        self.transmitCount += len(commands)
+        self.registerChangeCount += sum(command.changesRegisters for command in commands)
 
     def _assembleMessage(self, command):
+        if command.message is not None:
+            return command.message
         payload = command.toBytes()
-        return (self.markerStartBytes + struct.pack('!I', len(payload)) +
-                payload + self.markerEndBytes)
+        message = (self.markerStartBytes + struct.pack('!I', len(payload)) +
+                   payload + self.markerEndBytes)
+        if command.cacheMessage:
+            command.message = message
+        return message
 
     def receive(self):
         size = self._receiveHeader()
@@ -107,30 +183,33 @@ class Interface:
         return Response.fromBytes(payload)
 
     def _receiveHeader(self):
-        response = self.receiveBytes(struct.calcsize('!II'))
-        startmarker, size = struct.unpack('!II', response)
+        self._receiveInto(self._headerView)
+        startmarker, size = self.headerStruct.unpack_from(self._headerView)
         if not startmarker == self.markerStart:
             raise ValueError('Start marker not correct: 0x{:08x}'.format(startmarker))
         return size
 
     def _receiveFooter(self):
-        response = self.receiveBytes(struct.calcsize('!I'))
-        endmarker = struct.unpack('!I', response)[0]
+        self._receiveInto(self._footerView)
+        endmarker = self.footerStruct.unpack_from(self._footerView)[0]
         if not endmarker == self.markerEnd:
             raise ValueError('End marker not correct: 0x{:08x}'.format(endmarker))
 
     def receiveBytes(self, size):
-        message = bytearray()
-        while len(message) < size:
-            if (size - len(message)) > 4096:
-                part = self.socket.recv(4096)
-            else:
-                part = self.socket.recv(size - len(message))
-            if not part:
-                raise EOFError('Could not receive all expected data')
-            message += part
+        message = bytearray(size)
+        self._receiveInto(memoryview(message))
         return message
 
+    def _receiveInto(self, view: memoryview):
+        """Fill the view with the next bytes of the socket"""
+        received = 0
+        size = len(view)
+        while received < size:
+            count = self.socket.recv_into(view[received:])
+            if not count:
+                raise EOFError('Could not receive all expected data')
+            received += count
+
     def pollResponse(self, timeout_s):
         if select.select([self.socket], [], [], timeout_s)[0]:
             response = self.receive()
@@ -140,24 +219,88 @@ class Interface:
         else:
             raise TimeoutError(f'no response within {timeout_s}s')
         
-class UdpPacket:
-    def __init__(self, data) -> None:
-        self.packetHeaderFormat = struct.Struct('!HIHIII')
-        (self.measurementId,
-         self.totalSize,
-         self.packetSize,
-         self.offset,
-         self.packetCount,
-         self.packetNumber, ) = self.packetHeaderFormat.unpack(data[:20])
-        self.data = data[20:]
+class FrameBuffer:
+    """Preallocated, reusable buffer a UDP frame is reassembled into.
+
+    Packet arrivals are tracked in a bitmap, so neither the payload storage
+    nor the bookkeeping is reallocated as long as the frame size does not grow.
+    """
+    __slots__ = ('data', 'view', 'arrived', 'measurementId', 'totalSize',
+                 'packetSize', 'packetCount', 'packetsReceived', 'bytesReceived', 'startTime')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.view = memoryview(self.data)
+        self.arrived = bytearray()
+        self.clear()
+
+    def clear(self):
+        self.measurementId = None
+        self.totalSize = 0
+        self.packetSize = 0
+        self.packetCount = 0
+        self.packetsReceived = 0
+        self.bytesReceived = 0
+        self.startTime = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    def begin(self, measurementId, totalSize, packetSize, packetCount):
+        """Prepare the buffer for a new frame, growing it if the frame does not fit."""
+        required = totalSize + FrameAssembler.maxDatagramSize
+        if required > len(self.data):
+            # keep already placed payload, the first packet may have been received in place
+            grown = bytearray(required)
+            grown[:len(self.data)] = self.data
+            self.data = grown
+            self.view = memoryview(self.data)
+        bitmapSize = (packetCount + 7) // 8
+        if bitmapSize > len(self.arrived):
+            self.arrived = bytearray(bitmapSize)
+        else:
+            self.arrived[:bitmapSize] = bytes(bitmapSize)
+        self.measurementId = measurementId
+        self.totalSize = totalSize
+        self.packetSize = packetSize
+        self.packetCount = packetCount
+        self.packetsReceived = 0
+        self.bytesReceived = 0
+        self.startTime = time.monotonic()
+
+    def hasArrived(self, packetNumber) -> bool:
+        return bool(self.arrived[packetNumber >> 3] & (1 << (packetNumber & 7)))
+
+    def markArrived(self, packetNumber, packetSize) -> bool:
+        """Mark a packet as received. Returns False if it was already received."""
+        mask = 1 << (packetNumber & 7)
+        if self.arrived[packetNumber >> 3] & mask:
+            return False
+        self.arrived[packetNumber >> 3] |= mask
+        self.packetsReceived += 1
+        self.bytesReceived += packetSize
+        return True
+
+    def isComplete(self) -> bool:
+        return self.measurementId is not None and self.packetsReceived == self.packetCount
 
 class TcpReceiver:
+    """Receives the frames the camera sends on a TCP data connection.
+
+    The header of a frame is received first, the rest of the frame is received into a
+    reusable buffer sized from it. The returned frame is a view into that buffer, it is
+    valid until the next frame is received.
+    """
+    headerStruct = Parser.headerStruct
+
     def __init__(self, ipAddress='10.10.31.180', port: int = 45454, timeout_s: int = 1):
         self.lock = Lock()
         self.ip_address = ipAddress
         self.port = port
         self.timeout_s = timeout_s
-        self.data = bytearray()
+        self.data = bytearray(self.headerStruct.size)
+        self._view = memoryview(self.data)
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.connect((self.ip_address, self.port))
         self.turnOffDelayedAck()       
@@ -200,47 +343,194 @@ class TcpReceiver:
             pass
 
     def receiveFrame(self):
-        class HeaderParser(Parser):
-            def parseData(self, frame):
-                pass
-
+        headerSize = self.headerStruct.size
         try:
-            # get first packet and unpack header information
             self.turnOffDelayedAck()
-            first_chunk = self.socket.recv(8096)
-            partialFrame = HeaderParser().parse(first_chunk)
-            buffer_size = HeaderParser().headerStruct.size + \
-                (
-                    partialFrame.cols * partialFrame.rows * \
-                    CommunicationType().get_item_by_id(id=partialFrame.measurementType).bytes_per_pixel
-                )
-            data_buffer = bytearray(buffer_size)
-            data_buffer[0:len(first_chunk)] = first_chunk
-            byteCount = len(first_chunk)
-
-            # Receive remaining data
-            while byteCount < buffer_size:
-                self.turnOffDelayedAck()
-                chunk = self.socket.recv(buffer_size - byteCount)
-                if not chunk:
-                    break  # Connection closed by the server
-                data_buffer[byteCount:byteCount + len(chunk)] = chunk
-                byteCount += len(chunk)
+            self._receiveInto(self._view[:headerSize])
+            _, measurementType, cols, rows, *_ = self.headerStruct.unpack_from(self.data)
+            item = CommunicationType.get_item_by_id(measurementType)
+            if item is None:
+                raise ValueError(f"Unknown measurement type {measurementType} in frame header")
+            size = headerSize + cols * rows * item.bytes_per_pixel
+            if size > len(self.data):
+                # a new buffer, views of previous frames may still refer to the old one
+                data = bytearray(size)
+                data[:headerSize] = self._view[:headerSize]
+                self.data, self._view = data, memoryview(data)
+            self._receiveInto(self._view[headerSize:size])
 
         except ConnectionError as e:
             raise ConnectionError(f'No camera found at address {self.ip_address}:{self.port}\n{e}')
         except socket.timeout:
             raise TimeoutError(f"TCP data interface timed out")
-          
-        return data_buffer, byteCount
 
-class UdpInterface:
-    def __init__(self, ipAddress='10.10.31.180', port=45454):
+        return self._view[:size], size
+
+    def _receiveInto(self, view: memoryview):
+        received = 0
+        size = len(view)
+        while received < size:
+            count = self.socket.recv_into(view[received:])
+            if not count:
+                raise ConnectionError('Connection closed by the camera')
+            received += count
+            if received < size:
+                self.turnOffDelayedAck()
+
+class FrameAssembler:
+    """Reassembles the frames the camera sends in UDP packets.
+
+    Frames are reassembled into a small pool of preallocated :class:`FrameBuffer`
+    objects. Packets are assigned to their frame by the measurement id, so up to
+    ``maxInFlight`` frames can be collected at the same time. The first frame to complete
+    is returned, partial frames that precede it or did not complete within
+    ``staleTimeout_s`` are dropped and recorded in the loss statistics.
+
+    A completed frame stays valid until ``ringSize`` further frames have been completed.
+    """
+    packetHeaderFormat = struct.Struct('!HIHIII')
+    maxDatagramSize = 4096
+    # late packets of frames completed up to this many measurements ago are discarded
+    obsoleteIdWindow = 64
+
+    def __init__(self, ringSize: int = 4, maxInFlight: int = 3, staleTimeout_s: float = 0.5):
+        self.maxInFlight = max(maxInFlight, 1)
+        self.staleTimeout_s = staleTimeout_s
+        self._freeBuffers = deque(FrameBuffer() for _ in range(max(ringSize, 1) + self.maxInFlight + 1))
+        self._inFlight: dict[int, FrameBuffer] = {}
+        self._lastCompletedId: Optional[int] = None
+        self._prediction: tuple[Optional[FrameBuffer], int, int] = (None, 0, 0)
+        self._packet = bytearray(self.maxDatagramSize)
+        self._packetView = memoryview(self._packet)
+        self.framesCompleted = 0
+        self.framesLost = 0
+        self.packetsLost = 0
+        self.packetsDuplicated = 0
+        self.packetsLate = 0
+        # (measurementId, missing packets, packet count) of the most recently dropped frames
+        self.lostFrames: deque[tuple[int, int, int]] = deque(maxlen=32)
+
+    def statistics(self) -> dict:
+        """Returns the frame and packet loss statistics of the reassembly."""
+        return {'framesCompleted': self.framesCompleted,
+                'framesLost': self.framesLost,
+                'packetsLost': self.packetsLost,
+                'packetsDuplicated': self.packetsDuplicated,
+                'packetsLate': self.packetsLate,
+                'framesInFlight': len(self._inFlight)}
+
+    def acceptPacket(self, header, nbytes: int, target: Optional[FrameBuffer] = None,
+                     targetOffset: int = 0) -> Optional[FrameBuffer]:
+        """Place the payload of a packet into its frame, returns the frame once it is complete.
+
+        header holds the packet header followed by the payload, unless the payload was
+        received in place into target at targetOffset.
+        """
+        headerSize = self.packetHeaderFormat.size
+        if nbytes < headerSize:
+            return None
+
+        (measurementId,
+         totalSize,
+         packetSize,
+         offset,
+         packetCount,
+         packetNumber) = self.packetHeaderFormat.unpack_from(header)
+
+        if packetNumber >= packetCount or offset + packetSize > totalSize or nbytes - headerSize < packetSize:
+            return None
+
+        frame = self._inFlight.get(measurementId)
+        if frame is None:
+            if self._isObsolete(measurementId):
+                self.packetsLate += 1
+                return None
+            frame = self._beginFrame(measurementId, totalSize, packetSize, packetCount)
+        elif totalSize != frame.totalSize or packetCount != frame.packetCount:
+            return None
+
+        # check if already received this packet (duplicate)
+        if not frame.markArrived(packetNumber, packetSize):
+            self.packetsDuplicated += 1
+            return None
+
+        if target is None:
+            frame.view[offset:offset + packetSize] = header[headerSize:headerSize + packetSize]
+        elif frame is not target or offset != targetOffset:
+            # packet was not the expected one, move it from the expected to its actual position
+            self._packetView[:packetSize] = target.view[targetOffset:targetOffset + packetSize]
+            frame.view[offset:offset + packetSize] = self._packetView[:packetSize]
+        self._prediction = (frame, packetNumber + 1, offset + packetSize)
+
+        # check if received all packets
+        if not frame.isComplete():
+            return None
+
+        self._completeFrame(frame)
+
+        # verify total size
+        if frame.bytesReceived != frame.totalSize:
+            raise ValueError(f"Frame size mismatch: expected {frame.totalSize}, got {frame.bytesReceived}")
+        return frame
+
+    def _isObsolete(self, measurementId: int) -> bool:
+        """Returns True for ids of frames that precede the last completed frame by a few measurements."""
+        if self._lastCompletedId is None:
+            return False
+        age = (self._lastCompletedId - measurementId) & 0xFFFF
+        return age < self.obsoleteIdWindow
+
+    def _beginFrame(self, measurementId, totalSize, packetSize, packetCount) -> FrameBuffer:
+        now = time.monotonic()
+        for frame in [f for f in self._inFlight.values() if now - f.startTime > self.staleTimeout_s]:
+            self._dropFrame(frame)
+        if len(self._inFlight) >= self.maxInFlight:
+            self._dropFrame(min(self._inFlight.values(), key=lambda f: f.startTime))
+
+        frame = self._freeBuffers.popleft()
+        frame.begin(measurementId, totalSize, packetSize, packetCount)
+        self._inFlight[measurementId] = frame
+        return frame
+
+    def _completeFrame(self, completed: FrameBuffer):
+        del self._inFlight[completed.measurementId]
+        # partial frames measured before the completed one will not be needed anymore
+        for frame in list(self._inFlight.values()):
+            if 0 < (completed.measurementId - frame.measurementId) & 0xFFFF < 0x8000:
+                self._dropFrame(frame)
+        self._lastCompletedId = completed.measurementId
+        self.framesCompleted += 1
+        self._freeBuffers.append(completed)
+
+    def _dropFrame(self, frame: FrameBuffer):
+        missing = frame.packetCount - frame.packetsReceived
+        log.debug(f"Dropping incomplete frame {frame.measurementId}: {missing} of {frame.packetCount} packets missing")
+        del self._inFlight[frame.measurementId]
+        self.framesLost += 1
+        self.packetsLost += missing
+        self.lostFrames.append((frame.measurementId, missing, frame.packetCount))
+        # buffer holds no valid frame, reuse it first
+        self._freeBuffers.appendleft(frame)
+
+
+class UdpInterface(FrameAssembler):
+    """Receives frames sent by the camera over UDP.
+
+    Where the platform supports scatter receive (``recvmsg_into``), the payload of
+    each datagram is written directly to its place in the frame buffer, otherwise it
+    is copied once from a reusable packet buffer.
+
+    The data returned by :meth:`receiveFrame` is a view into the pool of frame buffers
+    and stays valid until ``ringSize`` further frames have been received.
+    """
+
+    def __init__(self, ipAddress='10.10.31.180', port=45454, ringSize: int = 4,
+                 maxInFlight: int = 3, staleTimeout_s: float = 0.5):
+        super().__init__(ringSize, maxInFlight, staleTimeout_s)
         self.ip_address = ipAddress
         self.port = port
-        self.packetHeaderFormat = struct.Struct('!HIHIII')
-        self.data = bytearray()
-        self.index = 0
+        self._header = bytearray(self.packetHeaderFormat.size)
+        self._spill = bytearray(self.maxDatagramSize)
         self.udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         
         # Important if camera supports large data and streaming modes:
@@ -262,6 +552,7 @@ class UdpInterface:
         self.udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.udpSocket.bind(('', self.port))
         self.udpSocket.settimeout(1)
+        self._scatterReceive = hasattr(self.udpSocket, 'recvmsg_into')
 
     def close(self):
         self.udpSocket.close()
@@ -279,55 +570,73 @@ class UdpInterface:
                     break 
         finally:
             self.udpSocket.setblocking(was_blocking)
+        self._lastCompletedId = None
             
     def receiveFrame(self):
-        packets = []
-        expected_packets = None
-        received_packet_numbers = set()
-        
+        headerSize = self.packetHeaderFormat.size
         while True:
+            # place the payload directly at the expected position if that region is still free
+            target, nextNumber, nextOffset = self._predictPlacement()
+            inPlace = target is not None
             try:
-                udpPacket, (ipAddress, _) = self.udpSocket.recvfrom(4096)
+                if inPlace:
+                    # the packet size of the frame may be that of its short last packet, so every
+                    # slot takes a full datagram, the frame buffers have this slack behind the frame
+                    payloadSize = self.maxDatagramSize - headerSize
+                    # a larger, invalid payload continues in the spill buffer
+                    nbytes, _, _, (ipAddress, _) = self.udpSocket.recvmsg_into(
+                        [self._header, target.view[nextOffset:nextOffset + payloadSize], self._spill])
+                    if nbytes > headerSize + payloadSize:
+                        # does not fit the prediction, handle it like a copied packet
+                        self._joinSpilled(target.view[nextOffset:nextOffset + payloadSize], nbytes)
+                        inPlace = False
+                else:
+                    nbytes, (ipAddress, _) = self.udpSocket.recvfrom_into(self._packet)
             except socket.timeout:
+                # the measurement ids may restart after a silence (e.g. camera reset)
+                self._lastCompletedId = None
+                self._prediction = (None, 0, 0)
                 raise TimeoutError(f"UDP data interface timed out")
 
             if ipAddress != self.ip_address:
                 continue
 
-            packet = UdpPacket(udpPacket)
-            
-            # check if already received this packet (duplicate)
-            if packet.packetNumber in received_packet_numbers:
-                continue
-                
-            packets.append(packet)
-            received_packet_numbers.add(packet.packetNumber)
-            
-            # set expected packet count from first packet
-            if expected_packets is None:
-                expected_packets = packet.packetCount
-            
-            # check if received all packets
-            if len(received_packet_numbers) == expected_packets:
-                break
+            if inPlace:
+                frame = self.acceptPacket(self._header, nbytes, target, nextOffset)
+            else:
+                frame = self.acceptPacket(self._packetView, nbytes)
+            if frame is not None:
+                return frame.view[:frame.totalSize], frame.bytesReceived
+
+    def _joinSpilled(self, placed: memoryview, nbytes: int):
+        """Join header, placed and spilled part of a scatter received packet in the packet buffer"""
+        headerSize = self.packetHeaderFormat.size
+        end = min(nbytes, self.maxDatagramSize)
+        self._packetView[:headerSize] = self._header
+        self._packetView[headerSize:headerSize + len(placed)] = placed
+        self._packetView[headerSize + len(placed):end] = self._spill[:end - headerSize - len(placed)]
+
+    def _predictPlacement(self) -> tuple[Optional[FrameBuffer], int, int]:
+        """Returns the frame buffer and position the next payload is expected at.
+
+        The region of the next expected packet can only be used if it has not been filled yet.
+        """
+        if not self._scatterReceive:
+            return None, 0, 0
+        frame, nextNumber, nextOffset = self._prediction
+        if frame is not None and self._inFlight.get(frame.measurementId) is frame:
+            if (nextNumber < frame.packetCount and
+                    nextOffset + self.maxDatagramSize <= frame.capacity and
+                    not frame.hasArrived(nextNumber)):
+                return frame, nextNumber, nextOffset
+            return None, 0, 0
+        # expect the first packet of a new frame, it is received into the next free buffer
+        frame = self._freeBuffers[0]
+        frame.clear()
+        if frame.capacity >= self.maxDatagramSize:
+            return frame, 0, 0
+        return None, 0, 0
 
-        # verify we received all expected packets
-        expected_packet_numbers = set(range(expected_packets))
-        if received_packet_numbers != expected_packet_numbers:
-            missing_packets = expected_packet_numbers - received_packet_numbers
-            raise ValueError(f"Missing UDP packets: {sorted(missing_packets)}")
-
-        frameData = bytearray(packets[0].totalSize)
-        byteCount = 0
-        for p in packets:
-            frameData[p.offset:p.offset+p.packetSize] = p.data
-            byteCount += p.packetSize
-            
-        # verify total size
-        if byteCount != packets[0].totalSize:
-            raise ValueError(f"Frame size mismatch: expected {packets[0].totalSize}, got {byteCount}")
-            
-        return frameData, byteCount
 
 class DataType(IntEnum):
     DISTANCE_AMPLITUDE = 0x00
@@ -346,20 +655,22 @@ class CommunicationType():
     items_by_id = {}
     items_by_name = {}
 
-    def __init__(self):
-        for item in [ self.Item(DataType.DISTANCE_AMPLITUDE, 4, DataType.DISTANCE_AMPLITUDE.name),
-                      self.Item(DataType.DISTANCE, 2, DataType.DISTANCE.name),
-                      self.Item(DataType.GRAYSCALE, 2, DataType.GRAYSCALE.name),
-                      self.Item(DataType.DCS, 8, DataType.DCS.name),
-                    ]:
-            self.items_by_id[item.id] = item
-            self.items_by_name[item.name] = item
-
-    def get_item_by_id(self, id: int):
-        return self.items_by_id.get(id)
-
-    def get_item_by_name(self, name: str):
-        return self.items_by_name.get(name)
+    @classmethod
+    def get_item_by_id(cls, id: int):
+        return cls.items_by_id.get(id)
+
+    @classmethod
+    def get_item_by_name(cls, name: str):
+        return cls.items_by_name.get(name)
+
+
+for _item in [CommunicationType.Item(DataType.DISTANCE_AMPLITUDE, 4, DataType.DISTANCE_AMPLITUDE.name),
+              CommunicationType.Item(DataType.DISTANCE, 2, DataType.DISTANCE.name),
+              CommunicationType.Item(DataType.GRAYSCALE, 2, DataType.GRAYSCALE.name),
+              CommunicationType.Item(DataType.DCS, 8, DataType.DCS.name)]:
+    CommunicationType.items_by_id[_item.id] = _item
+    CommunicationType.items_by_name[_item.name] = _item
+del _item
 
 class TraceInterface:
     def __init__(self, ipAddress='10.10.31.180', port=50661, logFile=None):
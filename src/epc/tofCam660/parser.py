@@ -4,6 +4,13 @@ import numpy as np
 
 
 class Frame:
+    """A parsed frame: the images, the metadata of the frame header and the host receive
+    time (`time.time`) and sequence number assigned by the camera object."""
+    __slots__ = ('headerVersion', 'measurementType', 'cols', 'rows', 'leftColumn', 'topRow',
+                 'rightColumn', 'bottomRow', 'lowIntTime', 'midIntTime', 'highIntTime',
+                 'temperature', 'dataOffset', 'amplitude', 'distance', 'dcs', 'dcsErrors',
+                 'timestamp', 'sequence')
+
     def __init__(self):
         self.headerVersion = None
         self.measurementType = None
@@ -21,9 +28,31 @@ class Frame:
         self.amplitude = None
         self.distance = None
         self.dcs = None
+        self.dcsErrors = None
+        self.timestamp = None
+        self.sequence = None
+
+    @property
+    def roi(self) -> tuple[int, int, int, int]:
+        """Region of interest of the frame (x1, y1, x2, y2), in the format of the ROI setting
+
+        Taken from the sensor coordinates in the header, which unlike cols and rows are not reduced by binning
+        """
+        return (self.leftColumn, self.topRow, self.rightColumn + 1, self.bottomRow + 1)
+
+    @property
+    def integrationTimes(self) -> tuple[int, int, int]:
+        """Low, mid and high integration time of the frame in us"""
+        return (self.lowIntTime, self.midIntTime, self.highIntTime)
 
 
 class Parser(abc.ABC):
+    """Parses the frames of one data type, a parser can be reused for any number of frames.
+
+    The bytestream may be a view into a reused receive buffer. The header is unpacked in
+    place and the pixel data is read behind it without slicing the bytestream, the parsers
+    only copy the data where the result would otherwise refer to the receive buffer.
+    """
     headerStruct = struct.Struct('!BHHHHHHHHHHhH')
 
     def __init__(self):
@@ -32,8 +61,11 @@ class Parser(abc.ABC):
     def parse(self, bytestream):
         self.bytestream = bytestream
         frame = Frame()
-        self.parseHeader(frame)
-        self.parseData(frame)
+        try:
+            self.parseHeader(frame)
+            self.parseData(frame)
+        finally:
+            self.bytestream = None
         return frame
 
     def parseHeader(self, frame):
@@ -49,10 +81,13 @@ class Parser(abc.ABC):
          frame.midIntTime,
          frame.highIntTime,
          frame.temperature,
-         frame.dataOffset] = self.headerStruct.unpack(self.bytestream[:self.headerStruct.size])
-        self.bytestream = self.bytestream[self.headerStruct.size:]
+         frame.dataOffset] = self.headerStruct.unpack_from(self.bytestream)
         frame.temperature /= 100
 
+    def pixelData(self, count: int) -> np.ndarray:
+        """uint16 view of the first count values behind the header, without copying the bytestream"""
+        return np.frombuffer(self.bytestream, dtype=np.uint16, count=count, offset=self.headerStruct.size)
+
     @abc.abstractmethod
     def parseData(self, frame):
         pass
@@ -60,35 +95,77 @@ class Parser(abc.ABC):
 
 class GrayscaleParser(Parser):
     def parseData(self, frame):
-        frame.amplitude = np.frombuffer(self.bytestream, dtype=np.uint16).reshape(frame.rows, frame.cols)
+        frame.amplitude = self.pixelData(frame.rows * frame.cols).reshape(frame.rows, frame.cols).copy()
 
 
 class DistanceParser(Parser):
     def parseData(self, frame):
-        frame.distance = np.frombuffer(self.bytestream, dtype=np.uint16).reshape(frame.rows, frame.cols)
+        frame.distance = self.pixelData(frame.rows * frame.cols).reshape(frame.rows, frame.cols).copy()
 
 
 class DistanceAndAmplitudeParser(Parser):
     def parseData(self, frame):
-        data = np.frombuffer(self.bytestream, dtype=np.uint16)
+        # one contiguous copy is faster than deinterleaving, the images are strided views into it
+        data = self.pixelData(2 * frame.rows * frame.cols).copy()
         frame.distance = data[::2].reshape(frame.rows, frame.cols)
         frame.amplitude = data[1::2].reshape(frame.rows, frame.cols)
 
-class DcsParser(Parser):
-    def parseData(self, frame):
-        data = np.frombuffer(self.bytestream, dtype=np.uint16)
-        data = data.reshape(4, frame.rows, frame.cols)
-
-        # create masks for the error codes
-        mask_overflow = data == 64002
-        mask_saturation = data == 64003
 
-        # change data type such that the data is aligned around zero
-        data = data.astype(np.int32)
-        data = data - 2048
-
-        # apply masks to reintroduce the error codes
-        data[mask_overflow] = 64002
-        data[mask_saturation] = 64003
+class DcsParser(Parser):
+    """Parses DCS frames into one of three formats:
+
+    - ``'int32'``: DCS values aligned around zero, the error codes 64002 (ADC overflow)
+      and 64003 (saturation) are kept as they are.
+    - ``'int16'``: DCS values aligned around zero with half the memory of ``'int32'``. Pixels
+      with an error code are set to 0 and flagged in ``frame.dcsErrors``, a (rows, cols) uint8
+      bitmask of ``ERROR_ADC_OVERFLOW`` and ``ERROR_SATURATION`` over the four DCS. The
+      bitmask of a frame without errors is a shared read-only array of zeros.
+    - ``'raw'``: the uint16 values as sent by the camera, without any conversion.
+    """
+    ADC_OVERFLOW = 64002
+    SATURATION = 64003
+    ERROR_ADC_OVERFLOW = 1
+    ERROR_SATURATION = 2
+    FORMATS = ('int32', 'int16', 'raw')
+
+    def __init__(self, format: str = 'int32'):
+        super().__init__()
+        if format not in self.FORMATS:
+            raise ValueError(f"Invalid DCS format: {format}. Select one of {self.FORMATS}")
+        self.format = format
+        # read-only bitmask of error free frames, shared by all frames of the same size
+        self._noErrors = np.zeros((0, 0), dtype=np.uint8)
 
-        frame.dcs = data
\ No newline at end of file
+    def parseData(self, frame):
+        raw = self.pixelData(4 * frame.rows * frame.cols).reshape(4, frame.rows, frame.cols)
+        if self.format == 'raw':
+            frame.dcs = raw.copy()
+            return
+
+        # one pass aligns the data around zero, the error codes are rare and restored afterwards
+        if self.format == 'int16':
+            # valid values are below 4096, only the error codes wrap around and are replaced below
+            data = np.subtract(raw.view(np.int16), np.int16(2048))
+        else:
+            data = np.subtract(raw, 2048, dtype=np.int32)
+        if raw.max() < self.ADC_OVERFLOW:
+            frame.dcs = data
+            if self.format == 'int16':
+                frame.dcsErrors = self.__errorFreeMask(frame.rows, frame.cols)
+            return
+
+        invalid = raw >= self.ADC_OVERFLOW
+        if self.format == 'int16':
+            np.copyto(data, 0, where=invalid)
+            overflow = (raw == self.ADC_OVERFLOW).any(axis=0).view(np.uint8)
+            saturation = (raw == self.SATURATION).any(axis=0).view(np.uint8)
+            frame.dcsErrors = overflow * self.ERROR_ADC_OVERFLOW | saturation * self.ERROR_SATURATION
+        else:
+            np.copyto(data, raw, where=invalid & (raw <= self.SATURATION))
+        frame.dcs = data
+
+    def __errorFreeMask(self, rows: int, cols: int) -> np.ndarray:
+        if self._noErrors.shape != (rows, cols):
+            self._noErrors = np.zeros((rows, cols), dtype=np.uint8)
+            self._noErrors.setflags(write=False)
+        return self._noErrors
@@ -0,0 +1,319 @@
+import logging
+import random
+import select
+import socket
+import struct
+import time
+from threading import Event, Lock, Thread
+from typing import Optional
+
+import numpy as np
+
+from epc.tofCam660.interface import DataType, Interface, UdpInterface
+from epc.tofCam660.parser import Parser
+
+log = logging.getLogger('Simulator')
+
+# command ids of the control protocol, see command.py
+SET_ROI = 0
+SET_INT_TIMES = 1
+GET_DISTANCE_AMPLITUDE = 2
+GET_DISTANCE = 3
+GET_GRAYSCALE = 5
+STOP_STREAM = 6
+GET_DCS = 7
+READ_CHIP_INFORMATION = 36
+READ_FIRMWARE_RELEASE = 37
+WRITE_REGISTER = 42
+READ_REGISTER = 43
+GET_CALIBRATION_DATA = 53
+GET_INTEGRATION_TIME = 56
+SET_DATA_TRANSFER_PROTOCOL = 57
+GET_DATA_TRANSFER_PROTOCOL = 58
+GET_TEMPERATURE = 74
+
+# response ids, see response.py
+ACKNOWLEDGE = 0
+FIRMWARE_RELEASE = 2
+CHIP_INFORMATION = 3
+TEMPERATURE = 4
+READ_REGISTER_RESPONSE = 6
+CALIBRATION_DATA = 9
+INTEGRATION_TIME = 10
+DATA_TRANSFER_PROTOCOL = 11
+
+ACQUISITION_TYPES = {
+    GET_DISTANCE_AMPLITUDE: DataType.DISTANCE_AMPLITUDE,
+    GET_DISTANCE: DataType.DISTANCE,
+    GET_GRAYSCALE: DataType.GRAYSCALE,
+    GET_DCS: DataType.DCS,
+}
+
+
+class TOFcam660Simulator:
+    """Simulated TOFcam660 on the local host for hardware-free tests and benchmarks.
+
+    The simulator speaks the TCP control protocol of the camera and answers every command,
+    the ones returning data with plausible values. Acquisition commands are answered with
+    synthetic frames, sent over UDP with the packet header of the camera or over the TCP
+    data connection, depending on the selected data transfer protocol.
+
+    Packet loss, reordering and the acquisition latency can be configured to exercise the
+    receive path. Connect a camera with ``TOFcam660(sim.ipAddress, tcp_port=sim.tcpPort,
+    data_port=sim.dataPort)``.
+    """
+    firmwareRelease = (3, 60)
+    chipInformation = (1234, 56)
+
+    def __init__(self, ipAddress: str = '127.0.0.1', tcpPort: int = 0, dataPort: int = 0,
+                 packetSize: int = 1400, packetLoss: float = 0.0, reorder: float = 0.0,
+                 latency_s: float = 0.0, frameInterval_s: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            ipAddress (str): address to listen on
+            tcpPort (int): port of the control connection, 0 for a free port
+            dataPort (int): UDP port the frames are sent to and TCP port of the data connection, 0 for a free port
+            packetSize (int): payload size of the UDP packets
+            packetLoss (float): probability of a UDP packet to be lost
+            reorder (float): probability of a UDP packet to be swapped with the following one
+            latency_s (float): time between an acquisition command and the frame data, e.g. the integration time
+            frameInterval_s (float): minimal time between two frames in stream mode
+            seed (Optional[int]): seed of the random packet loss and reordering
+        """
+        self.ipAddress = ipAddress
+        self.packetSize = packetSize
+        self.packetLoss = packetLoss
+        self.reorder = reorder
+        self.latency_s = latency_s
+        self.frameInterval_s = frameInterval_s
+        self.random = random.Random(seed)
+
+        self.roi = (0, 0, 320, 240)
+        self.intTimes = (0, 0, 0, 0)
+        self.temperature = 35.0
+        self.registers: dict[int, int] = {}
+        self.useTcp = False
+        self.commandsReceived = 0
+        self.framesSent = 0
+        self.packetsSent = 0
+        self.packetsDropped = 0
+
+        self._controlServer = socket.create_server((ipAddress, tcpPort))
+        self.tcpPort = self._controlServer.getsockname()[1]
+        self._dataServer = socket.create_server((ipAddress, dataPort))
+        self.dataPort = self._dataServer.getsockname()[1]
+        self._udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UdpInterface.maxDatagramSize * 512)
+        self._dataConnection: Optional[socket.socket] = None
+        self._clientAddress = ipAddress
+        self._measurementId = 0
+        self._payloads: dict[tuple, bytes] = {}
+        self._sendLock = Lock()
+        self._stopEvent = Event()
+        self._streamStopped = Event()
+        self._threads = [Thread(target=self._serveControl, name='SimulatorControl', daemon=True),
+                         Thread(target=self._serveData, name='SimulatorData', daemon=True)]
+
+    def __enter__(self) -> 'TOFcam660Simulator':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stopEvent.set()
+        self._streamStopped.set()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(2)
+        self._controlServer.close()
+        self._dataServer.close()
+        self._udpSocket.close()
+        if self._dataConnection is not None:
+            self._dataConnection.close()
+
+    def _serveControl(self) -> None:
+        while not self._stopEvent.is_set():
+            if not select.select([self._controlServer], [], [], 0.1)[0]:
+                continue
+            connection, address = self._controlServer.accept()
+            self._clientAddress = address[0]
+            with connection:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                try:
+                    self._handleClient(connection)
+                except (ConnectionError, OSError) as e:
+                    log.debug(f"Control connection closed: {e}")
+            self._stopStream()
+
+    def _serveData(self) -> None:
+        while not self._stopEvent.is_set():
+            if not select.select([self._dataServer], [], [], 0.1)[0]:
+                continue
+            connection, _ = self._dataServer.accept()
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._sendLock:
+                if self._dataConnection is not None:
+                    self._dataConnection.close()
+                self._dataConnection = connection
+
+    def _handleClient(self, connection: socket.socket) -> None:
+        while not self._stopEvent.is_set():
+            if not select.select([connection], [], [], 0.1)[0]:
+                continue
+            header = self._receiveExactly(connection, 8)
+            if header is None:
+                return
+            marker, size = struct.unpack('!II', header)
+            if marker != Interface.markerStart:
+                raise ConnectionError(f'Start marker not correct: 0x{marker:08x}')
+            message = self._receiveExactly(connection, size + 4)
+            if message is None:
+                return
+            payload, footer = message[:size], message[size:]
+            if footer != Interface.markerEndBytes:
+                raise ConnectionError('End marker not correct')
+            self.commandsReceived += 1
+            commandId = struct.unpack('!H', payload[:2])[0]
+            self._handleCommand(connection, commandId, payload[2:])
+
+    @staticmethod
+    def _receiveExactly(connection: socket.socket, size: int) -> Optional[bytes]:
+        data = bytearray()
+        while len(data) < size:
+            part = connection.recv(size - len(data))
+            if not part:
+                return None
+            data += part
+        return bytes(data)
+
+    def _respond(self, connection: socket.socket, responseId: int, data: bytes = b'') -> None:
+        payload = struct.pack('!B', responseId) + data
+        connection.sendall(Interface.markerStartBytes + struct.pack('!I', len(payload)) +
+                           payload + Interface.markerEndBytes)
+
+    def _handleCommand(self, connection: socket.socket, commandId: int, data: bytes) -> None:
+        if commandId in ACQUISITION_TYPES:
+            self._respond(connection, ACKNOWLEDGE)
+            dataType = ACQUISITION_TYPES[commandId]
+            if data[0] == 1:
+                self._startStream(dataType)
+            else:
+                if self.latency_s:
+                    time.sleep(self.latency_s)
+                self._sendFrame(dataType)
+        elif commandId == STOP_STREAM:
+            self._stopStream()
+            self._respond(connection, ACKNOWLEDGE)
+        elif commandId == SET_ROI:
+            self.roi = struct.unpack('!HHHH', data[:8])
+            self._respond(connection, ACKNOWLEDGE)
+        elif commandId == SET_INT_TIMES:
+            self.intTimes = struct.unpack('!HHHH', data[:8])
+            self._respond(connection, ACKNOWLEDGE)
+        elif commandId == READ_FIRMWARE_RELEASE:
+            self._respond(connection, FIRMWARE_RELEASE, struct.pack('!HH', *self.firmwareRelease))
+        elif commandId == READ_CHIP_INFORMATION:
+            self._respond(connection, CHIP_INFORMATION, struct.pack('!HH', *self.chipInformation))
+        elif commandId == GET_TEMPERATURE:
+            self._respond(connection, TEMPERATURE, struct.pack('!h', int(self.temperature * 100)))
+        elif commandId == WRITE_REGISTER:
+            address, value = struct.unpack('!BB', data[:2])
+            self.registers[address] = value
+            self._respond(connection, ACKNOWLEDGE)
+        elif commandId == READ_REGISTER:
+            address = data[0]
+            self._respond(connection, READ_REGISTER_RESPONSE, struct.pack('!B', self.registers.get(address, 0)))
+        elif commandId == GET_CALIBRATION_DATA:
+            entries = b''.join(struct.pack('!BHH', index, 35000, 6250) for index in range(6))
+            self._respond(connection, CALIBRATION_DATA, entries)
+        elif commandId == GET_INTEGRATION_TIME:
+            self._respond(connection, INTEGRATION_TIME, struct.pack('!HHHH', *self.intTimes))
+        elif commandId == SET_DATA_TRANSFER_PROTOCOL:
+            self.useTcp = data[0] == 1
+            self._respond(connection, ACKNOWLEDGE)
+        elif commandId == GET_DATA_TRANSFER_PROTOCOL:
+            self._respond(connection, DATA_TRANSFER_PROTOCOL, struct.pack('!B', int(self.useTcp)))
+        else:
+            self._respond(connection, ACKNOWLEDGE)
+
+    def _startStream(self, dataType: DataType) -> None:
+        self._stopStream()
+        self._streamStopped.clear()
+        Thread(target=self._streamFrames, args=(dataType,), name='SimulatorStream', daemon=True).start()
+
+    def _stopStream(self) -> None:
+        self._streamStopped.set()
+
+    def _streamFrames(self, dataType: DataType) -> None:
+        nextFrame = time.monotonic()
+        while not self._streamStopped.is_set():
+            self._sendFrame(dataType)
+            nextFrame += max(self.frameInterval_s, self.latency_s)
+            self._streamStopped.wait(max(nextFrame - time.monotonic(), 0))
+
+    def frameBytes(self, dataType: DataType) -> bytes:
+        """Synthetic frame of the current ROI: frame header and data of a tilted plane"""
+        left, top, right, bottom = self.roi
+        cols, rows = max(right - left, 1), max(bottom - top, 1)
+        key = (dataType, self.roi, self.intTimes, self.temperature)
+        payload = self._payloads.get(key)
+        if payload is None:
+            y, x = np.indices((rows, cols))
+            distance = (1000 + 10 * (x + left) + 5 * (y + top)).astype('<u2')
+            amplitude = (200 + (x + y) % 800).astype('<u2')
+            if dataType == DataType.DISTANCE_AMPLITUDE:
+                data = np.stack((distance, amplitude), axis=-1)
+            elif dataType == DataType.DISTANCE:
+                data = distance
+            elif dataType == DataType.GRAYSCALE:
+                data = amplitude
+            else:
+                phase = 2 * np.pi * distance / 12500
+                data = np.stack([2048 + amplitude * np.cos(phase + k * np.pi / 2) for k in range(4)]).astype('<u2')
+            header = Parser.headerStruct.pack(1, dataType.value, cols, rows, left, top, right - 1, bottom - 1,
+                                              *self.intTimes[:3], int(self.temperature * 100),
+                                              Parser.headerStruct.size)
+            payload = header + data.tobytes()
+            self._payloads = {key: payload}
+        return payload
+
+    def _sendFrame(self, dataType: DataType) -> None:
+        frame = self.frameBytes(dataType)
+        with self._sendLock:
+            if self.useTcp:
+                if self._dataConnection is not None:
+                    try:
+                        self._dataConnection.sendall(frame)
+                    except OSError as e:
+                        log.debug(f"Data connection closed: {e}")
+            else:
+                self._sendUdp(frame)
+            self.framesSent += 1
+
+    def _sendUdp(self, frame: bytes) -> None:
+        measurementId = self._measurementId
+        self._measurementId = (measurementId + 1) & 0xFFFF
+        packetCount = (len(frame) + self.packetSize - 1) // self.packetSize
+        packets = []
+        for number in range(packetCount):
+            offset = number * self.packetSize
+            chunk = frame[offset:offset + self.packetSize]
+            packets.append(UdpInterface.packetHeaderFormat.pack(
+                measurementId, len(frame), len(chunk), offset, packetCount, number) + chunk)
+        if self.reorder:
+            for i in range(len(packets) - 1):
+                if self.random.random() < self.reorder:
+                    packets[i], packets[i + 1] = packets[i + 1], packets[i]
+        destination = (self._clientAddress, self.dataPort)
+        for packet in packets:
+            if self.packetLoss and self.random.random() < self.packetLoss:
+                self.packetsDropped += 1
+                continue
+            self._udpSocket.sendto(packet, destination)
+            self.packetsSent += 1
@@ -0,0 +1,125 @@
+import itertools
+import logging
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+from typing import Iterator, Literal, Optional
+
+from epc.tofCam660.parser import Frame, Parser
+from epc.tofCam_lib.instrumentation import Instrumentation
+
+log = logging.getLogger('FrameStream')
+
+
+class FrameStream:
+    """Continuously drains the data interface of a streaming camera in a background thread.
+
+    Received frames are parsed in the receiver thread and kept in a bounded queue.
+    If the queue is full, either the oldest queued frame or the newly received frame
+    is dropped, depending on the drop policy. The frames are stamped with the receive time
+    and the next number of the sequence, dropped frames leave gaps in the sequence.
+    """
+
+    def __init__(self, rxInterface, parser: Parser, queueSize: int = 4,
+                 dropPolicy: Literal['oldest', 'newest'] = 'oldest',
+                 instrumentation: Optional[Instrumentation] = None,
+                 sequence: Optional[Iterator[int]] = None):
+        if queueSize < 1:
+            raise ValueError(f"Invalid queue size: {queueSize}. Must be at least 1")
+        if dropPolicy not in ('oldest', 'newest'):
+            raise ValueError(f"Invalid drop policy: {dropPolicy}. Must be 'oldest' or 'newest'")
+        self.rxInterface = rxInterface
+        self.parser = parser
+        self.queueSize = queueSize
+        self.dropPolicy = dropPolicy
+        self.instrumentation = instrumentation
+        self.sequence = sequence if sequence is not None else itertools.count(1)
+        self.framesReceived = 0
+        self.framesDropped = 0
+        self.receiveErrors = 0
+        self._running = False
+        self._frames: deque[Frame] = deque()
+        self._condition = Condition()
+        self._stopEvent = Event()
+        self._thread = Thread(target=self._receiveFrames, name='FrameStream', daemon=True)
+
+    @property
+    def isRunning(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Start receiving frames in the background."""
+        self._stopEvent.clear()
+        self._running = True
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 2):
+        """Stop the receiver thread and discard all queued frames."""
+        self._stopEvent.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout_s)
+        with self._condition:
+            self._frames.clear()
+            self._condition.notify_all()
+
+    def get(self, timeout_s: float = 1) -> Frame:
+        """Pop the next frame from the queue, waiting at most timeout_s for it to arrive."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or not self.isRunning, timeout_s):
+                raise TimeoutError(f"No frame received within {timeout_s}s")
+            if not self._frames:
+                raise RuntimeError("Frame stream is not running")
+            return self._frames.popleft()
+
+    def statistics(self) -> dict:
+        """Returns the number of received and dropped frames and receive errors."""
+        with self._condition:
+            return {'received': self.framesReceived,
+                    'dropped': self.framesDropped,
+                    'errors': self.receiveErrors,
+                    'queued': len(self._frames)}
+
+    def _receiveFrames(self):
+        instrumentation = self.instrumentation
+        while not self._stopEvent.is_set():
+            try:
+                timed = instrumentation is not None and instrumentation.enabled
+                start_ns = time.perf_counter_ns() if timed else 0
+                data, nBytes = self.rxInterface.receiveFrame()
+                if nBytes <= 0:
+                    continue
+                timestamp = time.time()
+                if timed:
+                    start_ns = instrumentation.record_since('receive', start_ns)
+                frame = self.parser.parse(data)
+                frame.timestamp = timestamp
+                frame.sequence = next(self.sequence)
+                if timed:
+                    instrumentation.record_since('parse', start_ns)
+            except TimeoutError:
+                continue
+            except OSError as e:
+                if not self._stopEvent.is_set():
+                    log.error(f"Data interface failed, stopping stream: {e}")
+                break
+            except Exception as e:
+                log.debug(f"Failed to receive frame: {e}")
+                with self._condition:
+                    self.receiveErrors += 1
+                continue
+            self._enqueue(frame)
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _enqueue(self, frame: Frame):
+        with self._condition:
+            self.framesReceived += 1
+            if len(self._frames) >= self.queueSize:
+                self.framesDropped += 1
+                if self.dropPolicy == 'newest':
+                    return
+                self._frames.popleft()
+            self._frames.append(frame)
+            self._condition.notify()
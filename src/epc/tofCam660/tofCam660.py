@@ -1,9 +1,10 @@
 import numpy as np
+import itertools
 import logging
 import time
 from typing import Literal
 import atexit
-from typing import Union
+from typing import Optional, Union
 
 from epc.tofCam_lib import TOFcam, TOF_Settings_Controller, Dev_Infos_Controller
 from epc.tofCam_lib.decorator import requires_fw_version
@@ -11,7 +12,13 @@ from epc.tofCam660.interface import DataType, Interface, TcpReceiver, UdpInterfa
 from epc.tofCam660.memory import Memory
 from epc.tofCam660.command import Command
 from epc.tofCam_lib.projection_models import RadialCameraProjector
+from epc.tofCam_lib.dcs_processor import DcsProcessor
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
+from epc.tofCam_lib.instrumentation import Instrumentation
+from epc.tofCam660.stream import FrameStream
 from epc.tofCam660.parser import (
+    Frame,
+    Parser,
     GrayscaleParser,
     DistanceParser,
     DistanceAndAmplitudeParser,
@@ -26,6 +33,29 @@ DEFAULT_DATA_RX_PORT = 45454
 DEFAULT_MAX_DEPTH = 16000
 DEFAULT_MAX_AMP = 2894
 
+CAPTURE_MODE_SINGLE = 0
+CAPTURE_MODE_STREAM = 1
+
+# acquisition command and parser for each data type
+ACQUISITION_COMMANDS: dict[DataType, tuple[str, type[Parser]]] = {
+    DataType.DISTANCE_AMPLITUDE: ("getDistanceAndAmplitude", DistanceAndAmplitudeParser),
+    DataType.DISTANCE: ("getDistance", DistanceParser),
+    DataType.GRAYSCALE: ("getGrayscale", GrayscaleParser),
+    DataType.DCS: ("getDcs", DcsParser),
+}
+
+# modulation frequency in MHz to the frequency code of the camera
+MODULATION_FREQUENCY_CODES = {
+    12: 0,
+    24: 1,
+    6: 2,
+    5: 0,  # for TOFcam660-H1
+    3: 3,
+    1.5: 4,
+    0.75: 5,
+}
+ROLLING_MODES = {"None": 0, "1DCS": 1, "2DCS": 2}
+
 MAX_DCS_VALUE = 64000
 C = 299792458
 TOF_COS_DISTANCE_CHIP_TO_FRONT = 28.0
@@ -40,15 +70,18 @@ class TOFcam660(TOFcam):
     """Creates a new TOFcam660 object and connects it to the ip address specified.
 
     If no ip address is specified, the default ip address (10.10.31.180) is used.
+    The ports only need to be changed for a simulated camera.
 
     The TOFcam660 object holds two attributes:
 
     - settings: allows to control the settings of the camera.
     - device: allows to get device information's of the camera.
     """
-    def __init__(self, ip_address=DEFAULT_IP_ADDRESS):
-        self.tcpInterface = Interface(ip_address, DEFAULT_TCP_PORT)
-        self.rxInterface = UdpInterface(ip_address, DEFAULT_DATA_RX_PORT)
+    def __init__(self, ip_address=DEFAULT_IP_ADDRESS, tcp_port=DEFAULT_TCP_PORT, data_port=DEFAULT_DATA_RX_PORT):
+        self.tcpInterface = Interface(ip_address, tcp_port)
+        self.instrumentation = Instrumentation('TOFcam660')
+        self.tcpInterface.instrumentation = self.instrumentation
+        self.rxInterface = UdpInterface(ip_address, data_port)
         self.settings = TOFcam660_Settings(self)
         self.device = TOFcam660_Device(self)
         super().__init__(self.settings, self.device)
@@ -56,10 +89,19 @@ class TOFcam660(TOFcam):
         self._version = self.device.get_fw_version()
         self._calibData: list[dict] = None # This will be loaded on flex mode enabling
         self._calibData24Mhz: dict = None
+        self._dcs_processor: DcsProcessor = None
+        self._point_cloud_builder = PointCloudBuilder(flip='ud')
+        self._parsers: dict[tuple, Parser] = {}
         atexit.register(self.__restore_settings)
 
         self.frame = None
+        # sequence numbers of the received frames, shared by all acquisition modes
+        self._frame_sequence = itertools.count(1)
         self.hw_trigger_data_type: DataType = DataType.DISTANCE # data type for gpio trigger based acquisition
+        self._stream: FrameStream = None
+        self._stream_data_type: DataType = None
+        # data type and command count of the acquisition issued ahead in pipelined mode
+        self._pending_acquisition: tuple[DataType, int] = None
 
     def __restore_settings(self):
         if hasattr(self, "settings") and self.settings and self.tcpInterface and not self.tcpInterface.is_socket_closed():
@@ -67,6 +109,8 @@ class TOFcam660(TOFcam):
             self.settings._restore_abs_setting()
 
     def __del__(self):
+        if getattr(self, "_stream", None):
+            self._stream.stop()
         if self.tcpInterface and not self.tcpInterface.is_socket_closed():
             self.tcpInterface.close()
         if self.rxInterface:
@@ -77,15 +121,110 @@ class TOFcam660(TOFcam):
         for i in range(5):
             try:
                 self.tcpInterface.transceive(command)
-                frame_data, nBytes = self.rxInterface.receiveFrame()
+                frame_data, nBytes = self.__receive_frame()
                 break
             except Exception as e:
                 log.error(f"Failed to receive image data: {e}")
+                self.instrumentation.count('acquisition_retries')
                 continue
         if nBytes <= 0:
             raise RuntimeError("Failed to receive image data")
         return frame_data
     
+    def __create_parser(self, data_type: DataType, dcs_format: str = None) -> Parser:
+        """Parser of a data type, DCS frames are parsed into the format of the settings by default"""
+        if data_type == DataType.DCS:
+            return DcsParser(dcs_format or self.settings.dcsFormat)
+        return ACQUISITION_COMMANDS[data_type][1]()
+
+    def __get_parser(self, data_type: DataType, dcs_format: str = None) -> Parser:
+        """Parser of a data type shared by the single and hardware triggered acquisitions"""
+        key = (data_type, (dcs_format or self.settings.dcsFormat) if data_type == DataType.DCS else None)
+        parser = self._parsers.get(key)
+        if parser is None:
+            parser = self._parsers[key] = self.__create_parser(data_type, dcs_format)
+        return parser
+
+    def __acquire_frame(self, data_types: tuple[DataType, ...], dcs_format: str = None) -> Frame:
+        """Returns the next frame from the running stream or acquires a single frame of the first data type.
+
+        In pipelined mode the acquisition of the next frame is issued as soon as the current
+        frame is received, so the camera integrates it while the current frame is parsed and
+        processed by the caller."""
+        if self._stream is not None:
+            if self._stream_data_type not in data_types:
+                raise RuntimeError(f"Camera is streaming {self._stream_data_type.name} frames. Stop the stream first.")
+            self.frame = self._stream.get()
+            return self.frame
+
+        start_ns = time.perf_counter_ns() if self.instrumentation.enabled else 0
+        data_type = data_types[0]
+        raw_data = None
+        if self._pending_acquisition is not None:
+            pending_type, transmit_count = self._pending_acquisition
+            # any command sent in between may have changed the settings of the pending frame
+            if pending_type in data_types and transmit_count == self.tcpInterface.transmitCount:
+                data_type = pending_type
+                raw_data = self.__receive_pending_image_data()
+            else:
+                self._discard_pending_acquisition()
+        self._pending_acquisition = None
+
+        command_name, _ = ACQUISITION_COMMANDS[data_type]
+        parser = self.__get_parser(data_type, dcs_format)
+        if raw_data is None:
+            raw_data = self.__get_image_date(Command.cached(command_name, self.settings.captureMode))
+        timestamp = time.time()
+        if self.settings.pipelinedAcquisition:
+            self.__issue_acquisition(data_type)
+        if not start_ns:
+            self.frame = self.__parse_frame(parser, raw_data, timestamp)
+            return self.frame
+        parse_start_ns = time.perf_counter_ns()
+        self.frame = self.__parse_frame(parser, raw_data, timestamp)
+        self.instrumentation.record_since('parse', parse_start_ns)
+        self.instrumentation.record_since('frame', start_ns)
+        return self.frame
+
+    def __parse_frame(self, parser: Parser, raw_data, timestamp: float) -> Frame:
+        frame = parser.parse(raw_data)
+        frame.timestamp = timestamp
+        frame.sequence = next(self._frame_sequence)
+        return frame
+
+    def __issue_acquisition(self, data_type: DataType) -> None:
+        """Trigger the acquisition of the next frame without waiting for its data"""
+        command_name, _ = ACQUISITION_COMMANDS[data_type]
+        try:
+            self.tcpInterface.transceive(Command.cached(command_name, self.settings.captureMode))
+        except Exception as e:
+            log.warning(f"Failed to issue the next acquisition: {e}")
+            return
+        self._pending_acquisition = (data_type, self.tcpInterface.transmitCount)
+
+    def __receive_frame(self):
+        if not self.instrumentation.enabled:
+            return self.rxInterface.receiveFrame()
+        start_ns = time.perf_counter_ns()
+        received = self.rxInterface.receiveFrame()
+        self.instrumentation.record_since('receive', start_ns)
+        return received
+
+    def __receive_pending_image_data(self):
+        try:
+            frame_data, nBytes = self.__receive_frame()
+        except Exception as e:
+            log.warning(f"Failed to receive pipelined image data: {e}")
+            return None
+        return frame_data if nBytes > 0 else None
+
+    def _discard_pending_acquisition(self) -> None:
+        """Receive and drop the frame of an acquisition issued ahead in pipelined mode"""
+        if self._pending_acquisition is None:
+            return
+        self._pending_acquisition = None
+        self.__receive_pending_image_data()
+
     def __wait_for_image_data(self):
         """This function is used to wait until one image is being received from the camera after 
         hw trigger gpio is used capture a new frame"""
@@ -100,6 +239,8 @@ class TOFcam660(TOFcam):
         return frame_data
 
     def initialize(self):
+        # bring the camera into a known state, no matter which settings were applied before
+        self.settings.invalidate()
         self.settings._store_dll_settings()
         self.settings._store_abs_setting()
         self.settings.set_modulation(3)
@@ -127,69 +268,130 @@ class TOFcam660(TOFcam):
                                             minAmp: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Acquire a DCS image with a flexibly chosen modulation frequency and calculate the distance and amplitude images from it."""
         log.debug(f"Get image with modulation frequency {modFreq_MHz} MHz.")
-        dcs = self.get_raw_dcs_images()
-        temp = self.device.get_chip_temperature()
+        frame = self.__acquire_frame((DataType.DCS,), dcs_format='int32')
+        dcs = frame.dcs
+        if dcs.dtype != np.int32:
+            raise RuntimeError("Flexible modulation requires DCS frames in the 'int32' format, restart the DCS stream.")
+        # the frame header holds the chip temperature of the acquisition
+        temp = frame.temperature
+
+        processor = self._dcs_processor
+        if processor is None or processor.shape != dcs.shape[1:] or processor.mod_freq_hz != modFreq_MHz * 1E6:
+            processor = DcsProcessor(dcs.shape[1:], modFreq_MHz * 1E6)
+            self._dcs_processor = processor
+        processor.min_amplitude = minAmp
+
+        # compensate offsets, the distance is wrapped into the unambiguity range
+        start_ns = time.perf_counter_ns() if self.instrumentation.enabled else 0
+        temp_offset = (calibData['calibrated_temperature(mDeg)']/1000 - temp) * TOF_COS_TEMPERATURE_COEFFICIENT
+        offset = (6250 - calibData['atan_offset']) + temp_offset + CONST_OFFSET_CORRECTION
+        distance, amplitude = processor.process(dcs, offset_mm=offset)
+        if start_ns:
+            self.instrumentation.record_since('compensation', start_ns)
 
-        # create masks for certain flags (part 1/2)
-        mask_overflow = np.logical_or.reduce(dcs == 64002)
-        mask_saturation = np.logical_or.reduce(dcs == 64003)
-        
         # filter invalid values
         dcs = dcs.astype(np.float32)
         dcs[dcs >= MAX_DCS_VALUE] = np.nan
 
-        # calculate amplitude
-        diff0 = dcs[2] - dcs[0]
-        diff1 = dcs[3] - dcs[1]
-        amplitude = np.sqrt(diff0**2 + diff1**2) / 2
-
-        # create masks for certain flags (part 2/2)
-        mask_low_amplitude = amplitude <= minAmp
-        
-        # calculate phase
-        phi = np.arctan2(diff1, diff0) + np.pi
-        phi[amplitude < minAmp] = np.nan 
-
-        # calculate distance
-        unambiguity_mm = (C / (2 * modFreq_MHz * 1E6)) * 1000
-        distance = (phi * unambiguity_mm) / (2 * np.pi)
-
-        # compensate offsets
-        temp_offset = (calibData['calibrated_temperature(mDeg)']/1000 - temp) * TOF_COS_TEMPERATURE_COEFFICIENT
-        distance = distance + (6250 - calibData['atan_offset']) + temp_offset + CONST_OFFSET_CORRECTION
-        
-        # handle unambiguity steps
-        distance %= unambiguity_mm
-
-        # apply the masks for the error codes (keep the order!)
-        amplitude[mask_overflow] = 64002
-        amplitude[mask_saturation] = 64003
-        distance[mask_low_amplitude] = 64001
-        distance[mask_overflow] = 64002
-        distance[mask_saturation] = 64003
-
         # assign our calculated values to the frame
         self.frame.amplitude = amplitude
         self.frame.distance = distance
 
         return (distance, amplitude, dcs)
 
+    def start_stream(self, data_type: DataType = DataType.DISTANCE_AMPLITUDE, queue_size: int = 4,
+                     drop_policy: Literal["oldest", "newest"] = "oldest") -> None:
+        """Start continuous streaming of the given data type.
+
+        A background thread receives and parses the frames sent by the camera and keeps
+        them in a queue of at most queue_size frames. If the queue is full, either the oldest
+        queued or the newest received frame is dropped. While streaming, the get_* methods
+        matching the data type return the next queued frame instead of triggering a capture.
+        """
+        if self._stream is not None:
+            raise RuntimeError("Camera is already streaming. Stop the stream first.")
+        self._discard_pending_acquisition()
+        command_name, _ = ACQUISITION_COMMANDS[data_type]
+        stream = FrameStream(self.rxInterface, self.__create_parser(data_type), queue_size, drop_policy,
+                             self.instrumentation, self._frame_sequence)
+        self.rxInterface.clearInputBuffer()
+        stream.start()
+        log.info(f"Starting stream: {data_type.name}")
+        try:
+            self.tcpInterface.transceive(Command.cached(command_name, CAPTURE_MODE_STREAM))
+        except Exception:
+            stream.stop()
+            raise
+        self._stream = stream
+        self._stream_data_type = data_type
+
+    def stop_stream(self) -> None:
+        """Stop the continuous streaming started with start_stream."""
+        if self._stream is None:
+            return
+        log.info("Stopping stream")
+        try:
+            self.tcpInterface.transceive(Command.cached("stopStream"))
+        finally:
+            self._stream.stop()
+            self._stream = None
+            self._stream_data_type = None
+            self.rxInterface.clearInputBuffer()
+
+    def is_streaming(self) -> bool:
+        """Returns True if the camera is streaming."""
+        return self._stream is not None
+
+    def get_stream_statistics(self) -> dict:
+        """Returns the number of received, dropped and queued frames and the receive errors of the running stream."""
+        if self._stream is None:
+            raise RuntimeError("Camera is not streaming.")
+        return self._stream.statistics()
+
+    def enable_instrumentation(self, enable: bool = True, log_interval_s: float = None) -> None:
+        """Enable the per-stage latency statistics returned by stats().
+
+        Every frame is timed in the stages transceive (command round trip), receive, parse,
+        compensation (flexible modulation) and projection (point cloud), and in total.
+        If log_interval_s is given, a summary is logged periodically.
+        """
+        self.instrumentation.enable(enable, log_interval_s)
+
+    def stats(self) -> dict:
+        """Returns the latency statistics (p50/p95/p99 in ms) of every stage, the retry counters,
+        the packet and frame loss statistics of the data interface and, while streaming, the
+        statistics of the stream."""
+        stats = self.instrumentation.stats()
+        if hasattr(self.rxInterface, 'statistics'):
+            stats['receiver'] = self.rxInterface.statistics()
+        if self._stream is not None:
+            stats['stream'] = self._stream.statistics()
+        return stats
+
+    def capture(self, data_type: DataType = DataType.DISTANCE_AMPLITUDE) -> Frame:
+        """Acquire a frame of the given data type and return it with its metadata.
+
+        Besides the images (distance, amplitude, dcs) the frame holds the chip temperature,
+        integration times and ROI of its header, the host receive time (`time.time`) and a
+        sequence number counting the frames received from the camera. While streaming, the
+        next frame of the stream is returned.
+        """
+        if self.settings.flexMod and data_type in (DataType.DISTANCE, DataType.DISTANCE_AMPLITUDE):
+            # the DCS frame of the flexible modulation holds the calculated distance and amplitude
+            self.get_distance_and_amplitude()
+            return self.frame
+        if data_type == DataType.DISTANCE:
+            return self.__acquire_frame((DataType.DISTANCE, DataType.DISTANCE_AMPLITUDE))
+        return self.__acquire_frame((data_type,))
+
     def get_grayscale_image(self) -> np.ndarray:
         """Get a grayscale image from the camera as a 2D numpy array"""
-        parser = GrayscaleParser()
-        get_gray_command = Command.create("getGrayscale", self.settings.captureMode)
-        raw_data = self.__get_image_date(get_gray_command)
-        self.frame = parser.parse(raw_data)
-        return self.frame.amplitude
+        return self.__acquire_frame((DataType.GRAYSCALE,)).amplitude
 
     def get_distance_image(self) -> np.ndarray:
         """Get a distance image from the camera as a 2D numpy array. The distance is in mm."""
         if not self.settings.flexMod:
-            parser = DistanceParser()
-            get_dist_cmd = Command.create("getDistance", self.settings.captureMode)
-            raw_data = self.__get_image_date(get_dist_cmd)
-            self.frame = parser.parse(raw_data)
-            return self.frame.distance
+            return self.__acquire_frame((DataType.DISTANCE, DataType.DISTANCE_AMPLITUDE)).distance
         else:
             dist, _, = self.get_distance_and_amplitude()
             return dist
@@ -197,13 +399,8 @@ class TOFcam660(TOFcam):
     def get_distance_and_amplitude(self) -> tuple[np.ndarray, np.ndarray]:
         """Get a distance and amplitude image from the camera as 2D numpy arrays. The distance is in mm."""
         if not self.settings.flexMod:
-            parser = DistanceAndAmplitudeParser()
-            get_dist_amp_cmd = Command.create(
-                "getDistanceAndAmplitude", self.settings.captureMode
-            )
-            raw_data = self.__get_image_date(get_dist_amp_cmd)
-            self.frame = parser.parse(raw_data)
-            return self.frame.distance, self.frame.amplitude
+            frame = self.__acquire_frame((DataType.DISTANCE_AMPLITUDE,))
+            return frame.distance, frame.amplitude
         else:
             dist, amplitude, _ = self.get_flex_mod_distance_amplitude_dcs(self._calibData24Mhz, 
                                                                           self.settings.flexModFreq_MHz, 
@@ -217,26 +414,30 @@ class TOFcam660(TOFcam):
 
     def get_raw_dcs_images(self) -> np.ndarray:
         """Get a DCS image from the camera as a 2D numpy array."""
-        parser = DcsParser()
-        get_dcs_cmd = Command.create("getDcs", self.settings.captureMode)
-        raw_data = self.__get_image_date(get_dcs_cmd)
-        self.frame = parser.parse(raw_data)
-        return self.frame.dcs
-
-    def get_point_cloud(self) -> np.ndarray:
-        """Returns a tuple holding point cloud from the camera as a 3xN numpy array and the corresponding amplitude values."""
+        return self.__acquire_frame((DataType.DCS,)).dcs
+
+    def get_point_cloud(self, valid_only: bool = False,
+                        out: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Returns a tuple holding point cloud from the camera as a 3xN numpy array and the corresponding amplitude values.
+        If valid_only is set, only the points with a valid depth are returned. Otherwise the points are written to
+        out if given, a float32 buffer of shape (3, N) that is reused for every frame."""
         # capture depth image & corrections
         depth, amplitude = self.get_distance_and_amplitude()
         amplitude[amplitude>DEFAULT_MAX_AMP] = 0 # remove error codes
-        depth  = depth.astype(np.float32)
-        depth[depth >= self.settings.maxDepth] = np.nan
-        depth = np.flipud(depth)
-        amplitude = np.flipud(amplitude)
-
-        # calculate point cloud from the depth image
-        points = 1E-3 * self.settings.projector.project(depth, roi_x=self.settings.roi[0], roi_y=self.settings.roi[1])
-        points = points.reshape(3, -1)
-        return points, amplitude.flatten()
+
+        # calculate point cloud from the depth image, the builder flips the lens matrix instead of the image
+        roi_x, roi_y = self.settings.roi[0], self.settings.roi[1]
+        start_ns = time.perf_counter_ns() if self.instrumentation.enabled else 0
+        if valid_only:
+            result = self._point_cloud_builder.build_valid(
+                self.settings.projector, depth, amplitude, self.settings.maxDepth, roi_x, roi_y)
+        else:
+            points = self._point_cloud_builder.build(
+                self.settings.projector, depth, self.settings.maxDepth, roi_x, roi_y, out=out)
+            result = points, amplitude.ravel()
+        if start_ns:
+            self.instrumentation.record_since('projection', start_ns)
+        return result
     
     def get_hw_trigger_image(self) -> Union[tuple[np.ndarray, np.ndarray], np.ndarray]:
         """
@@ -249,25 +450,27 @@ class TOFcam660(TOFcam):
                 DataType.GRAYSCALE → grayscale as np.ndarray
                 DataType.DCS → 4DCS as np.ndarray
         """
+        self._discard_pending_acquisition()
         raw_data = self.__wait_for_image_data()
+        timestamp = time.time()
 
         match self.hw_trigger_data_type:
             case DataType.DISTANCE_AMPLITUDE:
-                parser = DistanceAndAmplitudeParser()
-                frame = parser.parse(raw_data)
-                return frame.distance, frame.amplitude
+                parser = self.__get_parser(DataType.DISTANCE_AMPLITUDE)
+                self.frame = self.__parse_frame(parser, raw_data, timestamp)
+                return self.frame.distance, self.frame.amplitude
             case DataType.DISTANCE:
-                parser = DistanceParser()
-                frame = parser.parse(raw_data)
-                return frame.distance
+                parser = self.__get_parser(DataType.DISTANCE)
+                self.frame = self.__parse_frame(parser, raw_data, timestamp)
+                return self.frame.distance
             case DataType.GRAYSCALE:
-                parser = GrayscaleParser()
-                frame = parser.parse(raw_data)
-                return frame.amplitude
+                parser = self.__get_parser(DataType.GRAYSCALE)
+                self.frame = self.__parse_frame(parser, raw_data, timestamp)
+                return self.frame.amplitude
             case DataType.DCS:
-                parser = DcsParser()
-                frame = parser.parse(raw_data)
-                return frame.dcs
+                parser = self.__get_parser(DataType.DCS)
+                self.frame = self.__parse_frame(parser, raw_data, timestamp)
+                return self.frame.dcs
             case _:
                 raise ValueError(f"Invalid data_type: {self.hw_trigger_data_type}")
 
@@ -278,7 +481,9 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         super().__init__()
         self.roi = (0, 0, 320, 240)
         self.cam = cam
-        self.captureMode = 0
+        self.captureMode = CAPTURE_MODE_SINGLE
+        self.pipelinedAcquisition = False
+        self.dcsFormat = 'int32'
         self.__int_time_grayscale = 50
         self.__int_time_low = 150
         self.__hdr_mode = 0
@@ -298,32 +503,30 @@ class TOFcam660_Settings(TOF_Settings_Controller):
             0x88: 0x00,
         }
     
+    def _transceive_setting(self, command: Command) -> bool:
+        """Send a setting command unless the camera is known to be in that state already."""
+        return self._apply_setting(command.__class__.__name__, command.toBytes(),
+                                   lambda: self.cam.tcpInterface.transceive(command))
+
     def _clear_dll_settings(self):
         """Clear the DLL settings in the camera."""
-        for reg, value in self.dllRegisterSettings.items():
-            self.cam.tcpInterface.transceive(Command.create("writeRegister", {"address": reg, "value": 0x00}))
+        self.cam.device.write_registers(dict.fromkeys(self.dllRegisterSettings, 0x00))
 
     def _store_dll_settings(self):
         """Store the current DLL settings in the camera."""
-        for reg in self.dllRegisterSettings.keys():
-            regValue = self.cam.tcpInterface.transceive(Command.create("readRegister", {"address": reg})).data
-            self.dllRegisterSettings[reg] = int(regValue)
+        self.dllRegisterSettings.update(self.cam.device.read_registers(self.dllRegisterSettings))
     
     def _restore_dll_settings(self):
         """Restore the DLL settings in the camera."""
-        for reg, value in self.dllRegisterSettings.items():
-            self.cam.tcpInterface.transceive(Command.create("writeRegister", {"address": reg, "value": value}))
+        self.cam.device.write_registers(self.dllRegisterSettings)
 
     def _store_abs_setting(self):
         """Store the current camera ABS pixel ramp setting."""
-        for reg in self.absRegisterSetting.keys():
-            regValue = self.cam.tcpInterface.transceive(Command.create("readRegister", {"address": reg})).data
-            self.absRegisterSetting[reg] = int(regValue)
+        self.absRegisterSetting.update(self.cam.device.read_registers(self.absRegisterSetting))
     
     def _restore_abs_setting(self):
         """Restore the ABS pixel ramp setting in the camera."""
-        for reg, value in self.absRegisterSetting.items():
-            self.cam.tcpInterface.transceive(Command.create("writeRegister", {"address": reg, "value": value}))
+        self.cam.device.write_registers(self.absRegisterSetting)
 
     def set_integration_time(self, int_time_us: int):
         """Set the integration time for standard mode in us."""
@@ -348,7 +551,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
             int_times is a list of 4 integers: [grayscale, low, mid, high]
         """
         log.info(f"Setting integration times: {int_times}")
-        self.cam.tcpInterface.transceive(
+        self._transceive_setting(
             Command.create(
                 "setIntTimes",
                 {
@@ -372,7 +575,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         if roi[1] != 240 - roi[3]:
             raise ValueError("TOFcam660 needs symetric y values")
         log.info(f"Setting ROI: {roi}")
-        self.cam.tcpInterface.transceive(
+        self._transceive_setting(
             Command.create(
                 "setRoi",
                 {
@@ -401,7 +604,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         if mode not in [0, 1, 2]:
             raise ValueError(f"Invalid HDR mode: {mode}. Must be 0, 1 or 2")
         log.info(f"Setting HDR mode: {mode}")
-        self.cam.tcpInterface.transceive(Command.create("setHdr", mode))
+        self._transceive_setting(Command.create("setHdr", mode))
         self.__hdr_mode = mode
 
     def set_binning(self, binning_type):
@@ -412,9 +615,9 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         else:          
             # Set new ABS pixel ramp magnitude & verify for binning mode
             newValue = 0x1f
-            for reg in self.absRegisterSetting.keys():
-                self.cam.tcpInterface.transceive(Command.create("writeRegister", {"address": reg, "value": newValue}))
-                updatedRegValue = self.cam.tcpInterface.transceive(Command.create("readRegister", {"address": reg})).data
+            self.cam.device.write_registers(dict.fromkeys(self.absRegisterSetting, newValue), force=True)
+            updatedRegValues = self.cam.device.read_registers(self.absRegisterSetting)
+            for reg, updatedRegValue in updatedRegValues.items():
                 if newValue != updatedRegValue:
                     raise ValueError(
                         f"ABS register mismatch at address 0x{reg:02X}: expected 0x{newValue:02X}, got 0x{updatedRegValue:02X}"
@@ -422,7 +625,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
 
         # Try setbinning() and if it fails, revert ABS pixel ramp magnitude to default
         try:
-            self.cam.tcpInterface.transceive(
+            self._transceive_setting(
                 Command.create("setBinning", np.byte(binning_type))
             )
         except Exception as e:
@@ -437,13 +640,13 @@ class TOFcam660_Settings(TOF_Settings_Controller):
     def set_minimal_amplitude(self, minimum: int):
         """Set minimal amplitude needed to be considered a valid distance estimation."""
         log.info(f"Setting minimum amplitude: {minimum}")
-        self.cam.tcpInterface.transceive(Command.create("setMinAmplitude", minimum))
+        self._transceive_setting(Command.create("setMinAmplitude", minimum))
         self.minAmplitude = minimum
 
     def set_grayscale_illumination(self, enable=True):
         """Enable or disable the illumination during grayscale capture."""
         log.info(f"Setting grayscale illumination: {enable}")
-        self.cam.tcpInterface.transceive(Command.create("setGrayscaleIllumination", int(enable)))
+        self._transceive_setting(Command.create("setGrayscaleIllumination", int(enable)))
 
     def set_compensations(
         self,
@@ -454,7 +657,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
     ):
         """Enable or distable compensations for the camera."""
         log.info('Changing compensations settings')
-        self.cam.tcpInterface.transceive(
+        self._transceive_setting(
             Command.create(
                 "setCompensation",
                 {
@@ -477,7 +680,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         interferenceDetectionUseLastValue: bool,
     ):
         log.info('Changing filters settings')
-        self.cam.tcpInterface.transceive(
+        self._transceive_setting(
             Command.create(
                 "setFilter",
                 {
@@ -509,6 +712,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         cmd = Command.create("setFlexModFreq", int(frequency_mhz*1E6))
         log.info(f"Setting flex modulation frequency: {frequency_mhz*1E6} Hz")
         self.cam.tcpInterface.transceive(cmd)
+        self.invalidate("SetModulationFrequency")
         time.sleep(delay)
         self.flexMod = True
         self.flexModFreq_MHz = frequency_mhz
@@ -517,27 +721,18 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         """Set the modulation frequency and channel for the TOFcam."""
         self._restore_dll_settings()
         
-        freq_table = {
-            12: 0,
-            24: 1,
-            6: 2,
-            5: 0,  # for TOFcam660-H1
-            3: 3,
-            1.5: 4,
-            0.75: 5,
-        }
         try:
-            frequency_code = freq_table[frequency_mhz]
+            frequency_code = MODULATION_FREQUENCY_CODES[frequency_mhz]
         except KeyError:
             raise ValueError(
-                f"Invalid frequency: {frequency_mhz}. Must be one of {list(freq_table.keys())}"
+                f"Invalid frequency: {frequency_mhz}. Must be one of {list(MODULATION_FREQUENCY_CODES.keys())}"
             )
         set_mod_cmd = Command.create(
             "setModulationFrequency",
             {"frequencyCode": frequency_code, "channel": channel},
         )
         log.info(f"Setting modulation frequency: {frequency_mhz} MHz, channel: {channel}")
-        self.cam.tcpInterface.transceive(set_mod_cmd)
+        self._transceive_setting(set_mod_cmd)
         self.flexMod = False
 
     def get_modulation_frequencies(self) -> list[float]:
@@ -574,14 +769,42 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         )
         log.info(f"Command data: {set_illuminator_cmd.dataToBytes()}")
         log.info(f"Command: {set_illuminator_cmd.toBytes()}")
-        self.cam.tcpInterface.transceive(set_illuminator_cmd)
+        self._transceive_setting(set_illuminator_cmd)
 
     @requires_fw_version(min_version='3.48')
     def set_hw_trigger_data_type(self, data_type: DataType):
         """Set the data type to acquire using the hardware trigger."""
         log.info(f"Setting HW trigger data type: {data_type.name}")
         self.cam.hw_trigger_data_type = data_type
-        self.cam.tcpInterface.transceive(Command.create("setHwTriggerDataType", data_type.value))
+        self._transceive_setting(Command.create("setHwTriggerDataType", data_type.value))
+
+    def set_pipelined_acquisition(self, enable: bool) -> None:
+        """Issue the acquisition of the next frame as soon as the current frame is received.
+
+        The camera integrates the next frame while the current one is parsed and processed,
+        which increases the frame rate of repeated single captures. The next frame is acquired
+        when the current one is returned and is dropped if any other command is sent before
+        it is requested.
+        """
+        log.info(f"{'Enabling' if enable else 'Disabling'} pipelined acquisition")
+        self.pipelinedAcquisition = enable
+        if not enable:
+            self.cam._discard_pending_acquisition()
+
+    def set_dcs_format(self, dcs_format: Literal['int32', 'int16', 'raw']) -> None:
+        """Set the format of the DCS images returned by get_raw_dcs_images and DCS streams.
+
+        - 'int32': values aligned around zero, error codes 64002/64003 are kept (default)
+        - 'int16': values aligned around zero in half the memory, pixels with an error code are 0
+          and flagged in the bitmask cam.frame.dcsErrors
+        - 'raw': the unconverted uint16 data of the camera
+
+        Flexible modulation always uses the 'int32' format. A running stream keeps its format.
+        """
+        if dcs_format not in DcsParser.FORMATS:
+            raise ValueError(f"Invalid DCS format: {dcs_format}. Select one of {DcsParser.FORMATS}")
+        log.info(f"Setting DCS format: {dcs_format}")
+        self.dcsFormat = dcs_format
 
     @requires_fw_version(min_version='3.36')
     def get_integration_time(self, ) -> list[dict]:
@@ -600,12 +823,11 @@ class TOFcam660_Settings(TOF_Settings_Controller):
                 "1DCS" = (1DCS Rolling Mode), 
                 "2DCS" = (2DCS Rolling Mode)
         """
-        mode_map = {"None": 0, "1DCS": 1, "2DCS": 2}
-        mode_value = mode_map.get(mode)
+        mode_value = ROLLING_MODES.get(mode)
         if mode_value is None:
             raise ValueError(f"Invalid Rolling mode value: {mode}")
         log.info(f"Setting rolling mode: {mode}")
-        self.cam.tcpInterface.transceive(Command.create("setRollingMode", mode_value))
+        self._transceive_setting(Command.create("setRollingMode", mode_value))
 
     @requires_fw_version(min_version='3.57')
     def set_eye_safety_mode(self, mode: int, fps: int):
@@ -621,7 +843,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
         if mode not in [0, 1, 2]:
             raise ValueError(f"Invalid eye safety mode value: {mode}")
         log.info(f"Setting eye safety mode: {mode}")
-        self.cam.tcpInterface.transceive(Command.create("setEyeSafety", {"mode": mode, "fps": fps}))
+        self._transceive_setting(Command.create("setEyeSafety", {"mode": mode, "fps": fps}))
 
     @requires_fw_version(min_version='3.57')
     def set_modulation_clock_jitter(self, enable: bool):
@@ -633,7 +855,7 @@ class TOFcam660_Settings(TOF_Settings_Controller):
                 False = disable mod clk jitter
         """
         log.info(f"set modulation clock jitter: {enable}")
-        self.cam.tcpInterface.transceive(Command.create("setModClkJitter", int(enable)))
+        self._transceive_setting(Command.create("setModClkJitter", int(enable)))
 
 class TOFcam660_Device(Dev_Infos_Controller):
     """The TOFcam660_Device class is used to get and set device information's of the TOFcam660.
@@ -641,21 +863,58 @@ class TOFcam660_Device(Dev_Infos_Controller):
     def __init__(self, cam: TOFcam660) -> None:
         super().__init__()
         self.cam = cam
+        # register values known to be in effect, valid until a command may have changed registers
+        self._registers: dict[int, int] = {}
+        self._registerChangeCount = None
+
+    def _register_shadow(self) -> dict[int, int]:
+        count = self.cam.tcpInterface.registerChangeCount
+        if count != self._registerChangeCount:
+            self._registers.clear()
+            self._registerChangeCount = count
+        return self._registers
 
     def write_register(self, reg_addr: int, value: int) -> None:
         """Write a value to a register on the epc660."""
         log.info(f"Writing to register 0x{reg_addr:02x}: 0x{value:02x}")
-        self.cam.tcpInterface.transceive(
-            Command.create("writeRegister", {"address": reg_addr, "value": value})
-        )
+        self.write_registers({reg_addr: value}, force=True)
+        # the register may hold the state of any setting
+        self.cam.settings.invalidate()
 
     def read_register(self, reg_addr: int) -> int:
         """Read a value from a register on the epc660."""
         log.info(f"Reading from register 0x{reg_addr:02x}")
-        reg_value = self.cam.tcpInterface.transceive(
-            Command.create("readRegister", {"address": reg_addr})
-        ).data
-        return int(reg_value)
+        return self.read_registers([reg_addr])[reg_addr]
+
+    def write_registers(self, values: dict[int, int], force: bool = False) -> None:
+        """Write several registers on the epc660 in a single round trip.
+
+        Registers known to hold the value already are skipped, unless force is set. A written
+        value is known until any command is sent that may change registers, e.g. a setting.
+        """
+        shadow = self._register_shadow()
+        pending = {reg: value for reg, value in values.items() if force or shadow.get(reg) != value}
+        if not pending:
+            return
+        log.debug(f"Writing registers: {', '.join(f'0x{reg:02x}: 0x{value:02x}' for reg, value in pending.items())}")
+        commands = [Command.create("writeRegister", {"address": reg, "value": value}) for reg, value in pending.items()]
+        try:
+            self.cam.tcpInterface.transceiveBatch(commands)
+        except Exception:
+            for reg in pending:
+                shadow.pop(reg, None)
+            raise
+        shadow.update(pending)
+
+    def read_registers(self, addresses) -> dict[int, int]:
+        """Read several registers from the epc660 in a single round trip."""
+        addresses = list(addresses)
+        log.debug(f"Reading registers: {', '.join(f'0x{reg:02x}' for reg in addresses)}")
+        responses = self.cam.tcpInterface.transceiveBatch(
+            [Command.create("readRegister", {"address": reg}) for reg in addresses])
+        values = {reg: int(response.data) for reg, response in zip(addresses, responses)}
+        self._register_shadow().update(values)
+        return values
     
     def _calibrate(self) ->None:
         """Perform production calibration on the camera."""
@@ -686,11 +945,13 @@ class TOFcam660_Device(Dev_Infos_Controller):
         """Reset the camera."""
         log.warning("Resetting the camera")
         self.cam.tcpInterface.transmit(Command.create("systemReset"))
+        self.cam.settings.invalidate()
 
     def power_reset(self):
         """Powercycle the camera."""
         log.warning("Powercycling the camera")
         self.cam.tcpInterface.transmit(Command.create("powerReset"))
+        self.cam.settings.invalidate()
 
     def jump_to_bootloader(self):
         log.warning("Jumping to bootloader")
@@ -727,6 +988,8 @@ class TOFcam660_Device(Dev_Infos_Controller):
 
     @requires_fw_version(min_version='3.43')
     def set_data_transfer_protocol(self, transferInterface: Literal["UDP", "TCP"] = "UDP"):
+        if self.cam.is_streaming():
+            raise RuntimeError("Cannot change the data transfer protocol while streaming. Stop the stream first.")
         # If rx protocol is already set, only call Command
         if isinstance(self.cam.rxInterface, UdpInterface) and transferInterface == "UDP":
             self.cam.tcpInterface.transceive(Command.create("setDataTransferProtocol", {"selectTCP": 0}))
@@ -1,11 +1,12 @@
 import enum
 import logging
-from typing import Protocol, Tuple
+from typing import Optional, Protocol, Tuple
 
 import numpy as np
 from bumble.colors import none
 
 from epc.tofCam_lib.projection_models import RadialCameraProjector
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
 from epc.tofCam_lib.tofCam import Dev_Infos_Controller, TOF_Settings_Controller, TOFcam
 
 
@@ -234,6 +235,7 @@ class TOFcam670(TOFcam):
         device = TOFcam670Device(self)
         super().__init__(settings, device)
         self.projector = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+        self._point_cloud_builder = PointCloudBuilder(flip='ud')
 
     def __del__(self):
         try:
@@ -268,23 +270,17 @@ class TOFcam670(TOFcam):
         """ get raw DCS images """
         return self.interface.get_frame(FrameType.DCS)
 
-    def get_point_cloud(self):
-        """ get point cloud in meters, with error codes removed (set to NaN) """
+    def get_point_cloud(self, valid_only: bool = False, out: Optional[np.ndarray] = None):
+        """ get point cloud in meters, with error codes removed (set to NaN), only the valid points if valid_only is set.
+        Otherwise the points are written to out if given, a float32 buffer of shape (3, n) """
         depth, amplitude = self.interface.get_distance_and_amplitude()
-        depth = depth.astype(float)
         amplitude = amplitude.astype(float)
-
-        depth[depth >= self.settings.max_depth] = np.nan  # remove error codes
         amplitude[amplitude > DEFAULT_MAX_AMP] = np.nan  # remove error codes
 
-        depth = np.flipud(depth)
-        amplitude = np.flipud(amplitude)
-
-        # calculate point cloud from the depth image
-        points = 1E-3 * self.projector.project(
-            depth=depth,
-            roi_x=self.settings.roi[0],
-            roi_y=self.settings.roi[1],
-        )
-        points = points.reshape(3, -1)
-        return points, amplitude.flatten()
+        # calculate point cloud from the depth image, the builder flips the lens matrix instead of the image
+        roi_x, roi_y = self.settings.roi[0], self.settings.roi[1]
+        if valid_only:
+            return self._point_cloud_builder.build_valid(
+                self.projector, depth, amplitude, self.settings.max_depth, roi_x, roi_y)
+        points = self._point_cloud_builder.build(self.projector, depth, self.settings.max_depth, roi_x, roi_y, out=out)
+        return points, amplitude.ravel()
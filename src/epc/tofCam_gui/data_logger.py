@@ -7,22 +7,74 @@ import h5py  # type: ignore
 import numpy as np
 from PySide6.QtCore import QThread
 
+from epc.tofCam_lib.frame_bus import SharedFrame
+
+
+# Number of frames written to the file at once
+BATCH_FRAMES = 32
+# Upper bound for the size of a single chunk of the frame datasets
+MAX_CHUNK_BYTES = 4 * 1024**2
+TIMESTAMP_CHUNK = 1024
+# Buffered frames are flushed at the latest after this time without new frames
+FLUSH_INTERVAL_S = 1.0
+COMPRESSION_FILTERS = (None, "lzf", "gzip")
+
+
+class _BatchedDataset:
+    """Resizable dataset, which grows geometrically and is written in batches of frames"""
+
+    def __init__(self, dataset: h5py.Dataset, batch_frames: int) -> None:
+        self.dataset = dataset
+        self.length = dataset.shape[0]
+        self._batch = np.empty((batch_frames, *dataset.shape[1:]), dtype=dataset.dtype)
+        self._pending = 0
+
+    def append(self, new: float | np.ndarray) -> None:
+        self._batch[self._pending] = new
+        self._pending += 1
+        if self._pending == len(self._batch):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered frames with a single hyperslab write"""
+        if self._pending == 0:
+            return
+        end = self.length + self._pending
+        capacity = self.dataset.shape[0]
+        if end > capacity:
+            self.dataset.resize(max(end, 2 * capacity), axis=0)
+        self.dataset[self.length:end] = self._batch[:self._pending]
+        self.length = end
+        self._pending = 0
+
+    def close(self) -> None:
+        """Flush the remaining frames and shrink the dataset to the written frames"""
+        self.flush()
+        self.dataset.resize(self.length, axis=0)
+
 
 class HDF5Logger(QThread):
     """HDF5 log worker object, storing streamed images"""
 
-    def __init__(self, image_type: str, file_path: str | Path, parent=None) -> None:
+    def __init__(self, image_type: str, file_path: str | Path, parent=None,
+                 compression: Optional[str] = None, batch_frames: int = BATCH_FRAMES) -> None:
         """
 
         Args:
             image_type (str): The type of the image "DCS", "Point cloud", .."
             file_path (str | Path): The path the source file
+            compression (Optional[str]): Compression filter of the frame datasets, None, "lzf" or "gzip"
+            batch_frames (int): Number of frames buffered in memory before they are written
         """
         super().__init__(parent)
+        if compression not in COMPRESSION_FILTERS:
+            raise ValueError(f"Compression {compression} not supported! Use one of {COMPRESSION_FILTERS}")
         self.image_type = image_type
+        self.compression = compression
+        self.batch_frames = max(1, batch_frames)
         self._filepath = file_path
         self._meta_data: Dict[str, Any] = {}
-        self._queue: queue.Queue[Optional[Tuple[np.ndarray | Tuple[np.ndarray], float]]] = queue.Queue(
+        self._queue: queue.Queue[Optional[Tuple[np.ndarray | Tuple[np.ndarray, ...], float]]] = queue.Queue(
         )
         self._running = False
 
@@ -32,11 +84,15 @@ class HDF5Logger(QThread):
     def set_metadata(self, **attrs: object) -> None:
         self._meta_data.update(attrs)
 
-    def add_frame(self, frame: np.ndarray | Tuple[np.ndarray]) -> None:
-        """Add a frame with the timestamp flag to the queue"""
+    def add_frame(self, frame: np.ndarray | Tuple[np.ndarray, ...] | SharedFrame, timestamp: Optional[float] = None) -> None:
+        """Add a frame with the timestamp flag to the queue, by default the current time.
+        Frames of a frame bus are copied and keep the timestamp they were published with."""
         if self._running:
+            if isinstance(frame, SharedFrame):
+                timestamp = frame.timestamp
+                frame = frame.copy()
             try:
-                self._queue.put_nowait((frame, time.time()))
+                self._queue.put_nowait((frame, time.time() if timestamp is None else timestamp))
             except queue.Full:
                 raise queue.Full(
                     f"Recording Queue is full.")
@@ -49,33 +105,46 @@ class HDF5Logger(QThread):
     def run(self) -> None:
         """Main thread loop creating/appending to the datases"""
         self._running = True
-        ds_frames = None
-        ds_timestamps = None
+        ds_frames: Optional[list[_BatchedDataset]] = None
+        ds_timestamps: Optional[_BatchedDataset] = None
         with h5py.File(self._filepath, 'a') as f:
             self._store_meta(f)
-            while True:
-                item = self._queue.get()
-                if item is None:
-                    break
-
-                _frame, _timestamp = item
-                if ds_timestamps is None:
-                    ds_timestamps = self.__init_timestamps_ds(f=f)
-                self._append(dataset=ds_timestamps, new=_timestamp)
-
-                if isinstance(_frame, np.ndarray):
-                    _frame = (_frame,)
-
-                if isinstance(_frame, tuple):
-                    if ds_frames is None:
-                        ds_frames = [self.__init_frames_ds(
-                            f=f, shape=_fr.shape, dtype=_fr.dtype, name=f"frames_{i}") for i, _fr in enumerate(_frame)]
-
-                    for i, _fr in enumerate(_frame):
-                        self._append(dataset=ds_frames[i], new=_fr)
-
-                else:
-                    raise ValueError(f"Type not handled {type(_frame)}")
+            try:
+                while True:
+                    try:
+                        item = self._queue.get(timeout=FLUSH_INTERVAL_S)
+                    except queue.Empty:
+                        # write the buffered frames while the stream is paused
+                        for ds in [ds_timestamps, *(ds_frames or [])]:
+                            if ds is not None:
+                                ds.flush()
+                        continue
+                    if item is None:
+                        break
+
+                    _frame, _timestamp = item
+                    if ds_timestamps is None:
+                        ds_timestamps = _BatchedDataset(self.__init_timestamps_ds(f=f), self.batch_frames)
+                    ds_timestamps.append(_timestamp)
+
+                    if isinstance(_frame, np.ndarray):
+                        _frame = (_frame,)
+
+                    if isinstance(_frame, tuple):
+                        if ds_frames is None:
+                            ds_frames = [_BatchedDataset(self.__init_frames_ds(
+                                f=f, shape=_fr.shape, dtype=_fr.dtype, name=f"frames_{i}"), self.batch_frames)
+                                for i, _fr in enumerate(_frame)]
+
+                        for i, _fr in enumerate(_frame):
+                            ds_frames[i].append(_fr)
+
+                    else:
+                        raise ValueError(f"Type not handled {type(_frame)}")
+            finally:
+                for ds in [ds_timestamps, *(ds_frames or [])]:
+                    if ds is not None:
+                        ds.close()
 
     def __init_frames_ds(self, f: h5py.File, shape: Tuple[int], dtype: str, name: str = "frames") -> h5py.Dataset:
         """Initialize the frame and timesteps datasets
@@ -89,8 +158,11 @@ class HDF5Logger(QThread):
         Returns:
             h5py.Dataset: The dataset storing the frames
         """
-        ds_frames = f.create_dataset(name, shape=(
-            0, *shape), maxshape=(None, *shape), chunks=(1, *shape), dtype=dtype)
+        frame_bytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        chunk_frames = max(1, min(self.batch_frames, MAX_CHUNK_BYTES // frame_bytes))
+        ds_frames = f.create_dataset(name, shape=(0, *shape), maxshape=(None, *shape),
+                                     chunks=(chunk_frames, *shape), dtype=dtype,
+                                     compression=self.compression)
         return ds_frames
 
     def __init_timestamps_ds(self, f: h5py.File) -> h5py.Dataset:
@@ -103,23 +175,9 @@ class HDF5Logger(QThread):
             h5py.Dataset: The dataset storing the timestamps
         """
         ds_timestamps = f.create_dataset("timestamps", shape=(0,),
-                                         maxshape=(None,), chunks=(1,), dtype='float64')
+                                         maxshape=(None,), chunks=(TIMESTAMP_CHUNK,), dtype='float64')
         return ds_timestamps
 
-    def _append(self, dataset: h5py.Dataset, new: float | np.ndarray) -> None:
-        """Append a new instance to a dataset
-
-        Args:
-            dataset (h5py.Dataset): The dataset to append to
-            new (float | np.ndarray): New instance
-        """
-        idx = dataset.shape[0]
-        dataset.resize(idx+1, axis=0)
-        if isinstance(new, float):
-            dataset[idx] = new
-        else:
-            dataset[idx, ...] = new
-
     def _store_meta(self, f: h5py.File) -> None:
         """Store the meta information in the top level
 
@@ -86,6 +86,7 @@ class Base_GUI_TOFcam(QMainWindow):
             widget = self.settingsLayout.itemAt(i).widget()
             if widget:
                 widget.setEnabled(enabled)
+        self.topMenuBar.recordingCompressionMenu.setEnabled(enabled)
 
     def _save_raw(self):
         filePath, _ = QFileDialog.getSaveFileName(
@@ -185,7 +186,7 @@ class Base_GUI_TOFcam(QMainWindow):
                                            defaultButton=QMessageBox.StandardButton.Yes)
 
             if confirm == QMessageBox.StandardButton.Yes:
-                cam = H5Cam(_recorded_stream, continuous=False)
+                cam = H5Cam(_recorded_stream, continuous=False, prefetch_frames=8)
                 self._set_bridge(cam)
                 _success = True
                 return cam
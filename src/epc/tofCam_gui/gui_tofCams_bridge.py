@@ -296,7 +296,12 @@ class Base_TOFcam_Bridge():
                 self.gui.toolBar.playButton.trigger()
 
             # initialize the logger
-            self.data_logger = HDF5Logger(self.image_type, filepath)
+            compression = None
+            if self.gui.topMenuBar.compressionLzfAction.isChecked():
+                compression = "lzf"
+            elif self.gui.topMenuBar.compressionGzipAction.isChecked():
+                compression = "gzip"
+            self.data_logger = HDF5Logger(self.image_type, filepath, compression=compression)
 
             self.data_logger.set_metadata(**self.metadata)
             self.data_logger.start()
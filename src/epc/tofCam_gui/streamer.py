@@ -5,6 +5,8 @@ from typing import Callable, Optional
 import numpy as np
 from PySide6.QtCore import QThread, QTimer, Signal
 
+from epc.tofCam_lib.frame_bus import FrameSubscriber
+
 log = logging.getLogger('Streamer')
 log.setLevel(logging.DEBUG)
 
@@ -31,7 +33,7 @@ def pause_streaming(func):
 class Streamer(QThread):
     signal_new_frame = Signal(np.ndarray)
 
-    def __init__(self, get_frame_cb: Optional[Callable[[], np.ndarray]] = None,
+    def __init__(self, get_frame_cb: Optional[Callable[[], np.ndarray | tuple[np.ndarray, ...]]] = None,
                  start_stream_cb: Optional[Callable[[], None]] = None,
                  stop_stream_cb:  Optional[Callable[[], None]] = None,
                  post_start_cb: Optional[Callable[[], None]] = None,
@@ -54,6 +56,12 @@ class Streamer(QThread):
         self._fps_smoothing_factor = 0.2
         self.setObjectName("Streamer thread")
 
+    @classmethod
+    def from_frame_bus(cls, subscriber: FrameSubscriber, timeout_s: float = 1) -> 'Streamer':
+        """Streamer of the frames published on a frame bus, e.g. by another process.
+        The frames are copied out of the shared memory, the receivers may keep them."""
+        return cls(get_frame_cb=lambda: subscriber.next(timeout_s).copy())
+
     def getFPS(self):
         return self._fps
     
@@ -13,6 +13,24 @@ class MenuBar(QMenuBar):
         self.fileMenu.addAction(self.savePngAction)
         self.saveRawAction = QAction("Save raw", self)
         self.fileMenu.addAction(self.saveRawAction)
+
+        self.recordingCompressionMenu = QMenu("Recording compression", self)
+        self.recordingCompressionGroup = QActionGroup(self)
+        self.compressionNoneAction = QAction("None", self)
+        self.compressionNoneAction.setCheckable(True)
+        self.compressionNoneAction.setChecked(True)
+        self.compressionLzfAction = QAction("LZF (fast)", self)
+        self.compressionLzfAction.setCheckable(True)
+        self.compressionGzipAction = QAction("GZIP (small)", self)
+        self.compressionGzipAction.setCheckable(True)
+        self.recordingCompressionGroup.addAction(self.compressionNoneAction)
+        self.recordingCompressionGroup.addAction(self.compressionLzfAction)
+        self.recordingCompressionGroup.addAction(self.compressionGzipAction)
+        self.recordingCompressionMenu.addAction(self.compressionNoneAction)
+        self.recordingCompressionMenu.addAction(self.compressionLzfAction)
+        self.recordingCompressionMenu.addAction(self.compressionGzipAction)
+        self.fileMenu.addMenu(self.recordingCompressionMenu)
+
         self.quitAppAction = QAction("Quit", self)
         self.fileMenu.addAction(self.quitAppAction)
 
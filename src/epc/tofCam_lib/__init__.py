@@ -1,2 +1,6 @@
 from .crc import Crc
-from .tofCam import TOF_Settings_Controller, Dev_Infos_Controller, TOFcam
\ No newline at end of file
+from .tofCam import TOF_Settings_Controller, Dev_Infos_Controller, TOFcam
+from .dcs_processor import DcsProcessor
+from .instrumentation import Instrumentation
+from .camera_group import CameraGroup, FrameBundle
+from .frame_bus import FramePublisher, FrameSubscriber, SharedFrame
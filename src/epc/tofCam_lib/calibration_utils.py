@@ -6,6 +6,7 @@ from typing import Optional, Tuple
 import numpy as np
 from epc.tofCam_lib import TOFcam
 from epc.tofCam_lib.algorithms import *
+from epc.tofCam_lib.dcs_processor import DcsProcessor
 
 logger = logging.getLogger("utils")
 
@@ -179,6 +180,8 @@ def collect_calibration_data(cam: TOFcam, modulation_freq_hz: float, n_dll_steps
     amplitudes_dn = np.empty(
         (resolution[1], resolution[0], n_frames, n_dll_steps))
     temperatures_deg = np.empty((n_frames, n_dll_steps))
+    processor = DcsProcessor(
+        (resolution[1], resolution[0]), modulation_freq_hz, error_codes=False)
 
     cam.settings.set_dll_step(0)
     for dll_step in range(n_dll_steps):
@@ -188,10 +191,8 @@ def collect_calibration_data(cam: TOFcam, modulation_freq_hz: float, n_dll_steps
             print(
                 f"Capturing frame {frame + 1}/{n_frames} at DLL step {dll_step + 1}/{n_dll_steps}...", end="\r")
             dcs = cam.get_raw_dcs_images()
-            distance, amplitude = calc_distance_and_amplitude(
-                dcs, modulation_freq_hz)
-            distances_mm[:, :, frame, dll_step] = distance
-            amplitudes_dn[:, :, frame, dll_step] = amplitude
+            processor.process(dcs, out=(distances_mm[:, :, frame, dll_step],
+                                        amplitudes_dn[:, :, frame, dll_step]))
             dcs_raw[:, :, :, frame, dll_step] = dcs
             cam.get_grayscale_image()  # get a grayscale image to update the temperature
             temp = cam.device.get_chip_temperature()
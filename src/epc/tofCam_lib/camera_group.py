@@ -0,0 +1,275 @@
+import logging
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from epc.tofCam_lib.tofCam import TOFcam
+
+log = logging.getLogger('CameraGroup')
+
+
+def _acquire_distance(camera: TOFcam) -> Any:
+    return camera.get_distance_image()
+
+
+class FrameBundle:
+    """Frames of all cameras of a group, acquired at about the same time.
+
+    frames and timestamps are in the order of the cameras of the group, the timestamps
+    are host times (`time.monotonic`) in the middle of the acquisition.
+    """
+    __slots__ = ('frames', 'timestamps')
+
+    def __init__(self, frames: list, timestamps: list[float]) -> None:
+        self.frames = frames
+        self.timestamps = timestamps
+
+    @property
+    def timestamp(self) -> float:
+        return sum(self.timestamps) / len(self.timestamps)
+
+    @property
+    def skew_s(self) -> float:
+        """Time between the first and the last frame of the bundle"""
+        return max(self.timestamps) - min(self.timestamps)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.frames[index]
+
+
+class CameraGroup:
+    """Acquires from several cameras in parallel and delivers time-aligned frame bundles.
+
+    Every camera is polled by its own worker thread calling `acquire(camera)`, by default
+    `get_distance_image`. The results are timestamped and kept in a queue of at most
+    queue_size frames per camera, the oldest frame is dropped if a queue is full.
+
+    `get` and the iterator match the latest of the oldest queued frames of the cameras with
+    the nearest frame not after it of every other camera. Frames older than tolerance_s are
+    never matched and dropped, so the skew of a bundle is at most tolerance_s.
+
+    Cameras sending UDP data to the same port of the host would receive each other's packets.
+    If separate_data_channels is set, all but the first of them are switched to a TCP data
+    connection of their own on start, the cameras must support `set_data_transfer_protocol`.
+    They are switched back to UDP on stop.
+    """
+
+    def __init__(self, cameras: Sequence[TOFcam], acquire: Optional[Callable[[TOFcam], Any]] = None,
+                 tolerance_s: float = 0.02, queue_size: int = 4, separate_data_channels: bool = True) -> None:
+        if not cameras:
+            raise ValueError("A camera group needs at least one camera")
+        if queue_size < 1:
+            raise ValueError(f"Invalid queue size: {queue_size}. Must be at least 1")
+        self.cameras = list(cameras)
+        self.acquire = acquire or _acquire_distance
+        self.tolerance_s = tolerance_s
+        self.queue_size = queue_size
+        self.separate_data_channels = separate_data_channels
+        self._condition = Condition()
+        self._stop_event = Event()
+        self._threads: list[Thread] = []
+        # cameras switched to TCP data transfer on start
+        self._tcp_cameras: list[int] = []
+        self._running: list[bool] = []
+        self._queues: list[deque[tuple[float, Any]]] = []
+        self._start_time = 0.0
+        self._stop_time: Optional[float] = None
+        self.reset_statistics()
+
+    def __enter__(self) -> 'CameraGroup':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def __iter__(self) -> Iterator[FrameBundle]:
+        """Yields the frame bundles until the group is stopped or a camera failed."""
+        while True:
+            try:
+                bundle = self.get()
+            except TimeoutError:
+                continue
+            except RuntimeError:
+                return
+            yield bundle
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def start(self) -> None:
+        """Start the acquisition of all cameras."""
+        if self._threads:
+            raise RuntimeError("Camera group is already running. Stop it first.")
+        if self.separate_data_channels:
+            self._separate_data_channels()
+        self._stop_event.clear()
+        self._queues = [deque() for _ in self.cameras]
+        self._running = [True] * len(self.cameras)
+        self.reset_statistics()
+        self._threads = [Thread(target=self._acquire_frames, args=(index,), name=f'CameraGroup-{index}', daemon=True)
+                         for index in range(len(self.cameras))]
+        log.info(f"Starting acquisition of {len(self.cameras)} cameras")
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout_s: float = 2) -> None:
+        """Stop the acquisition of all cameras and discard the queued frames."""
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout_s)
+        self._threads = []
+        with self._condition:
+            self._stop_time = time.monotonic()
+            self._queues = [deque() for _ in self.cameras]
+            self._running = [False] * len(self.cameras)
+            self._condition.notify_all()
+        self._restore_data_channels()
+
+    def is_running(self) -> bool:
+        """Returns True while all cameras are acquiring."""
+        with self._condition:
+            return bool(self._running) and all(self._running)
+
+    def get(self, timeout_s: float = 1) -> FrameBundle:
+        """Returns the next bundle of time-aligned frames, waiting at most timeout_s for it."""
+        deadline = time.monotonic() + timeout_s
+        with self._condition:
+            while True:
+                bundle = self._match()
+                if bundle is not None:
+                    return bundle
+                if not (self._running and all(self._running)):
+                    raise RuntimeError("Camera group is not running")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No frame bundle within {timeout_s}s")
+                self._condition.wait(remaining)
+
+    def reset_statistics(self) -> None:
+        with self._condition:
+            count = len(self.cameras)
+            self._start_time = time.monotonic()
+            self._stop_time = None
+            self._acquired = [0] * count
+            self._dropped = [0] * count
+            self._unmatched = [0] * count
+            self._errors = [0] * count
+            self._offset_sum = [0.0] * count
+            self._bundles = 0
+            self._skew_sum = 0.0
+            self._skew_max = 0.0
+
+    def statistics(self) -> dict:
+        """Returns the frame rate, the frame rate and mean timestamp offset to the bundle of every
+        camera and the mean and maximal skew of the bundles since the start."""
+        with self._condition:
+            elapsed = max((self._stop_time or time.monotonic()) - self._start_time, 1E-9)
+            bundles = self._bundles
+            cameras = [{'fps': self._acquired[index] / elapsed,
+                        'acquired': self._acquired[index],
+                        'dropped': self._dropped[index],
+                        'unmatched': self._unmatched[index],
+                        'errors': self._errors[index],
+                        'offset_ms': self._offset_sum[index] / bundles * 1E3 if bundles else 0.0}
+                       for index in range(len(self.cameras))]
+            return {'fps': bundles / elapsed,
+                    'bundles': bundles,
+                    'skew_mean_ms': self._skew_sum / bundles * 1E3 if bundles else 0.0,
+                    'skew_max_ms': self._skew_max * 1E3,
+                    'cameras': cameras}
+
+    def _separate_data_channels(self) -> None:
+        first_cameras = {}
+        for index, camera in enumerate(self.cameras):
+            rx_interface = getattr(camera, 'rxInterface', None)
+            if rx_interface is None or not hasattr(rx_interface, 'udpSocket'):
+                continue
+            if rx_interface.port not in first_cameras:
+                first_cameras[rx_interface.port] = index
+                continue
+            set_data_transfer_protocol = getattr(camera.device, 'set_data_transfer_protocol', None)
+            if set_data_transfer_protocol is None:
+                raise ValueError(f"Camera {index} receives UDP data on port {rx_interface.port} "
+                                 f"like camera {first_cameras[rx_interface.port]}, use distinct data ports")
+            log.info(f"Camera {index} shares UDP port {rx_interface.port}, switching it to TCP data transfer")
+            set_data_transfer_protocol('TCP')
+            self._tcp_cameras.append(index)
+
+    def _restore_data_channels(self) -> None:
+        for index in self._tcp_cameras:
+            try:
+                self.cameras[index].device.set_data_transfer_protocol('UDP')
+            except Exception as e:
+                log.warning(f"Failed to switch camera {index} back to UDP data transfer: {e}")
+        self._tcp_cameras = []
+
+    def _acquire_frames(self, index: int) -> None:
+        camera = self.cameras[index]
+        while not self._stop_event.is_set():
+            start = time.monotonic()
+            try:
+                frame = self.acquire(camera)
+            except TimeoutError:
+                continue
+            except OSError as e:
+                if not self._stop_event.is_set():
+                    log.error(f"Camera {index} failed, stopping its acquisition: {e}")
+                break
+            except Exception as e:
+                log.debug(f"Camera {index} failed to acquire a frame: {e}")
+                with self._condition:
+                    self._errors[index] += 1
+                continue
+            timestamp = (start + time.monotonic()) / 2
+            with self._condition:
+                queue = self._queues[index]
+                if len(queue) >= self.queue_size:
+                    queue.popleft()
+                    self._dropped[index] += 1
+                queue.append((timestamp, frame))
+                self._acquired[index] += 1
+                self._condition.notify_all()
+
+        with self._condition:
+            self._running[index] = False
+            self._condition.notify_all()
+
+    def _match(self) -> Optional[FrameBundle]:
+        queues = self._queues
+        while queues and all(queues):
+            pivot = max(queue[0][0] for queue in queues)
+            stale = False
+            for index, queue in enumerate(queues):
+                while queue and queue[0][0] < pivot - self.tolerance_s:
+                    queue.popleft()
+                    self._unmatched[index] += 1
+                    stale = True
+            if stale:
+                continue
+
+            frames, timestamps = [], []
+            for index, queue in enumerate(queues):
+                # the oldest frame is not after the pivot, take the newest one that is not
+                while len(queue) > 1 and queue[1][0] <= pivot:
+                    queue.popleft()
+                    self._unmatched[index] += 1
+                timestamp, frame = queue.popleft()
+                frames.append(frame)
+                timestamps.append(timestamp)
+
+            bundle = FrameBundle(frames, timestamps)
+            mean = bundle.timestamp
+            for index, timestamp in enumerate(timestamps):
+                self._offset_sum[index] += timestamp - mean
+            skew = bundle.skew_s
+            self._bundles += 1
+            self._skew_sum += skew
+            self._skew_max = max(self._skew_max, skew)
+            return bundle
+        return None
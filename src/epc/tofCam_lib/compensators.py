@@ -29,6 +29,10 @@ class FourthHarmonicCompensation():
         self.num_steps_calibrated = len(lut)
         self.unambiguity = unambiguity
 
+        # precomputed interpolation tables: lut values and the step to the next entry
+        self._lut_values = np.asarray(lut)
+        self._lut_steps = np.concatenate((np.diff(self._lut_values), np.zeros(1, dtype=self._lut_values.dtype)))
+
     @staticmethod
     def from_file(file: str):
         with h5py.File(file, 'r') as f:
@@ -40,25 +44,33 @@ class FourthHarmonicCompensation():
         return FourthHarmonicCompensation(dll_step_size, lut, unambiguity)
 
     def compensate(self, distances):
-        compensatedDistances = np.zeros(distances.shape)
-        for i in range(distances.shape[0]):
-            for j in range(distances.shape[1]):
-                index = distances[i, j] / self.dll_step_size
-                if (index < 0):  # distance is outside the calibrated range -> uses the nearest available value (maybe we should not compensate or make pixel invalid)
-                    compensatedDistances[i, j] = distances[i, j] - self.lut[0]
-                elif (index >= self.num_steps_calibrated-1):
-                    compensatedDistances[i, j] = distances[i, j] - self.lut[self.num_steps_calibrated-1]
-                else:
-                    lower_index = int(np.floor(index))
-                    upper_index = int(np.ceil(index))
-                    if lower_index == upper_index:
-                        compensatedDistances[i, j] = distances[i, j] - self.lut[lower_index]
-                    else:
-                        lower_value = self.lut[lower_index]
-                        upper_value = self.lut[upper_index]
-                        interpolation_factor = index - lower_index
-                        interpolated_value = lower_value + interpolation_factor * (upper_value - lower_value)
-                        compensatedDistances[i, j] = distances[i, j] - interpolated_value
+        """Compensate the fourth harmonic error by linear interpolation in the lut.
+
+        Args:
+            distances (np.ndarray): distance image (height, width) or a stack of images (N, height, width)
+
+        Returns:
+            np.ndarray: compensated distances as float64 of the same shape
+        """
+        distances = np.asarray(distances)
+        index = distances / self.dll_step_size
+        lower = np.floor(index)
+
+        # distances outside the calibrated range use the nearest available value
+        # (maybe we should not compensate or make pixel invalid)
+        below = index < 0
+        above = index >= self.num_steps_calibrated-1
+        lower_index = np.clip(np.nan_to_num(lower), 0, self.num_steps_calibrated-1).astype(np.intp)
+
+        lower_value = self._lut_values[lower_index]
+        interpolation_factor = index - lower
+        interpolated_value = lower_value + interpolation_factor * self._lut_steps[lower_index]
+
+        compensatedDistances = np.empty(distances.shape)
+        np.subtract(distances, interpolated_value, out=compensatedDistances, casting='unsafe')
+        np.copyto(compensatedDistances, distances - lower_value, where=(index == lower), casting='unsafe')
+        np.copyto(compensatedDistances, distances - self._lut_values[0], where=below, casting='unsafe')
+        np.copyto(compensatedDistances, distances - self._lut_values[-1], where=above, casting='unsafe')
         compensatedDistances %= self.unambiguity
         return compensatedDistances
 
@@ -1,11 +1,18 @@
 import struct
 from sys import platform
 import ctypes
+import functools
 import importlib.resources
 import numpy as np
 import zlib
 from enum import Enum
 
+# CRC-32 polynomial of the cameras and of zlib, which uses it bit reversed
+ZLIB_POLYNOM = 0x04C11DB7
+
+# every byte value with its bits in reverse order
+_REVERSED_BITS = np.array([int(f'{value:08b}'[::-1], 2) for value in range(256)], dtype=np.uint8)
+
 class CrcMode(Enum):
     CRC32_UINT8 = 1
     CRC32_UINT8_LIB = 2
@@ -13,6 +20,40 @@ class CrcMode(Enum):
     CRC32_IEEE = 4
 
 
+@functools.lru_cache(maxsize=None)
+def _crcTable(polynom: int) -> tuple[int, ...]:
+    """CRC register of every byte value shifted in MSB first, for byte-wise calculation"""
+    table = []
+    for value in range(256):
+        crc = value << 24
+        for _ in range(8):
+            if crc & 0x80000000:
+                crc = ((crc << 1) & 0xFFFFFFFF) ^ polynom
+            else:
+                crc = (crc << 1) & 0xFFFFFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+def _reverse32(value: int) -> int:
+    return int(f'{value:032b}'[::-1], 2)
+
+
+def _crc32Zlib(reversedData: np.ndarray, crc: int) -> int:
+    """MSB first CRC-32 with ZLIB_POLYNOM, calculated by zlib on the data with bit reversed bytes.
+
+    zlib processes the bits LSB first and inverts the register before and after.
+    """
+    reflected = zlib.crc32(reversedData.data, _reverse32(crc) ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return _reverse32(reflected)
+
+
+def _asBytes(data) -> np.ndarray:
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return np.frombuffer(data, dtype=np.uint8)
+    return np.asarray(data, dtype=np.uint8)
+
+
 class Crc:
     def __init__(self, mode: CrcMode = CrcMode.CRC32_UINT8,
                  polynom=0x04C11DB7,
@@ -25,8 +66,11 @@ class Crc:
         self.xorout = xorout
         self.mode = mode
 
+        self.useLib = False
         if mode == CrcMode.CRC32_UINT8_LIB:
             self.useLib = self.__loadLib()
+        # zlib calculates the CRC with the default polynomial, the register is not xored per byte
+        self.useZlib = polynom == ZLIB_POLYNOM and xorout == 0
 
     def __loadLib(self):
         try:
@@ -46,28 +90,32 @@ class Crc:
             print(e, 'no lib used')
             return False
 
-    def __calcCrc32_python(self, crc, data):
+    def __calcCrc32Uint8_python(self, data):
+        """Every byte is fed to the CRC as a 32 bit word, as the firmware does on the STM32 hardware CRC"""
+        if self.useZlib:
+            words = np.zeros((len(data), 4), dtype=np.uint8)
+            words[:, 3] = _REVERSED_BITS[_asBytes(data)]
+            return _crc32Zlib(words, self.initvalue)
 
-        if (self.mode == CrcMode.CRC32_STM32):
-            # this shift is done to make it compatible to the STM32 hardware CRC
-            crc = np.uint32(crc ^ np.uint32(data << 24))
-            bitRange = 8
-        else:
-            crc = crc ^ data
-            bitRange = 32
-
-        for _ in range(bitRange):
-            if crc & 0x80000000:
-                crc = ((crc << 1) & 0xFFFFFFFF) ^ self.polynom
-            else:
-                crc = (crc << 1) & 0xFFFFFFFF
+        table = _crcTable(self.polynom)
+        crc = self.initvalue
+        for byte in data:
+            crc ^= byte
+            for _ in range(4):
+                crc = ((crc << 8) & 0xFFFFFFFF) ^ table[crc >> 24]
+            crc ^= self.xorout
         return crc
 
-    def __calcCrc32Uin8_python(self, data: bytearray):
+    def __calcCrc32Stm32_python(self, data):
+        """Bytes shifted in MSB first, compatible to the byte-wise STM32 hardware CRC"""
+        if self.useZlib:
+            return _crc32Zlib(_REVERSED_BITS[_asBytes(data)], self.initvalue)
+
+        table = _crcTable(self.polynom)
         crc = self.initvalue
-        for i in range(len(data)):
-            crc = self.__calcCrc32_python(crc, data[i])
-            crc = crc ^ self.xorout
+        for byte in data:
+            crc = ((crc << 8) & 0xFFFFFFFF) ^ table[(crc >> 24) ^ byte]
+            crc ^= self.xorout
         return crc
 
     def __calcCrc32Uint8_lib(self, data: bytearray):
@@ -83,11 +131,13 @@ class Crc:
         crc = bytearray([])
         match self.mode:
             case CrcMode.CRC32_UINT8:
-                crc = self.__calcCrc32Uin8_python(data)
-            case CrcMode.CRC32_UINT8_LIB:
+                crc = self.__calcCrc32Uint8_python(data)
+            case CrcMode.CRC32_UINT8_LIB if self.useLib:
                 crc = self.__calcCrc32Uint8_lib(bytearray(data))
+            case CrcMode.CRC32_UINT8_LIB:
+                crc = self.__calcCrc32Uint8_python(data)
             case CrcMode.CRC32_STM32:
-                crc = self.__calcCrc32Uin8_python(data)
+                crc = self.__calcCrc32Stm32_python(data)
             case CrcMode.CRC32_IEEE:
                 crc = self.__calcCrc32_IEEE(data)
         
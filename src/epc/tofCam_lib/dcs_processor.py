@@ -0,0 +1,110 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from epc.tofCam_lib.algorithms import calc_unambiguity_distance
+
+MAX_DCS_VALUE = 64000
+LOW_AMPLITUDE = 64001
+ADC_OVERFLOW = 64002
+SATURATION = 64003
+
+
+class DcsProcessor:
+    """Calculates distance and amplitude images from DCS images.
+
+    The processor is created once for a given image shape and modulation frequency and
+    reuses its float32 work buffers for every call. The shape may have a leading batch
+    dimension, in which case a stack of DCS images (N, 4, height, width) is processed at once.
+
+    If `error_codes` is enabled, pixels with a DCS value of at least 64000 are invalid.
+    Their amplitude and distance are set to NaN, or to the error code 64002 (ADC overflow)
+    or 64003 (saturation) if one of the DCS images reports it. Pixels with an amplitude
+    at or below `min_amplitude` get the distance error code 64001 (low amplitude).
+    """
+
+    def __init__(self, shape: Tuple[int, ...], mod_freq_hz: float, min_amplitude: float = 0, error_codes: bool = True) -> None:
+        """
+        Args:
+            shape (Tuple[int, ...]): shape of the output images, (height, width) or (N, height, width)
+            mod_freq_hz (float): modulation frequency in Hz
+            min_amplitude (float, optional): minimal amplitude for a valid distance. Defaults to 0.
+            error_codes (bool, optional): handle the error codes of the camera. Defaults to True.
+        """
+        self.shape = tuple(shape)
+        self.dcs_shape = (*self.shape[:-2], 4, *self.shape[-2:])
+        self.mod_freq_hz = mod_freq_hz
+        self.min_amplitude = min_amplitude
+        self.error_codes = error_codes
+        self.unambiguity_mm = calc_unambiguity_distance(mod_freq_hz)
+
+        self._cx = np.empty(self.shape, dtype=np.float32)
+        self._cy = np.empty(self.shape, dtype=np.float32)
+        self._mask = np.empty(self.shape, dtype=bool)
+        self._max_dcs: Optional[np.ndarray] = None
+
+    def process(self, dcs: np.ndarray, offset_mm: Optional[float] = None,
+                out: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate the distance and amplitude from DCS images.
+
+        Args:
+            dcs (np.ndarray): DCS images of shape (4, height, width) or (N, 4, height, width)
+            offset_mm (Optional[float], optional): offset added to the distance, which is then
+                wrapped into the unambiguity range. Defaults to None (no offset, no wrapping).
+            out (Optional[Tuple[np.ndarray, np.ndarray]], optional): arrays of the output shape
+                to write the distance and amplitude to. New float32 arrays are allocated if not given.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: distance in mm, amplitude
+        """
+        dcs = np.asarray(dcs)
+        if dcs.shape != self.dcs_shape:
+            raise ValueError(f"dcs must have shape {self.dcs_shape}, got {dcs.shape}")
+        if out is None:
+            distance = np.empty(self.shape, dtype=np.float32)
+            amplitude = np.empty(self.shape, dtype=np.float32)
+        else:
+            distance, amplitude = out
+
+        cx, cy = self._cx, self._cy
+        np.subtract(dcs[..., 2, :, :], dcs[..., 0, :, :], out=cx, dtype=np.float32)
+        np.subtract(dcs[..., 3, :, :], dcs[..., 1, :, :], out=cy, dtype=np.float32)
+
+        np.hypot(cx, cy, out=amplitude)
+        amplitude *= 0.5
+
+        # shift phase to [0, 2*pi] and scale to the unambiguity range
+        np.arctan2(cy, cx, out=distance)
+        distance += np.pi
+        distance *= self.unambiguity_mm / (2 * np.pi)
+
+        if offset_mm is not None:
+            distance += offset_mm
+            np.remainder(distance, self.unambiguity_mm, out=distance)
+
+        if self.error_codes:
+            self._apply_error_codes(dcs, distance, amplitude)
+        return distance, amplitude
+
+    def _apply_error_codes(self, dcs: np.ndarray, distance: np.ndarray, amplitude: np.ndarray) -> None:
+        # a single pass over the dcs images finds the highest error code of every pixel
+        if self._max_dcs is None or self._max_dcs.dtype != dcs.dtype:
+            self._max_dcs = np.empty(self.shape, dtype=dcs.dtype)
+        max_dcs = self._max_dcs
+        np.max(dcs, axis=-3, out=max_dcs)
+        mask = self._mask
+
+        np.greater_equal(max_dcs, MAX_DCS_VALUE, out=mask)
+        has_invalid = bool(mask.any())
+        if has_invalid:
+            np.copyto(amplitude, np.nan, where=mask)
+            np.copyto(distance, np.nan, where=mask)
+
+        # keep the order, later codes take precedence
+        np.less_equal(amplitude, self.min_amplitude, out=mask)
+        np.copyto(distance, LOW_AMPLITUDE, where=mask)
+        if has_invalid:
+            for code in (ADC_OVERFLOW, SATURATION):
+                np.equal(max_dcs, code, out=mask)
+                np.copyto(amplitude, code, where=mask)
+                np.copyto(distance, code, where=mask)
@@ -0,0 +1,335 @@
+import logging
+import math
+import struct
+import sys
+import time
+from multiprocessing import parent_process, resource_tracker, shared_memory
+from threading import Event, Thread
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from epc.tofCam_lib.tofCam import TOFcam
+
+log = logging.getLogger('FrameBus')
+
+# room for a 660 DCS frame (4x240x320 int32) or a point cloud with amplitudes per slot
+DEFAULT_SLOT_BYTES = 2 * 1024**2
+DEFAULT_SLOTS = 8
+MAX_ARRAYS = 4
+MAX_DIMS = 4
+ALIGNMENT = 64
+
+_MAGIC = b'EPCF'
+_VERSION = 1
+# magic, version, slots, slot size, sequence number of the latest frame
+_BUS_HEADER = struct.Struct('<4sIQQQ')
+_LATEST_OFFSET = 24
+# sequence number, timestamp, roi, temperature, number of arrays
+_SLOT_HEADER = struct.Struct('<Qd4idI')
+# dtype, number of dimensions, shape, offset of the data in the slot
+_ARRAY_HEADER = struct.Struct(f'<8sI{MAX_DIMS}QQ')
+_SEQUENCE = struct.Struct('<Q')
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+_SLOT_DATA_OFFSET = _align(_SLOT_HEADER.size + MAX_ARRAYS * _ARRAY_HEADER.size)
+_DATA_OFFSET = _align(_BUS_HEADER.size)
+
+# segments created by this process, the resource tracker owns them
+_published_names: set[str] = set()
+
+
+def _camera_metadata(camera: TOFcam) -> tuple[Optional[Sequence[int]], Optional[float]]:
+    """ROI of the camera settings and the chip temperature of the last frame, if the camera provides them."""
+    roi = getattr(camera.settings, 'roi', None)
+    temperature = getattr(getattr(camera, 'frame', None), 'temperature', None)
+    return roi, temperature
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)  # type: ignore[call-arg]
+    shm = shared_memory.SharedMemory(name)
+    # before Python 3.13 attaching registers the segment with the resource tracker, which removes it
+    # when the process exits. Children of the publisher share its tracker and must keep the registration.
+    if name not in _published_names and parent_process() is None:
+        resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+    return shm
+
+
+def _acquire_distance(camera: TOFcam) -> Any:
+    return camera.get_distance_image()
+
+
+class SharedFrame:
+    """A frame of the frame bus, the arrays are views into the shared memory.
+
+    The publisher overwrites the slot of a frame after slots - 1 newer frames. Use `valid`
+    after processing the arrays to check the frame was not overwritten meanwhile, or
+    `copy` them if they are kept.
+    """
+    __slots__ = ('sequence', 'timestamp', 'roi', 'temperature', 'arrays', '_slot')
+
+    def __init__(self, sequence: int, timestamp: float, roi: Optional[tuple[int, int, int, int]],
+                 temperature: Optional[float], arrays: tuple[np.ndarray, ...], slot: memoryview) -> None:
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.roi = roi
+        self.temperature = temperature
+        self.arrays = arrays
+        self._slot = slot
+
+    @property
+    def data(self) -> np.ndarray | tuple[np.ndarray, ...]:
+        """The array of the frame, or the tuple of arrays if several were published"""
+        return self.arrays[0] if len(self.arrays) == 1 else self.arrays
+
+    def valid(self) -> bool:
+        """Returns False if the publisher started to overwrite the frame."""
+        sequence: int = _SEQUENCE.unpack_from(self._slot)[0]
+        return sequence == self.sequence
+
+    def copy(self) -> np.ndarray | tuple[np.ndarray, ...]:
+        """Copy of the data, which stays valid after the slot is overwritten"""
+        arrays = tuple(array.copy() for array in self.arrays)
+        if not self.valid():
+            raise BufferError(f"Frame {self.sequence} was overwritten while it was copied")
+        return arrays[0] if len(arrays) == 1 else arrays
+
+
+class FramePublisher:
+    """Publishes frames into a ring buffer in shared memory for consumers in other processes.
+
+    A frame is an array or a tuple of up to MAX_ARRAYS arrays (e.g. distance and amplitude),
+    published with a sequence number, timestamp (`time.time`), ROI and chip temperature.
+    The segment is created with the given name, or a random one, and removed on `close`.
+
+    `start` publishes the frames of a camera from a background thread, `acquire(camera)`
+    defaults to `get_distance_image`.
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = DEFAULT_SLOTS,
+                 slot_bytes: int = DEFAULT_SLOT_BYTES) -> None:
+        if slots < 2:
+            raise ValueError(f"Invalid number of slots: {slots}. Must be at least 2")
+        self.slots = slots
+        self.slot_bytes = _align(_SLOT_DATA_OFFSET + slot_bytes)
+        self._shm = shared_memory.SharedMemory(name, create=True, size=_DATA_OFFSET + slots * self.slot_bytes)
+        _published_names.add(self._shm.name)
+        self._buffer: Optional[memoryview] = self._shm.buf
+        self._sequence = 0
+        _BUS_HEADER.pack_into(self._open_buffer(), 0, _MAGIC, _VERSION, slots, self.slot_bytes, 0)
+        self._thread: Optional[Thread] = None
+        self._stop_event = Event()
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory segment, the subscribers attach to it"""
+        return self._shm.name
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest published frame, 0 before the first frame"""
+        return self._sequence
+
+    def __enter__(self) -> 'FramePublisher':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def publish(self, frame: np.ndarray | Sequence[np.ndarray], timestamp: Optional[float] = None,
+                roi: Optional[Sequence[int]] = None, temperature: Optional[float] = None) -> int:
+        """Write a frame into the next slot and return its sequence number."""
+        arrays = (frame,) if isinstance(frame, np.ndarray) else tuple(frame)
+        if not 0 < len(arrays) <= MAX_ARRAYS:
+            raise ValueError(f"A frame has 1 to {MAX_ARRAYS} arrays, got {len(arrays)}")
+        layout = []
+        offset = _SLOT_DATA_OFFSET
+        for array in arrays:
+            if array.ndim > MAX_DIMS or array.dtype.hasobject:
+                raise ValueError(f"Arrays of dtype {array.dtype} with {array.ndim} dimensions can not be published")
+            layout.append(offset)
+            offset = _align(offset + array.nbytes)
+        if offset > self.slot_bytes:
+            raise ValueError(f"Frame of {offset - _SLOT_DATA_OFFSET} bytes exceeds the slot size "
+                             f"of {self.slot_bytes - _SLOT_DATA_OFFSET} bytes")
+
+        buffer = self._open_buffer()
+        sequence = self._sequence + 1
+        start = _DATA_OFFSET + (sequence - 1) % self.slots * self.slot_bytes
+        slot = buffer[start:start + self.slot_bytes]
+        # invalidate the slot first, the readers of the old frame notice it is overwritten
+        _SEQUENCE.pack_into(slot, 0, 0)
+        for index, (array, array_offset) in enumerate(zip(arrays, layout)):
+            np.ndarray(array.shape, array.dtype, slot, array_offset)[...] = array
+            shape = tuple(array.shape) + (0,) * (MAX_DIMS - array.ndim)
+            _ARRAY_HEADER.pack_into(slot, _SLOT_HEADER.size + index * _ARRAY_HEADER.size,
+                                    array.dtype.str.encode(), array.ndim, *shape, array_offset)
+        _SLOT_HEADER.pack_into(slot, 0, 0, time.time() if timestamp is None else timestamp,
+                               *(roi if roi is not None else (-1, -1, -1, -1)),
+                               math.nan if temperature is None else temperature, len(arrays))
+        # committing the sequence number last publishes the slot
+        _SEQUENCE.pack_into(slot, 0, sequence)
+        _SEQUENCE.pack_into(buffer, _LATEST_OFFSET, sequence)
+        slot.release()
+        self._sequence = sequence
+        return sequence
+
+    def start(self, camera: TOFcam, acquire: Optional[Callable[[TOFcam], Any]] = None) -> None:
+        """Publish the frames of a camera from a background thread until `stop` is called."""
+        if self._thread is not None:
+            raise RuntimeError("Publisher is already running. Stop it first.")
+        self._stop_event.clear()
+        self._thread = Thread(target=self._publish_frames, args=(camera, acquire or _acquire_distance),
+                              name='FramePublisher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 2) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop publishing and remove the shared memory segment."""
+        self.stop()
+        if self._buffer is None:
+            return
+        self._buffer = None
+        name = self._shm.name
+        self._shm.close()
+        self._shm.unlink()
+        _published_names.discard(name)
+
+    def _open_buffer(self) -> memoryview:
+        if self._buffer is None:
+            raise ValueError("Publisher is closed")
+        return self._buffer
+
+    def _publish_frames(self, camera: TOFcam, acquire: Callable[[TOFcam], Any]) -> None:
+        while not self._stop_event.is_set():
+            try:
+                frame = acquire(camera)
+            except TimeoutError:
+                continue
+            except OSError as e:
+                if not self._stop_event.is_set():
+                    log.error(f"Camera failed, stopping to publish: {e}")
+                break
+            except Exception as e:
+                log.debug(f"Failed to acquire a frame: {e}")
+                continue
+            roi, temperature = _camera_metadata(camera)
+            self.publish(frame, roi=roi, temperature=temperature)
+
+
+class FrameSubscriber:
+    """Reads the frames of a `FramePublisher` of any process without copying them.
+
+    `latest` returns the newest frame, `next` and the iterator every frame after the
+    previously read one. Frames overwritten before they were read are skipped and counted
+    in `frames_missed`. New frames are detected by polling every poll_interval_s.
+    """
+
+    def __init__(self, name: str, poll_interval_s: float = 0.001) -> None:
+        self._shm = _attach(name)
+        self._buffer: Optional[memoryview] = self._shm.buf
+        magic, version, self.slots, self.slot_bytes, _ = _BUS_HEADER.unpack_from(self._open_buffer())
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"Shared memory {name} is not a frame bus of version {_VERSION}")
+        self.poll_interval_s = poll_interval_s
+        self.frames_missed = 0
+        self._last_sequence = self._latest_sequence()
+
+    def __enter__(self) -> 'FrameSubscriber':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[SharedFrame]:
+        while True:
+            try:
+                yield self.next()
+            except TimeoutError:
+                continue
+
+    def close(self) -> None:
+        if self._buffer is None:
+            return
+        self._buffer = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # frames handed out still reference the segment, it is released with them
+            log.debug("Shared frames still in use, the segment stays mapped")
+
+    def latest(self) -> Optional[SharedFrame]:
+        """Returns the newest frame, None before the first frame."""
+        while True:
+            sequence = self._latest_sequence()
+            if sequence == 0:
+                return None
+            frame = self._read(sequence)
+            if frame is not None:
+                self._last_sequence = max(self._last_sequence, sequence)
+                return frame
+
+    def next(self, timeout_s: float = 1) -> SharedFrame:
+        """Returns the frame after the previously read one, waiting at most timeout_s for it."""
+        deadline = time.monotonic() + timeout_s
+        while True:
+            latest = self._latest_sequence()
+            if latest > self._last_sequence:
+                sequence = self._last_sequence + 1
+                oldest = latest - self.slots + 2
+                if sequence < oldest:
+                    # leave a slot margin, the publisher may be writing the oldest slot
+                    self.frames_missed += oldest - sequence
+                    sequence = oldest
+                frame = self._read(sequence)
+                if frame is not None:
+                    self._last_sequence = sequence
+                    return frame
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No frame published within {timeout_s}s")
+            time.sleep(self.poll_interval_s)
+
+    def _open_buffer(self) -> memoryview:
+        if self._buffer is None:
+            raise ValueError("Subscriber is closed")
+        return self._buffer
+
+    def _latest_sequence(self) -> int:
+        sequence: int = _SEQUENCE.unpack_from(self._open_buffer(), _LATEST_OFFSET)[0]
+        return sequence
+
+    def _read(self, sequence: int) -> Optional[SharedFrame]:
+        start = _DATA_OFFSET + (sequence - 1) % self.slots * self.slot_bytes
+        slot = self._open_buffer()[start:start + self.slot_bytes]
+        if _SEQUENCE.unpack_from(slot)[0] != sequence:
+            # overwritten or not yet committed
+            return None
+        try:
+            _, timestamp, x1, y1, x2, y2, temperature, count = _SLOT_HEADER.unpack_from(slot)
+            arrays = []
+            for index in range(count):
+                dtype, ndim, *shape, offset = _ARRAY_HEADER.unpack_from(
+                    slot, _SLOT_HEADER.size + index * _ARRAY_HEADER.size)
+                array = np.ndarray(tuple(shape[:ndim]), np.dtype(dtype.rstrip(b'\0').decode()), slot, offset)
+                array.flags.writeable = False
+                arrays.append(array)
+        except (TypeError, ValueError):
+            # the header was overwritten while it was read
+            return None
+        if _SEQUENCE.unpack_from(slot)[0] != sequence:
+            return None
+        return SharedFrame(sequence, timestamp, None if x1 < 0 else (x1, y1, x2, y2),
+                           None if math.isnan(temperature) else temperature, tuple(arrays), slot)
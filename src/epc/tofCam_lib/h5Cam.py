@@ -1,7 +1,10 @@
 import logging
 import os
+import queue
+import threading
 import time
 from abc import ABC
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
@@ -19,22 +22,95 @@ class ReadOnlyError(ValueError):
     pass
 
 
+# timestamp and frame of a record
+_Frame = Tuple[float, np.ndarray | Tuple[np.ndarray]]
+
+
+class _Prefetcher:
+    """Reads the following frames of a record in a background thread, in continuous playback order"""
+
+    def __init__(self, record: "_H5Base", start: int, frames: int) -> None:
+        self._record = record
+        self._queue: queue.Queue[Tuple[int, _Frame | Exception]] = queue.Queue(maxsize=frames)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(start,), name="H5Prefetcher", daemon=True)
+        self._thread.start()
+
+    def get(self, index: int, timeout_s: float = 5) -> Optional[_Frame]:
+        """Get the prefetched frame, None if the next prefetched frame is not the requested index"""
+        _deadline = time.monotonic() + timeout_s
+        while not self._stop_event.is_set():
+            try:
+                _index, _out = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if time.monotonic() > _deadline:
+                    return None
+                continue
+            if _index != index:
+                return None
+            if isinstance(_out, Exception):
+                raise _out
+            return _out
+        return None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        while self._thread.is_alive():
+            # unblock a pending put
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(0.1)
+
+    def _run(self, index: int) -> None:
+        while not self._stop_event.is_set():
+            try:
+                _item: Tuple[int, _Frame | Exception] = (index, self._record[index])
+            except Exception as e:
+                _item = (index, e)
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(_item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            index = index + 1 if index < len(self._record) - 1 else 0
+
+
 class _H5Base:
-    def __init__(self, source: Path | str, group: Optional[str] = None, continuous: bool = False) -> None:
+    def __init__(self, source: Path | str, group: Optional[str] = None, continuous: bool = False,
+                 cache_size: int = 16, read_ahead: int = 8, prefetch_frames: int = 0) -> None:
         """
 
         Args:
             source (Path | str): The `*.h5` file path
             group (Optional[str], optional): The group name that stores the attributes and frames. Defaults to None.
+            cache_size (int, optional): Number of frames kept in memory. Defaults to 16.
+            read_ahead (int, optional): Number of frames read at once during sequential playback. Defaults to 8.
+            prefetch_frames (int, optional): Number of frames read in advance by a background thread
+                during continuous playback, 0 to disable. Defaults to 0.
         """
 
         self.__continuous = continuous
         self._extension = ".h5"
         self.source = source  # type: ignore
         self._attributes: Optional[Dict[str, Any]] = None
-        self._recordings: Dict[int, Tuple[float, np.ndarray | Tuple[np.ndarray]]] = {}
         self.group = group
 
+        # Frames are read on demand from the open file
+        self._file: Optional[h5py.File] = None
+        self._frame_datasets: Tuple[h5py.Dataset, ...] = ()
+        self._length: Optional[int] = None
+        self._cache: OrderedDict[int, Tuple[float, np.ndarray | Tuple[np.ndarray]]] = OrderedDict()
+        self._cache_size = max(1, cache_size)
+        self._read_ahead = max(1, read_ahead)
+        self._last_read: Optional[int] = None
+        self._lock = threading.RLock()
+        self._prefetch_frames = max(0, prefetch_frames)
+        self._prefetcher: Optional[_Prefetcher] = None
+
         # State params
         self.index = 0
         self._tic = time.time()
@@ -52,6 +128,13 @@ class _H5Base:
     def enable_continous(self, val: bool) -> None:
         """Enable/Disable continuous streaming"""
         self.__continuous = val
+        if not val:
+            self._stop_prefetching()
+
+    def enable_prefetch(self, frames: int) -> None:
+        """Read the next frames in a background thread during continuous streaming, 0 to disable"""
+        self._stop_prefetching()
+        self._prefetch_frames = max(0, frames)
 
     @property
     def image_type(self) -> str:
@@ -61,36 +144,66 @@ class _H5Base:
 
     def __len__(self) -> int:
         """Get the record length in number of frames"""
-        if len(self._recordings) == 0:
-            self.__getitem__(0)
-        return len(self._recordings)
+        if self._length is None:
+            self._open()
+        assert self._length is not None
+        return self._length
 
     def __getitem__(self, index: int) -> Tuple[float, np.ndarray | Tuple[np.ndarray]]:
         """Read the timestamp and frame from the source"""
 
-        if len(self._recordings) == 0:
-            _frame_keys = []
-            with h5py.File(self.source, "r") as f:
-
-                if self.group is not None:
-                    group = f[self.group]
-                else:
-                    group = f
-                _timestamps = group["timestamps"][:]
-                _frame_keys = [_key for _key in group.keys() if "frame" in _key]
-                _frames: Tuple[np.ndarray] = tuple([group[_key][:] for _key in _frame_keys])
-
-                _recordings = {_i: (float(_ts), *_frs) for _i, (_ts, *_frs) in enumerate(
-                    zip(_timestamps, *_frames))}
-
-            self._recordings = _recordings
-            self.__timestamps = _timestamps
-
-        if index > len(self._recordings):
+        if index >= len(self):
             raise StopIteration(
-                f"Record length exceeded! {index} > {len(self._recordings)}")
+                f"Record length exceeded! {index} >= {len(self)}")
 
-        return self._recordings[index]
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+            else:
+                # read a block of frames if the record is played sequentially
+                count = min(self._read_ahead, self._cache_size) if self._last_read == index - 1 else 1
+                self._read_frames(index, min(index + count, len(self)))
+            self._last_read = index
+            return self._cache[index]
+
+    def close(self) -> None:
+        """Close the source file and drop the cached frames"""
+        self._stop_prefetching()
+        with self._lock:
+            self._cache.clear()
+            self._frame_datasets = ()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self) -> None:
+        """Open the source and read the timestamps and the shapes of the frame datasets"""
+        with self._lock:
+            if self._file is None:
+                self._open_file()
+
+    def _open_file(self) -> None:
+        self._file = h5py.File(self.source, "r")
+        if self.group is not None:
+            group = self._file[self.group]
+        else:
+            group = self._file
+        _frame_keys = [_key for _key in group.keys() if "frame" in _key]
+        self._frame_datasets = tuple(group[_key] for _key in _frame_keys)
+        _timestamps = group["timestamps"][:]
+        self._length = min([len(_timestamps), *(len(_ds) for _ds in self._frame_datasets)])
+        self.__timestamps = _timestamps
+
+    def _read_frames(self, start: int, stop: int) -> None:
+        """Read the frames [start, stop) with one read per dataset and add them to the cache"""
+        if self._file is None:
+            self._open_file()
+        _frames = [_ds[start:stop] for _ds in self._frame_datasets]
+        for _i, _index in enumerate(range(start, stop)):
+            self._cache[_index] = (float(self.timestamps[_index]), *(_frs[_i] for _frs in _frames))
+            self._cache.move_to_end(_index)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
 
     @property
     def source(self) -> Path:
@@ -161,18 +274,40 @@ class _H5Base:
         """
 
         self._simulate_shutter_delay()
-        _out = self.__getitem__(self.index)
+        _out = None
+        if self.__continuous and self._prefetch_frames > 0:
+            _prefetcher = self._prefetcher
+            if _prefetcher is not None:
+                _out = _prefetcher.get(self.index)
+            if _out is None:
+                # the index was changed or the prefetcher is not running yet
+                self._stop_prefetching()
+                _out = self.__getitem__(self.index)
+                if self.__continuous:
+                    self._prefetcher = _Prefetcher(self, self._next_index(), self._prefetch_frames)
+        else:
+            _out = self.__getitem__(self.index)
         if self.__continuous:
             self._increment_index()
         return _out
 
+    def _stop_prefetching(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+
     def _simulate_shutter_delay(self) -> None:
         """Sleep for at most t_wait time if the time passed is not enough"""
-        _toc = time.time()
-        _sleep_time = max(self.t_wait - (_toc-self._tic), 0)
+        _deadline = self._tic + self.t_wait
+        _sleep_time = max(_deadline - time.time(), 0)
         logger.debug(f"Sleeping for {_sleep_time:3.2f} seconds..")
         QThread.msleep(int(_sleep_time*1000))
-        self._tic = time.time()
+        # schedule relative to the previous frame, so sleep overshoots do not accumulate
+        self._tic = _deadline if _sleep_time > 0 else time.time()
+
+    def _next_index(self) -> int:
+        """The index following the current one in continuous playback"""
+        return self.index + 1 if self.index < len(self) - 1 else 0
 
     def _increment_index(self) -> None:
         """Inrement the index by 1 and update the previous timestep"""
@@ -201,7 +336,7 @@ class _H5Base:
     def timestamps(self) -> np.ndarray:
         """The timeline of the record"""
         if self.__timestamps is None:
-            self.__getitem__(0)
+            self._open()
         if self.__timestamps is not None:
             return self.__timestamps
         else:
@@ -329,7 +464,7 @@ class H5Dev_Infos_Controller(ABC, _H5Base, Dev_Infos_Controller):
 class H5Cam(_H5Base, TOFcam, QObject):
     indexChanged = Signal(int)
 
-    def __init__(self, source: str | Path, continuous: bool = True, settings_ctrl: Optional[H5_Settings_Controller] = None, info_ctrl: Optional[H5Dev_Infos_Controller] = None) -> None:
+    def __init__(self, source: str | Path, continuous: bool = True, settings_ctrl: Optional[H5_Settings_Controller] = None, info_ctrl: Optional[H5Dev_Infos_Controller] = None, prefetch_frames: int = 0) -> None:
 
         QObject.__init__(self, parent=None)
 
@@ -339,7 +474,8 @@ class H5Cam(_H5Base, TOFcam, QObject):
         if info_ctrl is None:
             info_ctrl = H5Dev_Infos_Controller(source=source)
 
-        _H5Base.__init__(self, source=source, group=None, continuous=continuous)
+        _H5Base.__init__(self, source=source, group=None, continuous=continuous,
+                         prefetch_frames=prefetch_frames)
 
         if self.source != settings_ctrl.source:
             raise ValueError(
@@ -365,7 +501,8 @@ class H5Cam(_H5Base, TOFcam, QObject):
         self.indexChanged.emit(val)
 
     def __del__(self) -> None:
-        pass
+        if hasattr(self, "_file"):
+            self.close()
 
     def initialize(self) -> None:
         pass
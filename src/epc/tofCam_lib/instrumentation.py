@@ -0,0 +1,113 @@
+import logging
+import time
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+# number of latest samples per stage the percentiles are calculated from
+DEFAULT_WINDOW = 1024
+
+
+class RollingHistogram:
+    """Keeps the latest durations of a stage in a ring buffer for percentile statistics."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self._samples = np.zeros(window, dtype=np.int64)
+        self._index = 0
+        self.count = 0
+        self.total_ns = 0
+
+    def add(self, duration_ns: int) -> None:
+        self._samples[self._index] = duration_ns
+        self._index = (self._index + 1) % len(self._samples)
+        self.count += 1
+        self.total_ns += duration_ns
+
+    def summary(self) -> dict:
+        """Returns the count over all samples and p50/p95/p99/max in ms of the latest window."""
+        samples = self._samples[:min(self.count, len(self._samples))]
+        if samples.size == 0:
+            return {'count': 0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99)) / 1E6
+        return {'count': self.count,
+                'mean_ms': self.total_ns / self.count / 1E6,
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(samples.max()) / 1E6}
+
+
+class Instrumentation:
+    """Opt-in latency and event statistics of the stages of an acquisition pipeline.
+
+    The stages measure themselves with `time.perf_counter_ns` and report the duration with
+    `record`; events like retries are added with `count`. Both return immediately while the
+    instrumentation is disabled, the callers check `enabled` before taking timestamps.
+
+    If a log interval is set, a summary of all stages is logged at most once per interval,
+    on the next recorded sample.
+    """
+
+    def __init__(self, name: str = 'Instrumentation', window: int = DEFAULT_WINDOW) -> None:
+        self.enabled = False
+        self.window = window
+        self.log_interval_s: Optional[float] = None
+        self._log = logging.getLogger(name)
+        self._lock = Lock()
+        self._stages: dict[str, RollingHistogram] = {}
+        self._counters: dict[str, int] = {}
+        self._log_interval_ns = 0
+        self._next_log_ns = 0
+
+    def enable(self, enable: bool = True, log_interval_s: Optional[float] = None) -> None:
+        """Enable or disable the instrumentation and optionally log a summary every log_interval_s."""
+        self.log_interval_s = log_interval_s
+        self._log_interval_ns = int(log_interval_s * 1E9) if log_interval_s else 0
+        self._next_log_ns = time.perf_counter_ns() + self._log_interval_ns if self._log_interval_ns else 0
+        self.enabled = enable
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def record(self, stage: str, duration_ns: int) -> None:
+        """Add the duration of one pass through a stage."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = RollingHistogram(self.window)
+            histogram.add(duration_ns)
+        if self._next_log_ns and time.perf_counter_ns() >= self._next_log_ns:
+            self._next_log_ns = time.perf_counter_ns() + self._log_interval_ns
+            self._log.info(self.summary())
+
+    def record_since(self, stage: str, start_ns: int) -> int:
+        """Record the time since start_ns and return the current time, the start of the next stage."""
+        now = time.perf_counter_ns()
+        self.record(stage, now - start_ns)
+        return now
+
+    def count(self, counter: str, n: int = 1) -> None:
+        """Increment an event counter, e.g. of retries."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def stats(self) -> dict:
+        """Returns the latency statistics of every stage and the event counters."""
+        with self._lock:
+            return {'stages': {stage: histogram.summary() for stage, histogram in self._stages.items()},
+                    'counters': dict(self._counters)}
+
+    def summary(self) -> str:
+        """One line summary of the median and p99 latency of every stage and the counters."""
+        stats = self.stats()
+        parts = [f"{stage}: p50 {s['p50_ms']:.2f} ms, p99 {s['p99_ms']:.2f} ms"
+                 for stage, s in stats['stages'].items() if s['count']]
+        parts += [f"{counter}: {value}" for counter, value in stats['counters'].items()]
+        return ' | '.join(parts)
@@ -0,0 +1,88 @@
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
+from epc.tofCam_lib.projection_models import (PinholeCameraProjector,
+                                              RadialCameraProjector)
+
+
+class PointCloudBuilder:
+    """Builds point clouds from depth images with precomputed float32 lens matrices.
+
+    The lens matrix slice of the ROI is flipped and scaled from mm to m once and kept
+    until the projector, the image shape or the ROI changes. A frame then needs a single
+    multiplication into the output buffer, without float64 temporaries and without
+    flipping the depth image.
+    """
+
+    def __init__(self, flip: Optional[Literal['ud', 'lr']] = None, scale: float = 1E-3) -> None:
+        """
+        Args:
+            flip (Optional[Literal['ud', 'lr']], optional): flip of the lens matrix relative
+                to the depth image, up-down or left-right. Defaults to None.
+            scale (float, optional): scale of the points, mm to m by default. Defaults to 1E-3.
+        """
+        self.flip = flip
+        self.scale = scale
+        self._lens_matrix: Optional[np.ndarray] = None
+        self._source: Optional[np.ndarray] = None
+        self._key: Optional[tuple] = None
+
+    def build(self, projector: RadialCameraProjector | PinholeCameraProjector, depth: np.ndarray,
+              max_depth: float, roi_x: int = 0, roi_y: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Project a depth image to a point cloud, points with a depth >= max_depth are NaN.
+
+        Args:
+            projector (RadialCameraProjector | PinholeCameraProjector): the lens projection of the camera
+            depth (np.ndarray): depth image in mm
+            max_depth (float): first invalid depth value, e.g. the lowest error code
+            roi_x (int, optional): Region of interest x-coordinate. Defaults to 0.
+            roi_y (int, optional): Region of interest y-coordinate. Defaults to 0.
+            out (Optional[np.ndarray], optional): float32 buffer of shape (3, N) to write the
+                points to. A new buffer is allocated if not given.
+
+        Returns:
+            np.ndarray: points of shape (3, N) in the order of the depth image
+        """
+        lens_matrix = self._get_lens_matrix(projector, depth.shape, roi_x, roi_y)
+        if out is None:
+            out = np.empty((3, depth.size), dtype=np.float32)
+        points = out.reshape(3, *depth.shape)
+        np.multiply(lens_matrix, depth, out=points, casting='unsafe')
+        np.copyto(points, np.float32(np.nan), where=depth >= max_depth)
+        return out
+
+    def build_valid(self, projector: RadialCameraProjector | PinholeCameraProjector, depth: np.ndarray,
+                    amplitude: np.ndarray, max_depth: float, roi_x: int = 0, roi_y: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Project only the valid pixels of a depth image, with a depth < max_depth.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: points of shape (3, M) and the M amplitudes of the valid pixels
+        """
+        lens_matrix = self._get_lens_matrix(projector, depth.shape, roi_x, roi_y)
+        valid = depth < max_depth
+        points = lens_matrix[:, valid]
+        points *= depth[valid]
+        return points, amplitude[valid]
+
+    def _get_lens_matrix(self, projector: RadialCameraProjector | PinholeCameraProjector,
+                         shape: Tuple[int, ...], roi_x: int, roi_y: int) -> np.ndarray:
+        full_matrix = projector._lens_matrix
+        key = (shape, roi_x, roi_y)
+        if self._source is full_matrix and self._key == key and self._lens_matrix is not None:
+            return self._lens_matrix
+
+        roi_height, roi_width = shape
+        height, width = full_matrix.shape[1:3]
+        assert roi_x >= 0 and roi_y >= 0 and \
+            roi_x + roi_width <= width and roi_y + roi_height <= height, \
+            "ROI exceeds image dimensions"
+        lens_matrix = full_matrix[:, roi_y:roi_y + roi_height, roi_x:roi_x + roi_width]
+        if self.flip == 'ud':
+            lens_matrix = lens_matrix[:, ::-1, :]
+        elif self.flip == 'lr':
+            lens_matrix = lens_matrix[:, :, ::-1]
+        self._lens_matrix = np.multiply(lens_matrix, self.scale, dtype=np.float32)
+        self._source = full_matrix
+        self._key = key
+        return self._lens_matrix
@@ -1,5 +1,6 @@
 import numpy as np
 from typing import Tuple
+import functools
 import importlib.resources
 import logging
 
@@ -15,6 +16,36 @@ lens_type_map = {
 }
 
 DEFAULT_PIXEL_SIZE_MM = 0.02
+# Number of lens matrices shared between all projectors of the process
+LENS_MATRIX_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=None)
+def _load_lens_table(lensType: str) -> Tuple[np.ndarray, np.ndarray]:
+    """ Read the lens calibration table of a lens type once.
+
+    Args:
+        lensType (str): Description of the lens type, one of `lens_type_map`
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: read-only angles in degrees and radial distances in mm
+    """
+    file_path = lens_type_map.get(lensType)
+    if file_path is None:
+        raise KeyError(f"Invalid lensType '{lensType}'")
+    angle, rp = np.loadtxt(str(file_path), delimiter=',', skiprows=1).T
+    angle.setflags(write=False)
+    rp.setflags(write=False)
+    return angle, rp
+
+
+@functools.lru_cache(maxsize=LENS_MATRIX_CACHE_SIZE)
+def _lens_calibration_matrix(lensType: str, width: int, height: int, pixel_size_mm: float, dtype: str) -> np.ndarray:
+    """ Compute the read-only lens matrix of a lens type, shared by all projectors with the same parameters."""
+    angle, rp = _load_lens_table(lensType)
+    lens_matrix = _radial_lens_matrix(rp, angle, width, height, pixel_size_mm).astype(dtype, copy=False)
+    lens_matrix.setflags(write=False)
+    return lens_matrix
 
 
 def _project_points(lens_matrix: np.ndarray, depth: np.ndarray, roi_x=0, roi_y=0) -> np.ndarray:
@@ -39,6 +70,40 @@ def _project_points(lens_matrix: np.ndarray, depth: np.ndarray, roi_x=0, roi_y=0
     return points
 
 
+def _radial_lens_matrix(rp: np.ndarray, angle: np.ndarray, width: int, height: int, pixel_size_mm: float) -> np.ndarray:
+    """ Compute the unit direction of every pixel for the radial camera model.
+
+    Args:
+        rp (np.ndarray): array of radial distances in mm
+        angle (np.ndarray): array of angles in degrees corresponding to the radial distances
+        width (int): Width of the image in pixels.
+        height (int): Height of the image in pixels.
+        pixel_size_mm (float): Size of a pixel in millimeters.
+
+    Returns:
+        np.ndarray: lens matrix of shape (3, height, width)
+    """
+    row, col = _create_pixel_field_indices(
+        height, width, pixel_size_mm
+    )
+
+    radius = np.sqrt(row**2 + col**2)
+
+    # Interpolate angle for each radius
+    angle_deg = np.interp(radius, rp, angle)
+    angle_rad = np.deg2rad(angle_deg)
+    rUA = np.sin(angle_rad)
+
+    # Avoid division by zero
+    rr_safe = np.where(radius == 0, 1, radius)
+
+    lens_matrix = np.zeros((3, height, width))
+    lens_matrix[0] = row * rUA / rr_safe
+    lens_matrix[1] = col * rUA / rr_safe
+    lens_matrix[2] = np.cos(angle_rad)
+    return lens_matrix
+
+
 def _create_pixel_field_indices(height: int, width: int, pixel_size_mm: float) -> Tuple[np.ndarray, np.ndarray]:
     """ Create pixel field indices for the camera projection.
 
@@ -101,42 +166,33 @@ class RadialCameraProjector:
             width (int): _width of the image in pixels_
             height (int): _height of the image in pixels_
         """
-        row, col = _create_pixel_field_indices(
-            height, width, pixel_size_mm
-        )
-
-        radius = np.sqrt(row**2 + col**2)
+        self._lens_matrix: np.ndarray = _radial_lens_matrix(rp, angle, width, height, pixel_size_mm)
 
-        # Interpolate angle for each radius
-        angle_deg = np.interp(radius, rp, angle)
-        angle_rad = np.deg2rad(angle_deg)
-        rUA = np.sin(angle_rad)
-
-        # Avoid division by zero
-        rr_safe = np.where(radius == 0, 1, radius)
-
-        self._lens_matrix: np.ndarray = np.zeros((3, height, width))
-        self._lens_matrix[0] = row * rUA / rr_safe
-        self._lens_matrix[1] = col * rUA / rr_safe
-        self._lens_matrix[2] = np.cos(angle_rad)
+    @classmethod
+    def _from_lens_matrix(cls, lens_matrix: np.ndarray) -> 'RadialCameraProjector':
+        projector = cls.__new__(cls)
+        projector._lens_matrix = lens_matrix
+        return projector
 
     @staticmethod
-    def from_lens_calibration(lensType: str, width: int, height: int) -> 'RadialCameraProjector':
+    def from_lens_calibration(lensType: str, width: int, height: int, dtype=np.float64) -> 'RadialCameraProjector':
         """ Create a RadialCameraProjector from a known lens type.
 
+        The lens tables and the resulting lens matrices are cached, projectors with the same
+        lens type, resolution and dtype share one read-only lens matrix.
+
         Args:
             lensType (str): _Description of the lens type, e.g., 'Narrow Field', 'Standard Field', 'Wide Field', 'Wide Wide Field', 'Ultra Wide Field'_
             width (int): _width of the image in pixels_
             height (int): _height of the image in pixels_
+            dtype (optional): dtype of the lens matrix, e.g. np.float32 to halve its size. Defaults to np.float64.
 
         Returns:
             RadialCameraProjector: An instance of RadialCameraProjector initialized with the lens calibration data.
         """
-        file_path = lens_type_map.get(lensType)
-        if file_path is None:
-            raise KeyError(f"Invalid lensType '{lensType}'")
-        angle, rp = np.loadtxt(str(file_path), delimiter=',', skiprows=1).T
-        return RadialCameraProjector(rp, angle, width, height)
+        lens_matrix = _lens_calibration_matrix(
+            lensType, int(width), int(height), DEFAULT_PIXEL_SIZE_MM, np.dtype(dtype).name)
+        return RadialCameraProjector._from_lens_matrix(lens_matrix)
 
     @staticmethod
     def from_radial_coefficients(coeffs: np.ndarray, width: int, height: int, pixel_size_mm=DEFAULT_PIXEL_SIZE_MM):
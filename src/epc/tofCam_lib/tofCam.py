@@ -1,9 +1,36 @@
 import atexit
+from typing import Any, Callable
 
 
 class TOF_Settings_Controller:
     def __init__(self) -> None:
-        pass
+        # last value sent per setting, a setter is not sent again while its value is unchanged
+        self._applied: dict[Any, Any] = {}
+
+    def invalidate(self, *settings) -> None:
+        """Forget the values applied to the camera, so that the next call of every setter is sent.
+
+        Call this after the camera was reset or power cycled or its settings were changed by
+        other means, e.g. by writing registers. Only the given settings are forgotten if any.
+        """
+        if not settings:
+            self._applied.clear()
+        for setting in settings:
+            self._applied.pop(setting, None)
+
+    def _apply_setting(self, setting, value, send: Callable[[], Any]) -> bool:
+        """Call send unless value is the last value applied to setting.
+
+        Returns:
+            bool: True if the setting was sent
+        """
+        if setting in self._applied and self._applied[setting] == value:
+            return False
+        # the state of the camera is unknown if sending fails
+        self._applied.pop(setting, None)
+        send()
+        self._applied[setting] = value
+        return True
 
     def set_modulation(self, frequency_mhz: float, channel: int = 0):
         raise NotImplementedError(
@@ -103,3 +130,7 @@ class TOFcam:
     def get_point_cloud(self):
         raise NotImplementedError(
             f"{self.__class__.__name__} has not implemented 'get_point_cloud' jet")
+
+    def stats(self):
+        raise NotImplementedError(
+            f"{self.__class__.__name__} has not implemented 'stats' jet")
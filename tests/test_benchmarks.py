@@ -0,0 +1,30 @@
+import json
+
+from benchmarks.__main__ import main
+from benchmarks.cases import all_benchmarks
+from benchmarks.runner import compare
+
+
+def _results(median_s: float, peak_memory_bytes: int) -> dict:
+    return {'results': [{'id': 'filter/edgeFilter[resolution=tofCam660,dtype=float32]',
+                         'median_s': median_s, 'peak_memory_bytes': peak_memory_bytes}]}
+
+
+def test_benchmark_ids_are_unique():
+    ids = [benchmark.id for benchmark in all_benchmarks()]
+    assert len(ids) == len(set(ids))
+
+
+def test_compare_flags_regressions():
+    baseline = _results(1E-3, 1000)
+    assert not compare(_results(1.1E-3, 1000), baseline, threshold=0.25)[0]['regression']
+    assert compare(_results(2E-3, 1000), baseline, threshold=0.25)[0]['regression']
+    assert compare(_results(1E-3, 2000), baseline, threshold=0.25)[0]['regression']
+
+
+def test_run_and_compare_with_baseline(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    assert main(['-k', 'tofCam611', '-r', '2', '--min-time', '0', '-o', str(baseline)]) == 0
+    results = json.loads(baseline.read_text())
+    assert {result['group'] for result in results['results']} == {'compensator', 'filter', 'projector'}
+    assert main(['-k', 'tofCam611', '-k', 'project', '-r', '2', '--min-time', '0', '-b', str(baseline), '-t', '100']) == 0
@@ -0,0 +1,30 @@
+import numpy as np
+
+from epc.tofCam635.tofCam635 import decode_distance_confidence
+
+
+def test_decode_distance_confidence_matches_bit_masks():
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 2**16, size=60 * 160, dtype=np.uint16).tobytes()
+    raw = np.frombuffer(data, dtype="h")
+
+    distance, confidence = decode_distance_confidence(raw)
+
+    assert distance.dtype == np.int16
+    assert confidence.dtype == np.uint8
+    assert distance.tolist() == [int(v) & 0x3FFF for v in raw]
+    assert confidence.tolist() == [(int(v) >> 14) & 0x03 for v in raw]
+
+
+def test_decode_interleaved_distance_and_amplitude():
+    distance = np.arange(8, dtype=np.uint16).reshape(2, 4)
+    amplitude = distance + 100
+    confidence = np.array([[0, 1, 2, 3], [3, 2, 1, 0]], dtype=np.uint16)
+    raw = np.stack(((confidence << 14) | distance, (1 << 15) | amplitude), axis=-1)
+
+    decoded_distance, decoded_confidence = decode_distance_confidence(raw[..., 0])
+    decoded_amplitude, _ = decode_distance_confidence(raw[..., 1])
+
+    np.testing.assert_array_equal(decoded_distance, distance)
+    np.testing.assert_array_equal(decoded_amplitude, amplitude)
+    np.testing.assert_array_equal(decoded_confidence, confidence)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from contextlib import aclosing
+
+import pytest
+
+from epc.tofCam660.async_tofCam660 import AsyncTOFcam660
+from epc.tofCam660.interface import DataType
+from epc.tofCam660.simulator import TOFcam660Simulator
+
+
+@pytest.fixture
+def sim():
+    with TOFcam660Simulator(seed=0) as simulator:
+        yield simulator
+
+
+def _camera(sim) -> AsyncTOFcam660:
+    return AsyncTOFcam660(sim.ipAddress, tcp_port=sim.tcpPort, data_port=sim.dataPort)
+
+
+def test_single_frames(sim):
+    async def run():
+        async with _camera(sim) as cam:
+            await cam.initialize()
+            assert await cam.device.get_fw_version() == '3.60'
+            distance, amplitude = await cam.get_distance_and_amplitude()
+            assert distance.shape == (240, 320) and amplitude.shape == (240, 320)
+            assert distance[0, 0] == 1000 and distance[1, 1] == 1015
+            assert (await cam.get_grayscale_image()).shape == (240, 320)
+            assert (await cam.get_raw_dcs_images()).shape == (4, 240, 320)
+            points, _ = await cam.get_point_cloud()
+            assert points.shape == (3, 240 * 320)
+            frame = await cam.capture(DataType.DISTANCE)
+            assert frame.temperature == sim.temperature and frame.roi == (0, 0, 320, 240)
+            assert frame.sequence == (await cam.capture(DataType.DISTANCE)).sequence - 1
+
+    asyncio.run(run())
+
+
+def test_settings(sim):
+    async def run():
+        async with _camera(sim) as cam:
+            await cam.initialize()
+            await cam.settings.set_roi((8, 20, 312, 220))
+            distance = await cam.get_distance_image()
+            assert distance.shape == (200, 304)
+            assert distance[0, 0] == 1000 + 10 * 8 + 5 * 20
+
+            count = cam.tcpInterface.transmitCount
+            await cam.settings.set_roi((8, 20, 312, 220))
+            assert cam.tcpInterface.transmitCount == count
+
+            await cam.device.write_register(0x71, 0x12)
+            assert await cam.device.read_register(0x71) == 0x12
+
+    asyncio.run(run())
+
+
+def test_stream(sim):
+    async def run():
+        async with _camera(sim) as cam:
+            await cam.initialize()
+            frames = 0
+            async with aclosing(cam.stream(DataType.DISTANCE_AMPLITUDE)) as stream:
+                async for frame in stream:
+                    assert frame.distance[1, 1] == 1015
+                    frames += 1
+                    if frames == 5:
+                        break
+            assert not cam.is_streaming()
+            # the camera accepts single frame commands again after the stream
+            assert (await cam.get_distance_image()).shape == (240, 320)
+
+    asyncio.run(run())
+
+
+def test_several_cameras_on_one_loop(sim):
+    async def capture(cam: AsyncTOFcam660):
+        await cam.initialize()
+        return [(await cam.get_distance_and_amplitude())[0] for _ in range(3)]
+
+    async def run(other_sim):
+        async with _camera(sim) as cam, _camera(other_sim) as other:
+            return await asyncio.gather(capture(cam), capture(other))
+
+    with TOFcam660Simulator(seed=1) as other_sim:
+        results = asyncio.run(run(other_sim))
+    for distances in results:
+        assert len(distances) == 3
+        assert all(distance.shape == (240, 320) for distance in distances)
+
+
+def test_cancelled_command_leaves_no_response_behind(sim):
+    async def run():
+        async with _camera(sim) as cam:
+            commands = sim.commandsReceived
+            task = asyncio.create_task(cam.device.get_chip_infos())
+            # block the loop until the camera received the command, its response stays unread
+            while sim.commandsReceived == commands:
+                await asyncio.sleep(0)
+                time.sleep(0.001)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert await cam.device.get_fw_version() == '3.60'
+            assert await cam.device.get_chip_temperature() == sim.temperature
+
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(cam.device.get_chip_infos(), 1e-5)
+            assert await cam.device.get_fw_version() == '3.60'
+
+            cam.tcpInterface.timeout_s = 1e-5
+            with pytest.raises(TimeoutError):
+                await cam.device.get_chip_infos()
+            cam.tcpInterface.timeout_s = 1
+            assert await cam.device.get_chip_temperature() == sim.temperature
+
+    asyncio.run(run())
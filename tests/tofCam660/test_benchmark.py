@@ -21,8 +21,10 @@ from ..config import cam660 as cam
 @pytest.mark.parametrize('integration_times', [[100, 10, 1900, 46667]])
 @pytest.mark.parametrize('number_of_captures', [100])
 @pytest.mark.parametrize('protocol', ['TCP', 'UDP',])
+@pytest.mark.parametrize('pipelined', [False, True])
 def test_fps(cam: TOFcam660,
              protocol: Literal["UDP", "TCP"],
+             pipelined: bool,
              capture_func: str,
              integration_times: list[int],
              number_of_captures: int):
@@ -32,6 +34,7 @@ def test_fps(cam: TOFcam660,
     cam.device.set_data_transfer_protocol(protocol)
     cam.settings.set_hdr(False)
     cam.settings.captureMode = 0
+    cam.settings.set_pipelined_acquisition(pipelined)
 
     # clock capturing of the image(s)
     capturing_rate = []
@@ -41,7 +44,8 @@ def test_fps(cam: TOFcam660,
         t1 = time.perf_counter()
         capturing_rate.append(1/(t1 - t0))
 
-    # precautionally set protocol to default again
+    # precautionally set protocol and acquisition mode to default again
+    cam.settings.set_pipelined_acquisition(False)
     cam.device.set_data_transfer_protocol("UDP")
 
     # editing
@@ -51,6 +55,7 @@ def test_fps(cam: TOFcam660,
     print( "│ Measurent setup:           │")
     print(f"│   FW version :  {cam.device.get_fw_version()}       │")
     print(f"│   Protocol   :  {protocol}        │")
+    print(f"│   Pipelined  :  {str(pipelined):<{11}}│")
     print(f"│   Sample size : {f'{number_of_captures} frames':<{11}}│")
     print( "├────────────────────────────┤")
     print( "│ Measurent result:          │")
@@ -65,7 +70,7 @@ def test_fps(cam: TOFcam660,
     plt.plot(capturing_rate, label='FPS per frame')
     plt.xlabel('Frame Number')
     plt.ylabel('FPS')
-    plt.title(f'FPS over {number_of_captures} frames, protocol: {protocol}, FW: {cam.device.get_fw_version()}')
+    plt.title(f'FPS over {number_of_captures} frames, protocol: {protocol}, pipelined: {pipelined}, FW: {cam.device.get_fw_version()}')
     plt.legend()
     plt.grid()
-    plt.savefig(f"logs/FPS_plot_{protocol}_{timestamp}.png")
+    plt.savefig(f"logs/FPS_plot_{protocol}{'_pipelined' if pipelined else ''}_{timestamp}.png")
@@ -0,0 +1,196 @@
+import random
+import socket
+import struct
+
+import pytest
+
+from epc.tofCam660.interface import DataType, TcpReceiver, UdpInterface
+from epc.tofCam660.parser import Parser
+
+LOCALHOST = '127.0.0.1'
+PACKET_HEADER = struct.Struct('!HIHIII')
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind((LOCALHOST, 0))
+        return s.getsockname()[1]
+
+
+def _packets(payload: bytes, measurementId: int, packetSize: int = 1400) -> list[bytes]:
+    count = (len(payload) + packetSize - 1) // packetSize
+    packets = []
+    for number in range(count):
+        offset = number * packetSize
+        chunk = payload[offset:offset + packetSize]
+        header = PACKET_HEADER.pack(measurementId, len(payload), len(chunk), offset, count, number)
+        packets.append(header + chunk)
+    return packets
+
+
+@pytest.fixture
+def udp():
+    port = _free_udp_port()
+    interface = UdpInterface(LOCALHOST, port)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    yield interface, sender, (LOCALHOST, port)
+    sender.close()
+    interface.close()
+
+
+def test_receive_frame_in_order(udp):
+    interface, sender, address = udp
+    payload = random.randbytes(25 + 2 * 320 * 24)
+    for packet in _packets(payload, measurementId=1):
+        sender.sendto(packet, address)
+
+    data, nBytes = interface.receiveFrame()
+    assert nBytes == len(payload)
+    assert bytes(data) == payload
+
+
+@pytest.mark.parametrize('scatterReceive', [True, False])
+def test_receive_frame_out_of_order_and_duplicates(udp, scatterReceive):
+    interface, sender, address = udp
+    interface._scatterReceive = interface._scatterReceive and scatterReceive
+    payload = random.randbytes(25 + 4 * 320 * 16)
+    packets = _packets(payload, measurementId=7)
+    shuffled = packets + packets[::3]
+    random.Random(0).shuffle(shuffled)
+    for packet in shuffled:
+        sender.sendto(packet, address)
+
+    data, nBytes = interface.receiveFrame()
+    assert nBytes == len(payload)
+    assert bytes(data) == payload
+
+
+@pytest.mark.parametrize('scatterReceive', [True, False])
+def test_short_last_packet_received_first(udp, scatterReceive):
+    interface, sender, address = udp
+    interface._scatterReceive = interface._scatterReceive and scatterReceive
+    for measurementId in range(3):
+        payload = random.randbytes(25 + 2 * 320 * 24)
+        packets = _packets(payload, measurementId)
+        assert len(packets[-1]) < len(packets[0])
+        for packet in [packets[-1]] + packets[:-1]:
+            sender.sendto(packet, address)
+
+        data, nBytes = interface.receiveFrame()
+        assert nBytes == len(payload)
+        assert bytes(data) == payload
+    assert interface.statistics()['framesLost'] == 0
+
+
+def test_ring_buffers_are_reused(udp):
+    interface, sender, address = udp
+    poolSize = len(interface._freeBuffers)
+    received = []
+    for measurementId in range(2 * poolSize):
+        payload = random.randbytes(25 + 2 * 320 * 8)
+        for packet in _packets(payload, measurementId):
+            sender.sendto(packet, address)
+        data, _ = interface.receiveFrame()
+        assert bytes(data) == payload
+        received.append(data.obj)
+
+    assert len({id(buffer) for buffer in received}) == poolSize
+
+
+def test_interleaved_frames_complete_independently(udp):
+    interface, sender, address = udp
+    first = random.randbytes(25 + 2 * 320 * 16)
+    second = random.randbytes(25 + 2 * 320 * 16)
+    firstPackets = _packets(first, measurementId=10)
+    secondPackets = _packets(second, measurementId=11)
+
+    # frame 11 completes while the last packet of frame 10 is still missing
+    interleaved = [p for pair in zip(firstPackets[:-1], secondPackets) for p in pair]
+    interleaved += secondPackets[len(firstPackets) - 1:]
+    for packet in interleaved:
+        sender.sendto(packet, address)
+    # late packet of the already superseded frame
+    sender.sendto(firstPackets[-1], address)
+
+    data, _ = interface.receiveFrame()
+    assert bytes(data) == second
+    statistics = interface.statistics()
+    assert statistics['framesCompleted'] == 1
+    assert statistics['framesLost'] == 1
+    assert statistics['packetsLost'] == 1
+    assert interface.lostFrames[-1] == (10, 1, len(firstPackets))
+
+    payload = random.randbytes(25 + 2 * 320 * 4)
+    for packet in _packets(payload, measurementId=12):
+        sender.sendto(packet, address)
+    data, _ = interface.receiveFrame()
+    assert bytes(data) == payload
+    assert interface.statistics()['packetsLate'] == 1
+
+
+def test_stale_partial_frames_are_dropped(udp):
+    interface, sender, address = udp
+    interface.staleTimeout_s = 0
+    partial = _packets(random.randbytes(25 + 2 * 320 * 16), measurementId=20)
+    for packet in partial[:-2]:
+        sender.sendto(packet, address)
+
+    payload = random.randbytes(25 + 2 * 320 * 4)
+    for packet in _packets(payload, measurementId=3):
+        sender.sendto(packet, address)
+
+    data, _ = interface.receiveFrame()
+    assert bytes(data) == payload
+    assert interface.statistics()['framesLost'] == 1
+    assert interface.lostFrames[-1] == (20, 2, len(partial))
+
+
+def test_receive_frame_timeout(udp):
+    interface, _, _ = udp
+    with pytest.raises(TimeoutError):
+        interface.receiveFrame()
+
+
+def _tcp_frame(rows: int, cols: int, dataType: DataType, bytesPerPixel: int) -> bytes:
+    header = Parser.headerStruct.pack(1, dataType, cols, rows, 0, 0, cols - 1, rows - 1, 0, 0, 0, 0, 0)
+    return header + random.randbytes(rows * cols * bytesPerPixel)
+
+
+@pytest.fixture
+def tcp():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind((LOCALHOST, 0))
+    server.listen(1)
+    receiver = TcpReceiver(LOCALHOST, server.getsockname()[1])
+    sender, _ = server.accept()
+    yield receiver, sender
+    sender.close()
+    receiver.close()
+    server.close()
+
+
+def test_tcp_frames_are_received_back_to_back(tcp):
+    receiver, sender = tcp
+    # small frames sent at once must not be received into each other
+    frames = [_tcp_frame(2, 4, DataType.DISTANCE, 2), _tcp_frame(2, 4, DataType.DISTANCE_AMPLITUDE, 4),
+              _tcp_frame(240, 320, DataType.DCS, 8), _tcp_frame(1, 2, DataType.GRAYSCALE, 2)]
+    sender.sendall(b''.join(frames))
+    for frame in frames:
+        data, nBytes = receiver.receiveFrame()
+        assert nBytes == len(frame)
+        assert bytes(data) == frame
+
+
+def test_tcp_receive_buffer_is_reused(tcp):
+    receiver, sender = tcp
+    sender.sendall(_tcp_frame(240, 320, DataType.DISTANCE_AMPLITUDE, 4) * 2)
+    first, _ = receiver.receiveFrame()
+    second, _ = receiver.receiveFrame()
+    assert first.obj is second.obj
+
+
+def test_tcp_receive_timeout(tcp):
+    receiver, _ = tcp
+    receiver.socket.settimeout(0.01)
+    with pytest.raises(TimeoutError):
+        receiver.receiveFrame()
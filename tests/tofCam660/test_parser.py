@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from epc.tofCam660.command import Command
+from epc.tofCam660.interface import Interface
+from epc.tofCam660.parser import (DcsParser, DistanceAndAmplitudeParser, DistanceParser,
+                                  GrayscaleParser, Parser)
+
+ROWS, COLS = 3, 5
+
+
+def _dcs_frame(dcs: np.ndarray) -> bytes:
+    header = Parser.headerStruct.pack(1, 3, COLS, ROWS, 0, 0, COLS - 1, ROWS - 1, 0, 0, 0, 2500, 0)
+    return header + dcs.astype('<u2').tobytes()
+
+
+@pytest.fixture
+def raw_dcs() -> np.ndarray:
+    dcs = np.random.default_rng(0).integers(0, 4096, (4, ROWS, COLS)).astype(np.uint16)
+    dcs[1, 0, 0] = DcsParser.ADC_OVERFLOW
+    dcs[2, 1, 2] = DcsParser.SATURATION
+    dcs[0, 1, 2] = DcsParser.ADC_OVERFLOW
+    return dcs
+
+
+def _reference(raw_dcs: np.ndarray) -> np.ndarray:
+    dcs = raw_dcs.astype(np.int32) - 2048
+    errors = (raw_dcs == DcsParser.ADC_OVERFLOW) | (raw_dcs == DcsParser.SATURATION)
+    dcs[errors] = raw_dcs[errors]
+    return dcs
+
+
+def test_int32_keeps_error_codes(raw_dcs):
+    frame = DcsParser().parse(_dcs_frame(raw_dcs))
+    assert frame.dcs.dtype == np.int32
+    assert np.array_equal(frame.dcs, _reference(raw_dcs))
+    assert frame.temperature == 25
+
+
+def test_int32_without_errors():
+    raw_dcs = np.full((4, ROWS, COLS), 100, dtype=np.uint16)
+    frame = DcsParser().parse(_dcs_frame(raw_dcs))
+    assert np.all(frame.dcs == -1948)
+    assert frame.dcsErrors is None
+
+
+def test_int16_with_error_bitmask(raw_dcs):
+    frame = DcsParser('int16').parse(_dcs_frame(raw_dcs))
+    assert frame.dcs.dtype == np.int16
+
+    reference = _reference(raw_dcs)
+    invalid = raw_dcs >= DcsParser.ADC_OVERFLOW
+    reference[invalid] = 0
+    assert np.array_equal(frame.dcs, reference)
+
+    expected_errors = np.zeros((ROWS, COLS), dtype=np.uint8)
+    expected_errors[0, 0] = DcsParser.ERROR_ADC_OVERFLOW
+    expected_errors[1, 2] = DcsParser.ERROR_ADC_OVERFLOW | DcsParser.ERROR_SATURATION
+    assert np.array_equal(frame.dcsErrors, expected_errors)
+
+
+def test_int16_without_errors():
+    raw_dcs = np.full((4, ROWS, COLS), 100, dtype=np.uint16)
+    parser = DcsParser('int16')
+    frame = parser.parse(_dcs_frame(raw_dcs))
+    assert np.all(frame.dcs == -1948)
+    assert frame.dcsErrors.shape == (ROWS, COLS)
+    assert frame.dcsErrors.dtype == np.uint8
+    assert not frame.dcsErrors.any()
+    # the mask of error free frames is shared between the frames
+    assert parser.parse(_dcs_frame(raw_dcs)).dcsErrors is frame.dcsErrors
+
+
+def test_raw(raw_dcs):
+    frame = DcsParser('raw').parse(_dcs_frame(raw_dcs))
+    assert frame.dcs.dtype == np.uint16
+    assert np.array_equal(frame.dcs, raw_dcs)
+
+
+def test_invalid_format():
+    with pytest.raises(ValueError):
+        DcsParser('float32')
+
+
+@pytest.mark.parametrize('parser, attributes', [(DistanceAndAmplitudeParser(), ('distance', 'amplitude')),
+                                                (DistanceParser(), ('distance',)),
+                                                (GrayscaleParser(), ('amplitude',)),
+                                                (DcsParser('raw'), ('dcs',))])
+def test_parsed_data_does_not_alias_the_receive_buffer(parser, attributes):
+    values = 4 if isinstance(parser, DcsParser) else len(attributes)
+    data = np.arange(values * ROWS * COLS, dtype=np.uint16)
+    buffer = bytearray(_dcs_frame(data) + bytes(8))  # receive buffers may be larger than the frame
+    frame = parser.parse(memoryview(buffer))
+    expected = {name: getattr(frame, name).copy() for name in attributes}
+
+    buffer[Parser.headerStruct.size:] = bytes(len(buffer) - Parser.headerStruct.size)
+    for name in attributes:
+        assert np.array_equal(getattr(frame, name), expected[name])
+        assert getattr(frame, name).flags.writeable
+    assert parser.bytestream is None
+
+
+def test_parser_is_reusable():
+    data = np.stack((np.full((ROWS, COLS), 1000), np.full((ROWS, COLS), 200)), axis=-1)
+    parser = DistanceAndAmplitudeParser()
+    for _ in range(2):
+        frame = parser.parse(_dcs_frame(data))
+        assert np.all(frame.distance == 1000) and np.all(frame.amplitude == 200)
+
+
+def test_cached_command_message_is_built_once():
+    command = Command.cached('getDistanceAndAmplitude', 0)
+    assert Command.cached('getDistanceAndAmplitude', 0) is command
+    assert Command.cached('getDistanceAndAmplitude', 1) is not command
+    message = Interface._assembleMessage(Interface, command)
+    assert Interface._assembleMessage(Interface, command) is message
+    assert message == Interface._assembleMessage(Interface, Command.create('getDistanceAndAmplitude', 0))
+
+
+def test_roi_of_binned_frame():
+    # 2x2 binning halves the image, the ROI in sensor coordinates stays unchanged
+    header = Parser.headerStruct.pack(1, 1, 152, 100, 8, 20, 311, 219, 100, 0, 0, 2500, 0)
+    frame = DistanceParser().parse(header + bytes(2 * 152 * 100))
+    assert frame.distance.shape == (100, 152)
+    assert frame.roi == (8, 20, 312, 220)
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from epc.tofCam660 import TOFcam660
+from epc.tofCam660.interface import DataType
+from epc.tofCam660.simulator import TOFcam660Simulator
+
+
+@pytest.fixture
+def sim():
+    with TOFcam660Simulator(seed=0) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def cam(sim):
+    cam = TOFcam660(sim.ipAddress, tcp_port=sim.tcpPort, data_port=sim.dataPort)
+    cam.initialize()
+    cam.settings.set_pipelined_acquisition(True)
+    yield cam
+    cam.__del__()
+
+
+def _wait_for_frames_sent(sim: TOFcam660Simulator, count: int) -> int:
+    """Frames sent by the simulator once count are sent or no further frame follows"""
+    deadline = time.monotonic() + 1
+    while sim.framesSent < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    return sim.framesSent
+
+
+def test_next_acquisition_is_issued_ahead(cam, sim):
+    for expected in (1, 2, 3):
+        assert cam.capture().distance.shape == (240, 320)
+        # the following frame is already acquired
+        assert _wait_for_frames_sent(sim, expected + 1) == expected + 1
+
+    # a frame acquired ahead holds the state of the camera at its acquisition
+    sim.temperature = 40.0
+    assert cam.capture().temperature == 35.0
+    assert cam.capture().temperature == 40.0
+
+
+def test_pending_frame_is_dropped_after_other_commands(cam, sim):
+    cam.capture()
+    sim.temperature = 40.0
+    assert cam.device.get_chip_temperature() == 40.0
+    assert cam.capture().temperature == 40.0
+
+    cam.settings.set_roi((8, 20, 312, 220))
+    for _ in range(2):
+        frame = cam.capture()
+        assert frame.distance.shape == (200, 304)
+        assert frame.roi == (8, 20, 312, 220)
+
+
+def test_pending_frame_of_other_data_type_is_dropped(cam, sim):
+    cam.get_distance_and_amplitude()
+    dcs = cam.get_raw_dcs_images()
+    assert dcs.shape == (4, 240, 320)
+
+    cam.settings.set_pipelined_acquisition(False)
+    np.testing.assert_array_equal(dcs, cam.get_raw_dcs_images())
+    assert cam.capture(DataType.DISTANCE_AMPLITUDE).distance.shape == (240, 320)
+
+
+def test_disable_pipelining_drops_pending_frame(cam, sim):
+    cam.capture()
+    cam.settings.set_pipelined_acquisition(False)
+    assert _wait_for_frames_sent(sim, 2) == 2
+
+    sim.temperature = 40.0
+    assert cam.capture().temperature == 40.0
+    # no acquisition is issued ahead anymore
+    assert _wait_for_frames_sent(sim, 4) == 3
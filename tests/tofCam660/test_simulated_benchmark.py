@@ -0,0 +1,72 @@
+import time
+import tracemalloc
+from typing import Literal
+
+import numpy as np
+import pytest
+
+from epc.tofCam660 import TOFcam660
+from epc.tofCam660.simulator import TOFcam660Simulator
+
+
+# How to run this test:
+#   pytest tests/tofCam660/test_simulated_benchmark.py -m benchmark -s
+#
+#   Benchmarks are deselected in the default test run, like the system and manual tests.
+#   The camera is simulated on the local host, so the numbers measure the host
+#   side of the driver (protocol, receive path and parsing) and are comparable
+#   between commits on the same machine. The simulated acquisition latency is
+#   set to a typical integration and readout time.
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('number_of_captures', [50])
+@pytest.mark.parametrize('latency_s', [0.002])
+@pytest.mark.parametrize('protocol', ['UDP', 'TCP'])
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_simulated_fps(protocol: Literal["UDP", "TCP"],
+                       pipelined: bool,
+                       latency_s: float,
+                       number_of_captures: int):
+    with TOFcam660Simulator(latency_s=latency_s, seed=0) as sim:
+        cam = TOFcam660(sim.ipAddress, tcp_port=sim.tcpPort, data_port=sim.dataPort)
+        try:
+            cam.initialize()
+            cam.device.set_data_transfer_protocol(protocol)
+            cam.settings.set_pipelined_acquisition(pipelined)
+            cam.get_distance_and_amplitude()  # warm up buffers and caches
+
+            latencies = np.empty(number_of_captures)
+            for i in range(number_of_captures):
+                t0 = time.perf_counter()
+                distance, _ = cam.get_distance_and_amplitude()
+                latencies[i] = time.perf_counter() - t0
+
+            # tracing slows down the simulator in the same process, so allocations are measured separately
+            tracemalloc.start()
+            for _ in range(10):
+                cam.get_distance_and_amplitude()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            cam.settings.set_pipelined_acquisition(False)
+            cam.device.set_data_transfer_protocol("UDP")
+        finally:
+            cam.__del__()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    fps = number_of_captures / latencies.sum()
+    print()
+    print( "┌────────────────────────────┐")
+    print(f"│ Protocol    :  {protocol:<{12}}│")
+    print(f"│ Pipelined   :  {str(pipelined):<{12}}│")
+    print(f"│ Frames      :  {number_of_captures:<{12}}│")
+    print( "├────────────────────────────┤")
+    print(f"│ FPS         :  {fps:<{12}.1f}│")
+    print(f"│ Latency p50 :  {f'{p50:.2f} ms':<{12}}│")
+    print(f"│ Latency p95 :  {f'{p95:.2f} ms':<{12}}│")
+    print(f"│ Latency p99 :  {f'{p99:.2f} ms':<{12}}│")
+    print(f"│ Peak alloc  :  {f'{peak / 1024:.0f} KiB':<{12}}│")
+    print( "└────────────────────────────┘")
+
+    assert distance.shape == (240, 320)
+    assert sim.framesSent >= number_of_captures
@@ -0,0 +1,248 @@
+import time
+
+import numpy as np
+import pytest
+
+from epc.tofCam660 import TOFcam660
+from epc.tofCam660.interface import DataType, TcpReceiver
+from epc.tofCam660.simulator import TOFcam660Simulator
+from epc.tofCam_lib import CameraGroup
+
+
+@pytest.fixture
+def sim():
+    with TOFcam660Simulator(seed=0) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def cam(sim):
+    cam = TOFcam660(sim.ipAddress, tcp_port=sim.tcpPort, data_port=sim.dataPort)
+    cam.initialize()
+    yield cam
+    cam.__del__()
+
+
+def test_device_information(cam, sim):
+    assert cam.device.get_fw_version() == '3.60'
+    assert cam.device.get_chip_temperature() == sim.temperature
+    cam.device.write_register(0x71, 0x12)
+    assert cam.device.read_register(0x71) == 0x12
+
+
+def test_single_frames(cam):
+    distance, amplitude = cam.get_distance_and_amplitude()
+    assert distance.shape == (240, 320)
+    assert amplitude.shape == (240, 320)
+    assert distance[0, 0] == 1000 and distance[1, 1] == 1015
+    assert cam.get_grayscale_image().shape == (240, 320)
+    assert cam.get_raw_dcs_images().shape == (4, 240, 320)
+
+
+def test_roi(cam):
+    cam.settings.set_roi((8, 20, 312, 220))
+    distance = cam.get_distance_image()
+    assert distance.shape == (200, 304)
+    assert distance[0, 0] == 1000 + 10 * 8 + 5 * 20
+
+
+def test_packet_loss_and_reordering(cam, sim):
+    sim.reorder = 0.2
+    sim.packetLoss = 0.002
+    cam.start_stream(DataType.DISTANCE_AMPLITUDE)
+    for _ in range(20):
+        distance, _ = cam.get_distance_and_amplitude()
+        assert distance[1, 1] == 1015
+    statistics = cam.rxInterface.statistics()
+    cam.stop_stream()
+    assert statistics['framesCompleted'] >= 20
+    assert sim.packetsDropped > 0
+
+
+def test_tcp_data_transfer(cam, sim):
+    cam.device.set_data_transfer_protocol('TCP')
+    assert isinstance(cam.rxInterface, TcpReceiver)
+    assert sim.useTcp
+    distance, amplitude = cam.get_distance_and_amplitude()
+    assert distance.shape == (240, 320)
+    assert np.array_equal(distance, cam.get_distance_and_amplitude()[0])
+    cam.device.set_data_transfer_protocol('UDP')
+    assert not sim.useTcp
+
+
+def test_pipelined_acquisition(cam, sim):
+    cam.settings.set_pipelined_acquisition(True)
+    for _ in range(5):
+        assert cam.get_distance_and_amplitude()[0].shape == (240, 320)
+    # the last acquisition is already issued, its frame follows in the background
+    deadline = time.monotonic() + 1
+    while sim.framesSent < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sim.framesSent == 6
+    cam.settings.set_pipelined_acquisition(False)
+
+
+def test_point_cloud_into_buffer(cam):
+    out = np.empty((3, 240 * 320), dtype=np.float32)
+    points, amplitude = cam.get_point_cloud(out=out)
+    assert points is out
+    assert amplitude.shape == (240 * 320,)
+    np.testing.assert_array_equal(out, cam.get_point_cloud()[0])
+
+
+def test_stage_statistics(cam, sim):
+    cam.enable_instrumentation()
+    for _ in range(5):
+        cam.get_distance_and_amplitude()
+    cam.get_point_cloud()
+
+    stats = cam.stats()
+    assert {'transceive', 'receive', 'parse', 'frame', 'projection'} <= set(stats['stages'])
+    assert stats['stages']['frame']['count'] == 6
+    assert stats['stages']['frame']['p50_ms'] >= stats['stages']['parse']['p50_ms']
+    assert stats['receiver']['framesCompleted'] >= 6
+
+    cam.enable_instrumentation(False)
+    cam.get_distance_and_amplitude()
+    assert cam.stats()['stages']['frame']['count'] == 6
+
+
+@pytest.mark.parametrize('dcs_format, dtype', [('int32', np.int32), ('int16', np.int16), ('raw', np.uint16)])
+def test_dcs_formats(cam, dcs_format, dtype):
+    cam.settings.set_dcs_format(dcs_format)
+    dcs = cam.get_raw_dcs_images()
+    assert dcs.dtype == dtype
+    assert dcs.shape == (4, 240, 320)
+
+
+def test_batched_registers_and_shadow(cam, sim):
+    cam.device.write_registers({0x71: 0x01, 0x72: 0x02, 0x73: 0x03})
+    assert cam.device.read_registers([0x71, 0x72, 0x73]) == {0x71: 0x01, 0x72: 0x02, 0x73: 0x03}
+    assert sim.registers[0x72] == 0x02
+
+    # values known to be in effect are not written again
+    commands = sim.commandsReceived
+    cam.device.write_registers({0x71: 0x01, 0x72: 0x05})
+    assert sim.commandsReceived == commands + 1
+    assert sim.registers[0x72] == 0x05
+
+    # a setting may have changed the registers
+    cam.settings.set_hdr(1)
+    commands = sim.commandsReceived
+    cam.device.write_registers({0x71: 0x01})
+    assert sim.commandsReceived == commands + 1
+
+    commands = sim.commandsReceived
+    cam.device.write_register(0x71, 0x01)
+    assert sim.commandsReceived == commands + 1
+
+
+def test_timeout_within_register_batch(cam, sim, monkeypatch):
+    sim.registers.update({0x71: 0x11, 0x72: 0x12, 0x73: 0x13})
+    handleCommand = sim._handleCommand
+    commands = sim.commandsReceived
+
+    def stallSecondCommand(connection, commandId, data):
+        if sim.commandsReceived == commands + 2:
+            time.sleep(0.3)
+        handleCommand(connection, commandId, data)
+
+    monkeypatch.setattr(sim, '_handleCommand', stallSecondCommand)
+    cam.tcpInterface.socket.settimeout(0.1)
+    with pytest.raises(TimeoutError):
+        cam.device.read_registers([0x71, 0x72, 0x73])
+
+    # the responses of the interrupted batch are not read by the following commands
+    assert cam.device.read_register(0x73) == 0x13
+    assert cam.device.get_fw_version() == '3.60'
+
+
+def test_dll_settings_are_restored_in_one_batch(cam, sim):
+    sim.registers.update({0x71: 0x11, 0x72: 0x12, 0x73: 0x13, 0x8b: 0x14, 0x93: 0x15})
+    cam.settings._store_dll_settings()
+    cam.settings.set_flex_mod_freq(10, delay=0)
+    assert all(sim.registers[reg] == 0 for reg in cam.settings.dllRegisterSettings)
+
+    cam.settings.set_modulation(12)
+    assert {reg: sim.registers[reg] for reg in cam.settings.dllRegisterSettings} == \
+        {0x71: 0x11, 0x72: 0x12, 0x73: 0x13, 0x8b: 0x14, 0x93: 0x15}
+
+
+def test_unchanged_settings_are_not_sent(cam, sim):
+    commands = sim.commandsReceived
+    cam.settings.set_hdr(0)
+    cam.settings.set_minimal_amplitude(100)
+    cam.settings.set_integration_hdr([25, 16, 0, 0])
+    cam.settings.set_roi((0, 0, 320, 240))
+    assert sim.commandsReceived == commands
+
+    cam.settings.set_minimal_amplitude(200)
+    cam.settings.set_minimal_amplitude(200)
+    assert sim.commandsReceived == commands + 1
+
+
+def test_invalidate_sends_settings_again(cam, sim):
+    commands = sim.commandsReceived
+    cam.settings.invalidate('SetHdr')
+    cam.settings.set_hdr(0)
+    cam.settings.set_minimal_amplitude(100)
+    assert sim.commandsReceived == commands + 1
+
+    cam.settings.invalidate()
+    commands = sim.commandsReceived
+    cam.settings.set_minimal_amplitude(100)
+    assert sim.commandsReceived == commands + 1
+
+
+def test_modulation_is_sent_after_flex_mod(cam, sim):
+    cam.settings.set_modulation(12)
+    cam.settings.set_flex_mod_freq(10, delay=0)
+    commands = sim.commandsReceived
+    cam.settings.set_modulation(12)
+    assert sim.commandsReceived > commands
+    assert not cam.settings.flexMod
+
+
+def test_capture_returns_frame_metadata(cam, sim):
+    cam.settings.set_roi((8, 20, 312, 220))
+    first = cam.capture(DataType.DISTANCE_AMPLITUDE)
+    assert first.distance.shape == (200, 304) and first.amplitude.shape == (200, 304)
+    assert first.roi == (8, 20, 312, 220)
+    assert first.integrationTimes == (16, 0, 0)
+    assert first.temperature == sim.temperature
+    assert abs(first.timestamp - time.time()) < 1
+
+    second = cam.capture(DataType.DCS)
+    assert second.dcs.shape == (4, 200, 304)
+    assert second.sequence == first.sequence + 1
+    assert second.timestamp >= first.timestamp
+
+
+def test_flex_mod_uses_header_temperature(cam, sim):
+    cam.settings.set_flex_mod_freq(10, delay=0)
+    commands = sim.commandsReceived
+    frame = cam.capture(DataType.DISTANCE_AMPLITUDE)
+    # only the acquisition, no temperature request
+    assert sim.commandsReceived == commands + 1
+    assert frame.distance.shape == (240, 320)
+    assert frame.temperature == sim.temperature
+
+
+def test_camera_group(cam, sim):
+    with TOFcam660Simulator(seed=1) as other_sim:
+        other = TOFcam660(other_sim.ipAddress, tcp_port=other_sim.tcpPort, data_port=other_sim.dataPort)
+        try:
+            other.initialize()
+            with CameraGroup([cam, other], acquire=lambda camera: camera.get_distance_and_amplitude(),
+                             tolerance_s=0.05) as group:
+                bundles = [group.get(timeout_s=2) for _ in range(5)]
+            stats = group.statistics()
+        finally:
+            other.__del__()
+
+    for bundle in bundles:
+        assert len(bundle) == 2
+        distance, amplitude = bundle[1]
+        assert distance.shape == (240, 320)
+    assert stats['bundles'] == 5
+    assert all(camera['fps'] > 0 for camera in stats['cameras'])
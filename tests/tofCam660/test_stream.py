@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+import pytest
+
+from epc.tofCam660.interface import UdpInterface
+from epc.tofCam660.parser import DistanceParser, Parser
+from epc.tofCam660.stream import FrameStream
+from .test_interface import _packets, udp
+
+ROWS, COLS = 24, 32
+
+
+def _distance_frame(value: int) -> bytes:
+    header = Parser.headerStruct.pack(1, 1, COLS, ROWS, 0, 0, COLS, ROWS, 100, 0, 0, 2500, 0)
+    return header + np.full(ROWS * COLS, value, dtype=np.uint16).tobytes()
+
+
+def _send_frames(sender, address, values):
+    for measurementId, value in enumerate(values):
+        for packet in _packets(_distance_frame(value), measurementId):
+            sender.sendto(packet, address)
+
+
+def _wait_for(stream: FrameStream, received: int, timeout_s: float = 2):
+    t_end = time.monotonic() + timeout_s
+    while stream.statistics()['received'] < received and time.monotonic() < t_end:
+        time.sleep(0.01)
+
+
+def test_stream_delivers_frames_in_order(udp):
+    interface, sender, address = udp
+    stream = FrameStream(interface, DistanceParser(), queueSize=8)
+    stream.start()
+    try:
+        _send_frames(sender, address, [1, 2, 3])
+        values = [int(stream.get().distance[0, 0]) for _ in range(3)]
+    finally:
+        stream.stop()
+    assert values == [1, 2, 3]
+    assert stream.statistics()['dropped'] == 0
+
+
+@pytest.mark.parametrize('dropPolicy, expected', [('oldest', [3, 4]), ('newest', [1, 2])])
+def test_stream_drop_policy(udp, dropPolicy, expected):
+    interface, sender, address = udp
+    stream = FrameStream(interface, DistanceParser(), queueSize=2, dropPolicy=dropPolicy)
+    stream.start()
+    try:
+        _send_frames(sender, address, [1, 2, 3, 4])
+        _wait_for(stream, 4)
+        values = [int(stream.get().distance[0, 0]) for _ in range(2)]
+        statistics = stream.statistics()
+    finally:
+        stream.stop()
+    assert values == expected
+    assert statistics['received'] == 4
+    assert statistics['dropped'] == 2
+
+
+def test_stream_get_timeout(udp):
+    interface, _, _ = udp
+    stream = FrameStream(interface, DistanceParser())
+    stream.start()
+    try:
+        with pytest.raises(TimeoutError):
+            stream.get(timeout_s=0.1)
+    finally:
+        stream.stop()
+    assert not stream.isRunning
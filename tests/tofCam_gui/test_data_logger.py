@@ -0,0 +1,70 @@
+import time
+
+import h5py
+import numpy as np
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from epc.tofCam_gui.data_logger import TIMESTAMP_CHUNK, HDF5Logger
+
+ROWS, COLS = 4, 6
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    yield QCoreApplication.instance() or QCoreApplication([])
+
+
+def _record(logger: HDF5Logger, frames: list) -> None:
+    logger.start()
+    deadline = time.monotonic() + 2
+    while not logger.is_running() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    for frame in frames:
+        logger.add_frame(frame)
+    logger.stop_logging()
+    assert logger.wait(5000)
+
+
+@pytest.mark.parametrize('compression', [None, 'lzf', 'gzip'])
+def test_batched_recording(tmp_path, compression):
+    path = tmp_path / 'recording.h5'
+    rng = np.random.default_rng(0)
+    frames = [(rng.integers(0, 4000, (ROWS, COLS), dtype=np.uint16),
+               rng.integers(0, 2000, (ROWS, COLS), dtype=np.uint16)) for _ in range(11)]
+    logger = HDF5Logger('Distance', path, compression=compression, batch_frames=4)
+    logger.set_metadata(camera='TOFcam660')
+    _record(logger, frames)
+
+    with h5py.File(path, 'r') as f:
+        assert f.attrs['camera'] == 'TOFcam660'
+        timestamps = f['timestamps']
+        # the geometrically grown datasets are trimmed to the recorded frames
+        assert timestamps.shape == (11,)
+        assert np.all(np.diff(timestamps[:]) >= 0)
+        assert timestamps.chunks == (TIMESTAMP_CHUNK,)
+        for index in range(2):
+            dataset = f[f'frames_{index}']
+            assert dataset.shape == (11, ROWS, COLS)
+            assert dataset.maxshape == (None, ROWS, COLS)
+            assert dataset.chunks == (4, ROWS, COLS)
+            assert dataset.compression == compression
+            assert dataset.dtype == np.uint16
+            np.testing.assert_array_equal(dataset[:], np.stack([frame[index] for frame in frames]))
+
+
+def test_large_frames_are_chunked_per_frame(tmp_path):
+    path = tmp_path / 'recording.h5'
+    frames = [np.full((1024, 1024), value, dtype=np.float32) for value in range(3)]
+    _record(HDF5Logger('Distance', path, batch_frames=2), frames)
+
+    with h5py.File(path, 'r') as f:
+        dataset = f['frames_0']
+        assert dataset.shape == (3, 1024, 1024)
+        assert dataset.chunks == (1, 1024, 1024)
+        assert [float(dataset[i, 0, 0]) for i in range(3)] == [0, 1, 2]
+
+
+def test_invalid_compression(tmp_path):
+    with pytest.raises(ValueError):
+        HDF5Logger('Distance', tmp_path / 'recording.h5', compression='zstd')
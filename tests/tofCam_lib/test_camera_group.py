@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from epc.tofCam_lib import CameraGroup
+
+
+class FakeCamera:
+    """Returns the number of the frame after a fixed acquisition time"""
+
+    def __init__(self, frame_time_s: float, fail_after: int = None):
+        self.frame_time_s = frame_time_s
+        self.fail_after = fail_after
+        self.frames = 0
+
+    def get_distance_image(self):
+        time.sleep(self.frame_time_s)
+        self.frames += 1
+        if self.fail_after is not None and self.frames > self.fail_after:
+            raise ConnectionResetError("camera disconnected")
+        return self.frames
+
+
+class FakeUdpInterface:
+    def __init__(self, port):
+        self.port = port
+        self.udpSocket = None
+
+
+class FakeDevice:
+    def __init__(self):
+        self.protocol = 'UDP'
+
+    def set_data_transfer_protocol(self, protocol):
+        self.protocol = protocol
+
+
+def test_bundles_are_time_aligned():
+    cameras = [FakeCamera(0.01) for _ in range(3)]
+    with CameraGroup(cameras, tolerance_s=0.008) as group:
+        bundles = [group.get() for _ in range(10)]
+        stats = group.statistics()
+
+    for bundle in bundles:
+        assert len(bundle) == 3
+        assert bundle.skew_s <= 0.008
+    assert stats['bundles'] == 10
+    assert stats['skew_max_ms'] <= 8
+    assert all(camera['fps'] > 0 for camera in stats['cameras'])
+
+
+def test_frames_of_a_faster_camera_are_dropped():
+    cameras = [FakeCamera(0.005), FakeCamera(0.02)]
+    with CameraGroup(cameras, tolerance_s=0.01) as group:
+        for _ in range(5):
+            group.get()
+        stats = group.statistics()
+    assert stats['cameras'][0]['acquired'] > stats['cameras'][1]['acquired']
+    assert stats['cameras'][0]['unmatched'] + stats['cameras'][0]['dropped'] > 0
+
+
+def test_iteration_ends_if_a_camera_fails():
+    group = CameraGroup([FakeCamera(0.002), FakeCamera(0.002, fail_after=5)], tolerance_s=0.01)
+    group.start()
+    bundles = list(group)
+    group.stop()
+    assert len(bundles) <= 5
+    assert not group.is_running()
+    with pytest.raises(RuntimeError):
+        group.get()
+
+
+def test_shared_udp_ports_are_separated():
+    cameras = [FakeCamera(0.001) for _ in range(3)]
+    for camera, port in zip(cameras, (45454, 45454, 45455)):
+        camera.rxInterface = FakeUdpInterface(port)
+        camera.device = FakeDevice()
+    group = CameraGroup(cameras)
+    group.start()
+    assert [camera.device.protocol for camera in cameras] == ['UDP', 'TCP', 'UDP']
+    group.stop()
+    assert [camera.device.protocol for camera in cameras] == ['UDP', 'UDP', 'UDP']
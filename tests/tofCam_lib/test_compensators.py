@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from epc.tofCam_lib.compensators import FourthHarmonicCompensation
+
+
+def _compensate_reference(comp: FourthHarmonicCompensation, distances):
+    """Per-pixel reference implementation the vectorized compensation has to match"""
+    compensatedDistances = np.zeros(distances.shape)
+    for i in range(distances.shape[0]):
+        for j in range(distances.shape[1]):
+            index = distances[i, j] / comp.dll_step_size
+            if (index < 0):
+                compensatedDistances[i, j] = distances[i, j] - comp.lut[0]
+            elif (index >= comp.num_steps_calibrated-1):
+                compensatedDistances[i, j] = distances[i, j] - comp.lut[comp.num_steps_calibrated-1]
+            else:
+                lower_index = int(np.floor(index))
+                upper_index = int(np.ceil(index))
+                if lower_index == upper_index:
+                    compensatedDistances[i, j] = distances[i, j] - comp.lut[lower_index]
+                else:
+                    lower_value = comp.lut[lower_index]
+                    upper_value = comp.lut[upper_index]
+                    interpolation_factor = index - lower_index
+                    interpolated_value = lower_value + interpolation_factor * (upper_value - lower_value)
+                    compensatedDistances[i, j] = distances[i, j] - interpolated_value
+    compensatedDistances %= comp.unambiguity
+    return compensatedDistances
+
+
+def _compensation(rng, lut_dtype, dll_step_size):
+    lut = rng.normal(0, 50, size=50).astype(lut_dtype)
+    return FourthHarmonicCompensation(dll_step_size, lut, unambiguity=6245.7)
+
+
+@pytest.mark.parametrize('lut_dtype', [np.float32, np.float64])
+@pytest.mark.parametrize('dll_step_size', [125, 124.9, np.float64(312.5)])
+@pytest.mark.parametrize('distance_dtype', [np.float32, np.float64, np.uint16])
+def test_fourth_harmonic_matches_reference(lut_dtype, dll_step_size, distance_dtype):
+    rng = np.random.default_rng(42)
+    comp = _compensation(rng, lut_dtype, dll_step_size)
+
+    upper_limit = comp.num_steps_calibrated * dll_step_size * 1.1
+    if distance_dtype == np.uint16:
+        distances = rng.integers(0, int(upper_limit), size=(24, 32)).astype(np.uint16)
+    else:
+        distances = rng.uniform(-500, upper_limit, size=(24, 32)).astype(distance_dtype)
+        # pixels exactly on the lut grid
+        distances[0, :10] = np.arange(10) * dll_step_size
+
+    np.testing.assert_array_equal(comp.compensate(distances), _compensate_reference(comp, distances))
+
+
+def test_fourth_harmonic_frame_stack():
+    rng = np.random.default_rng(7)
+    comp = _compensation(rng, np.float64, 125)
+    frames = rng.uniform(-100, 7000, size=(3, 12, 16)).astype(np.float32)
+
+    compensated = comp.compensate(frames)
+
+    assert compensated.shape == frames.shape
+    for frame, result in zip(frames, compensated):
+        np.testing.assert_array_equal(result, _compensate_reference(comp, frame))
+
+
+def test_fourth_harmonic_keeps_nan():
+    comp = _compensation(np.random.default_rng(1), np.float64, 125)
+    distances = np.array([[np.nan, 100.0]], dtype=np.float32)
+
+    compensated = comp.compensate(distances)
+
+    assert np.isnan(compensated[0, 0])
+    assert np.isfinite(compensated[0, 1])
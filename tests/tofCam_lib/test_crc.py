@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from epc.tofCam_lib.crc import Crc, CrcMode
 
 class Test_WithLib:
@@ -27,3 +30,48 @@ class Test_WithoutLib:
         assert crc.verify(bytearray([0xFA, 0x01, 0x00, 0x00]), [0x85, 0x6A, 0xD7, 0xDA])
 
         assert not crc.verify([0xFA, 0x01, 0x00, 0x00], bytearray([0x85, 0x6A, 0xD7, 0xDB]))
+
+
+def crc_bitwise(data, stm32: bool, polynom=0x04C11DB7, initvalue=0xFFFFFFFF, xorout=0):
+    """Reference implementation shifting bit by bit"""
+    crc = initvalue
+    for byte in data:
+        if stm32:
+            crc ^= byte << 24
+            bits = 8
+        else:
+            crc ^= byte
+            bits = 32
+        for _ in range(bits):
+            if crc & 0x80000000:
+                crc = ((crc << 1) & 0xFFFFFFFF) ^ polynom
+            else:
+                crc = (crc << 1) & 0xFFFFFFFF
+        crc ^= xorout
+    return crc
+
+
+class Test_TableDriven:
+    @pytest.mark.parametrize('size', [0, 1, 10, 1000])
+    @pytest.mark.parametrize('mode, stm32', [(CrcMode.CRC32_UINT8, False),
+                                             (CrcMode.CRC32_UINT8_LIB, False),
+                                             (CrcMode.CRC32_STM32, True)])
+    def test_matches_bitwise_calculation(self, mode, stm32, size):
+        data = bytearray(np.random.default_rng(size).integers(0, 256, size, dtype=np.uint8).tobytes())
+        assert Crc(mode=mode).calculate(data) == crc_bitwise(data, stm32)
+
+    @pytest.mark.parametrize('mode, stm32', [(CrcMode.CRC32_UINT8, False), (CrcMode.CRC32_STM32, True)])
+    def test_other_polynomial(self, mode, stm32):
+        data = bytearray(range(100))
+        crc = Crc(mode=mode, polynom=0x1EDC6F41, initvalue=0x12345678, xorout=0x5A)
+        assert not crc.useZlib
+        assert crc.calculate(data) == crc_bitwise(data, stm32, 0x1EDC6F41, 0x12345678, 0x5A)
+
+    def test_stm32_check_value(self):
+        # CRC-32/MPEG-2
+        assert Crc(mode=CrcMode.CRC32_STM32).calculate(b'123456789') == 0x0376E6E7
+
+    def test_lib_mode_without_lib(self):
+        crc = Crc(mode=CrcMode.CRC32_UINT8_LIB, revout=True)
+        crc.useLib = False
+        assert crc.calculate(bytearray([0xFA, 0x01, 0x00, 0x00])) == 0xDAD76A85
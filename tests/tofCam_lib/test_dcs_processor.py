@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from epc.tofCam_lib.algorithms import calc_distance_and_amplitude
+from epc.tofCam_lib.dcs_processor import (ADC_OVERFLOW, LOW_AMPLITUDE, SATURATION,
+                                          DcsProcessor)
+
+MOD_FREQ_HZ = 12E6
+
+
+def _random_dcs(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 4000, size=shape, dtype=np.uint16)
+
+
+def test_matches_reference_calculation():
+    dcs = _random_dcs((4, 240, 320))
+    processor = DcsProcessor((240, 320), MOD_FREQ_HZ, error_codes=False)
+    distance, amplitude = processor.process(dcs)
+
+    expected_distance, expected_amplitude = calc_distance_and_amplitude(dcs.astype(np.int32), MOD_FREQ_HZ)
+    np.testing.assert_allclose(amplitude, expected_amplitude, rtol=1e-5)
+    np.testing.assert_allclose(distance, expected_distance, rtol=1e-5, atol=1e-2)
+
+
+def test_offset_wraps_into_unambiguity_range():
+    dcs = _random_dcs((4, 60, 80))
+    processor = DcsProcessor((60, 80), MOD_FREQ_HZ, error_codes=False)
+    distance, _ = processor.process(dcs)
+    distance = distance.copy()
+    shifted, _ = processor.process(dcs, offset_mm=processor.unambiguity_mm / 2)
+
+    assert np.all((shifted >= 0) & (shifted <= processor.unambiguity_mm))
+    expected = (distance + processor.unambiguity_mm / 2) % processor.unambiguity_mm
+    np.testing.assert_allclose(shifted, expected, atol=1e-2)
+
+
+def test_error_codes():
+    dcs = _random_dcs((4, 2, 3))
+    dcs[:, 0, 0] = 1000  # no signal
+    dcs[1, 0, 1] = ADC_OVERFLOW
+    dcs[2, 0, 2] = SATURATION
+    dcs[3, 1, 0] = 64000
+    dcs[0, 1, 1] = ADC_OVERFLOW
+    dcs[3, 1, 1] = SATURATION
+
+    processor = DcsProcessor((2, 3), MOD_FREQ_HZ, min_amplitude=0)
+    distance, amplitude = processor.process(dcs)
+
+    assert distance[0, 0] == LOW_AMPLITUDE
+    assert distance[0, 1] == ADC_OVERFLOW and amplitude[0, 1] == ADC_OVERFLOW
+    assert distance[0, 2] == SATURATION and amplitude[0, 2] == SATURATION
+    assert np.isnan(distance[1, 0]) and np.isnan(amplitude[1, 0])
+    assert distance[1, 1] == SATURATION and amplitude[1, 1] == SATURATION
+    assert np.all(distance[1, 2:] < processor.unambiguity_mm)
+
+
+def test_batch_matches_single_frames():
+    dcs = _random_dcs((3, 4, 24, 32))
+    batch = DcsProcessor((3, 24, 32), MOD_FREQ_HZ, min_amplitude=20)
+    single = DcsProcessor((24, 32), MOD_FREQ_HZ, min_amplitude=20)
+
+    distances, amplitudes = batch.process(dcs, offset_mm=100)
+    for i in range(dcs.shape[0]):
+        distance, amplitude = single.process(dcs[i], offset_mm=100)
+        np.testing.assert_array_equal(distances[i], distance)
+        np.testing.assert_array_equal(amplitudes[i], amplitude)
+
+
+def test_writes_to_given_output():
+    dcs = _random_dcs((4, 24, 32))
+    processor = DcsProcessor((24, 32), MOD_FREQ_HZ)
+    out = (np.empty((24, 32, 2), np.float32)[..., 0], np.empty((24, 32, 2), np.float32)[..., 1])
+    distance, amplitude = processor.process(dcs, out=out)
+    assert distance is out[0] and amplitude is out[1]
+
+    expected_distance, expected_amplitude = processor.process(dcs)
+    np.testing.assert_array_equal(distance, expected_distance)
+    np.testing.assert_array_equal(amplitude, expected_amplitude)
+
+
+def test_rejects_wrong_shape():
+    processor = DcsProcessor((24, 32), MOD_FREQ_HZ)
+    with pytest.raises(ValueError):
+        processor.process(_random_dcs((4, 32, 24)))
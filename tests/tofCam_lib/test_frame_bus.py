@@ -0,0 +1,114 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from epc.tofCam_lib.frame_bus import FramePublisher, FrameSubscriber
+
+
+class FakeCamera:
+    class Settings:
+        roi = (0, 20, 320, 220)
+
+    def __init__(self):
+        self.settings = self.Settings()
+        self.count = 0
+
+    def get_distance_image(self):
+        self.count += 1
+        return np.full((200, 320), self.count, dtype=np.uint16)
+
+
+@pytest.fixture
+def publisher():
+    with FramePublisher(slots=4, slot_bytes=1024 * 1024) as publisher:
+        yield publisher
+
+
+def test_latest_frame(publisher):
+    with FrameSubscriber(publisher.name) as subscriber:
+        assert subscriber.latest() is None
+        distance = np.arange(12, dtype=np.uint16).reshape(3, 4)
+        amplitude = np.ones((3, 4), dtype=np.float32)
+        sequence = publisher.publish((distance, amplitude), timestamp=12.5, roi=(1, 2, 5, 5), temperature=35.5)
+
+        frame = subscriber.latest()
+        assert frame.sequence == sequence == 1
+        assert frame.timestamp == 12.5
+        assert frame.roi == (1, 2, 5, 5)
+        assert frame.temperature == 35.5
+        np.testing.assert_array_equal(frame.data[0], distance)
+        assert frame.data[1].dtype == np.float32
+        assert not frame.data[0].flags.writeable
+        assert frame.valid()
+        del frame
+
+
+def test_next_frames_and_overwritten_slots(publisher):
+    with FrameSubscriber(publisher.name) as subscriber:
+        publisher.publish(np.zeros(4))
+        frame = subscriber.next(timeout_s=0.1)
+        assert frame.sequence == 1 and frame.roi is None and frame.temperature is None
+        for value in range(1, 8):
+            publisher.publish(np.full(4, value))
+        assert not frame.valid()
+        with pytest.raises(BufferError):
+            frame.copy()
+
+        # the frames 2..4 were overwritten, the oldest slot is skipped as well
+        sequences = [subscriber.next(timeout_s=0.1).sequence for _ in range(3)]
+        assert sequences == [6, 7, 8]
+        assert subscriber.frames_missed == 4
+        with pytest.raises(TimeoutError):
+            subscriber.next(timeout_s=0.01)
+        del frame
+
+
+def test_invalid_frames(publisher):
+    with pytest.raises(ValueError):
+        publisher.publish(np.zeros(2 * 1024 * 1024, dtype=np.uint8))
+    with pytest.raises(ValueError):
+        publisher.publish(np.array([object()]))
+    assert publisher.sequence == 0
+
+
+def test_publish_camera(publisher):
+    camera = FakeCamera()
+    with FrameSubscriber(publisher.name) as subscriber:
+        publisher.start(camera)
+        frame = subscriber.next(timeout_s=1)
+        publisher.stop()
+        assert frame.data.shape == (200, 320)
+        assert frame.roi == (0, 20, 320, 220)
+        del frame
+
+
+def _sum_frames(name, count, results):
+    with FrameSubscriber(name) as subscriber:
+        sums = []
+        for frame in subscriber:
+            sums.append(int(frame.data.sum()))
+            if len(sums) == count:
+                break
+        del frame
+    results.put(sums)
+
+
+def test_subscriber_process(publisher):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_sum_frames, args=(publisher.name, 3, results))
+    process.start()
+    try:
+        for value in range(1, 100):
+            publisher.publish(np.full((10, 10), value, dtype=np.int32))
+            try:
+                sums = results.get(timeout=0.05)
+                break
+            except Exception:
+                continue
+    finally:
+        process.join(5)
+    assert len(sums) == 3
+    assert all(total % 100 == 0 for total in sums)
+    assert sums == sorted(sums)
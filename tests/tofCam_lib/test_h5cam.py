@@ -54,3 +54,76 @@ def test_h5cam_point_cloud():
     assert _pc.shape[1] == _amplitude.shape[0]
     assert __index == cam.index - 1
     assert cam.t_wait > 0
+
+
+def _write_record(path, n_frames=40):
+    import h5py
+    import numpy as np
+
+    frames = np.arange(n_frames * 6 * 8, dtype=np.uint16).reshape(n_frames, 6, 8)
+    timestamps = 1000.0 + 0.05 * np.arange(n_frames)
+    with h5py.File(path, "w") as f:
+        f.attrs["image_type"] = "Amplitude"
+        f.create_dataset("timestamps", data=timestamps)
+        f.create_dataset("frames_0", data=frames, chunks=(8, 6, 8))
+    return timestamps, frames
+
+
+def test_h5cam_reads_frames_on_demand(tmp_path):
+    import numpy as np
+
+    from epc.tofCam_lib.h5Cam import H5Cam
+    source_path = tmp_path / "amplitude.h5"
+    timestamps, frames = _write_record(source_path)
+    cam = H5Cam(source=source_path, continuous=False)
+    cam._cache_size = 4
+
+    assert len(cam) == len(frames)
+    np.testing.assert_array_equal(cam.timestamps, timestamps)
+    assert len(cam._cache) == 0
+
+    for index in (5, 6, 7, 30, 2):
+        _timestamp, _frame = cam[index]
+        assert _timestamp == timestamps[index]
+        np.testing.assert_array_equal(_frame, frames[index])
+    assert len(cam._cache) <= 4
+
+    with pytest.raises(StopIteration):
+        cam[len(frames)]
+    cam.close()
+
+
+def test_h5cam_continuous_playback_wraps(tmp_path):
+    import numpy as np
+
+    from epc.tofCam_lib.h5Cam import H5Cam
+    source_path = tmp_path / "amplitude.h5"
+    _, frames = _write_record(source_path, n_frames=10)
+    cam = H5Cam(source=source_path, continuous=True)
+    cam._prev_timestamp = None
+
+    for i in range(25):
+        cam._prev_timestamp = None  # no shutter delay
+        np.testing.assert_array_equal(cam.get_amplitude_image(), frames[i % len(frames)])
+    cam.close()
+
+
+def test_h5cam_prefetch_matches_synchronous_playback(tmp_path):
+    import numpy as np
+
+    from epc.tofCam_lib.h5Cam import H5Cam
+    source_path = tmp_path / "amplitude.h5"
+    _, frames = _write_record(source_path, n_frames=12)
+    cam = H5Cam(source=source_path, continuous=True, prefetch_frames=4)
+
+    expected = [i % len(frames) for i in range(20)] + [3, 4, 5]
+    for i, index in enumerate(expected):
+        if i == 20:
+            cam.update_index(3)  # seeking restarts the prefetcher
+        cam._prev_timestamp = None  # no shutter delay
+        np.testing.assert_array_equal(cam.get_amplitude_image(), frames[index])
+    assert cam._prefetcher is not None
+
+    cam.enable_continous(False)
+    assert cam._prefetcher is None
+    cam.close()
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+
+from epc.tofCam_lib.instrumentation import Instrumentation
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation = Instrumentation()
+    instrumentation.record('parse', 1000)
+    instrumentation.count('retries')
+    assert instrumentation.stats() == {'stages': {}, 'counters': {}}
+
+
+def test_percentiles_of_the_latest_window():
+    instrumentation = Instrumentation(window=100)
+    instrumentation.enable()
+    for duration_ms in range(1, 201):
+        instrumentation.record('receive', duration_ms * 1_000_000)
+    instrumentation.count('retries')
+    instrumentation.count('retries', 2)
+
+    stats = instrumentation.stats()
+    receive = stats['stages']['receive']
+    assert receive['count'] == 200
+    assert receive['mean_ms'] == pytest.approx(100.5)
+    # only the latest 100 samples, 101..200 ms
+    assert receive['p50_ms'] == pytest.approx(150.5)
+    assert receive['p99_ms'] == pytest.approx(199.01)
+    assert receive['max_ms'] == pytest.approx(200)
+    assert stats['counters'] == {'retries': 3}
+
+    instrumentation.reset()
+    assert instrumentation.stats() == {'stages': {}, 'counters': {}}
+
+
+def test_periodic_log(caplog):
+    instrumentation = Instrumentation('TestInstrumentation')
+    instrumentation.enable(log_interval_s=1E-9)
+    with caplog.at_level(logging.INFO, logger='TestInstrumentation'):
+        instrumentation.record('parse', 2_000_000)
+    assert 'parse: p50 2.00 ms' in caplog.text
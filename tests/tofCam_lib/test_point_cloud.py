@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from epc.tofCam_lib.point_cloud import PointCloudBuilder
+from epc.tofCam_lib.projection_models import (PinholeCameraProjector,
+                                              RadialCameraProjector)
+
+MAX_DEPTH = 16000
+
+
+def _depth(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    depth = rng.integers(100, 12000, size=shape, dtype=np.uint16)
+    depth[0, :3] = [MAX_DEPTH, 64001, 64003]
+    return depth
+
+
+def _reference(projector, depth, flip, roi_x=0, roi_y=0):
+    """Point cloud as calculated by the cameras before, with the image instead of the lens flipped"""
+    depth = depth.astype(np.float32)
+    depth[depth >= MAX_DEPTH] = np.nan
+    flipped = {None: depth, 'ud': np.flipud(depth), 'lr': np.fliplr(depth)}[flip]
+    points = 1E-3 * projector.project(flipped, roi_x=roi_x, roi_y=roi_y)
+    # undo the flip of the point order
+    return {None: points, 'ud': points[:, ::-1, :], 'lr': points[:, :, ::-1]}[flip]
+
+
+@pytest.mark.parametrize('flip', [None, 'ud', 'lr'])
+def test_build_matches_reference(flip):
+    projector = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+    depth = _depth((100, 120))
+    builder = PointCloudBuilder(flip=flip)
+
+    points = builder.build(projector, depth, MAX_DEPTH, roi_x=40, roi_y=60)
+    assert points.shape == (3, depth.size)
+    assert points.dtype == np.float32
+    expected = _reference(projector, depth, flip, roi_x=40, roi_y=60)
+    np.testing.assert_allclose(points.reshape(3, *depth.shape), expected, rtol=1e-6, atol=1e-7)
+    assert np.isnan(points[:, :3]).all()
+
+
+def test_build_into_given_buffer():
+    projector = PinholeCameraProjector((8, 8), focal_length_mm=1.0)
+    depth = _depth((8, 8))
+    out = np.empty((3, 64), dtype=np.float32)
+    builder = PointCloudBuilder(flip='lr')
+
+    assert builder.build(projector, depth, MAX_DEPTH, out=out) is out
+    np.testing.assert_allclose(out.reshape(3, 8, 8), _reference(projector, depth, 'lr'), rtol=1e-6, atol=1e-7)
+
+
+def test_build_valid_points_only():
+    projector = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+    depth = _depth((240, 320))
+    amplitude = np.arange(depth.size, dtype=np.uint16).reshape(depth.shape)
+    builder = PointCloudBuilder(flip='ud')
+
+    points, valid_amplitude = builder.build_valid(projector, depth, amplitude, MAX_DEPTH)
+    all_points = builder.build(projector, depth, MAX_DEPTH)
+    valid = depth.ravel() < MAX_DEPTH
+    assert points.shape == (3, valid.sum())
+    np.testing.assert_array_equal(valid_amplitude, amplitude.ravel()[valid])
+    np.testing.assert_allclose(points, all_points[:, valid], rtol=1e-6)
+
+
+def test_lens_matrix_follows_projector_and_roi():
+    builder = PointCloudBuilder()
+    wide = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+    narrow = RadialCameraProjector.from_lens_calibration('Narrow Field', 320, 240)
+    depth = _depth((240, 320))
+
+    np.testing.assert_allclose(builder.build(wide, depth, MAX_DEPTH).reshape(3, 240, 320),
+                               _reference(wide, depth, None), rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(builder.build(narrow, depth, MAX_DEPTH).reshape(3, 240, 320),
+                               _reference(narrow, depth, None), rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(builder.build(narrow, depth[:120], MAX_DEPTH, roi_y=120).reshape(3, 120, 320),
+                               _reference(narrow, depth[:120], None, roi_y=120), rtol=1e-6, atol=1e-7)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from epc.tofCam_lib.projection_models import (RadialCameraProjector,
+                                              _load_lens_table)
+
+
+def test_lens_calibration_matches_uncached_projector():
+    angle, rp = _load_lens_table('Wide Field')
+    expected = RadialCameraProjector(np.array(rp), np.array(angle), 320, 240)
+    projector = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+    np.testing.assert_array_equal(projector._lens_matrix, expected._lens_matrix)
+
+
+def test_lens_matrices_are_shared_and_read_only():
+    first = RadialCameraProjector.from_lens_calibration('Narrow Field', 320, 240)
+    second = RadialCameraProjector.from_lens_calibration('Narrow Field', 320, 240)
+    other = RadialCameraProjector.from_lens_calibration('Narrow Field', 160, 120)
+
+    assert first._lens_matrix is second._lens_matrix
+    assert other._lens_matrix is not first._lens_matrix
+    assert not first._lens_matrix.flags.writeable
+    with pytest.raises(ValueError):
+        first._lens_matrix[0, 0, 0] = 0
+
+
+def test_float32_lens_matrix():
+    projector = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240, dtype=np.float32)
+    reference = RadialCameraProjector.from_lens_calibration('Wide Field', 320, 240)
+    assert projector._lens_matrix.dtype == np.float32
+    np.testing.assert_allclose(projector._lens_matrix, reference._lens_matrix, rtol=1e-6)
+
+    depth = np.full((240, 320), 1000, dtype=np.float32)
+    assert projector.project(depth).dtype == np.float32
+
+
+def test_invalid_lens_type():
+    with pytest.raises(KeyError):
+        RadialCameraProjector.from_lens_calibration('Fisheye', 320, 240)